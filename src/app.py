@@ -3,8 +3,6 @@ from flask import Flask, render_template, request, jsonify, render_template_stri
 import json
 import os
 
-import pandas as pd
-
 from indicators.indicator_classes import INDICATOR_CLASSES
 from customization.customization_classes import IDENTIFY_ENTRY_CLASSES, IDENTIFY_EXIT_CLASSES, ENTRY_TRADE_CONDITIONS_CLASSES,EXIT_TRADE_CONDITIONS_CLASSES,BUY_STRATEGIES_CLASSES, SELL_STRATEGIES_CLASSES, EXIT_STRATEGIES_CLASSES
 
@@ -15,7 +13,9 @@ from core.position_tracking.statistics import Statistics
 from database.db_config_results_model import ConfigResult
 from database.db_config_results_access import create_entry, get_all_entries
 
-from init.initalization import load_csv_file
+from init.initalization import load_csv_file, cache_stats, invalidate_cached_data, get_gap_index
+from input.csv_input import time_range_to_unix
+from utils.chart_data import candles_payload, line_payload, split_points, visible_range
 
 from log.logger import setup_logger
 log = setup_logger("Flask", mode="On")
@@ -66,6 +66,39 @@ def fetch_config_results():
         app.logger.error("Failed to fetch config results: %s", e)
         return jsonify({"error": "Failed to fetch results"}), 500
 
+@app.route("/gaps", methods=["GET"])
+def fetch_gaps():
+    """
+    Missing minutes of a candle file. Query: csv_file (defaults to the file loaded on start),
+    optional start_time/end_time ("YYYY-MM-DD HH:MM") and limit on the number of gaps returned.
+    """
+    try:
+        csv_file = request.args.get("csv_file", DEFAULT_CSV_FILE)
+        start_time = request.args.get("start_time")
+        end_time = request.args.get("end_time")
+        limit = request.args.get("limit", default=1000, type=int)
+
+        gaps = get_gap_index(csv_file)
+        if start_time and end_time:
+            gaps = gaps.between(*time_range_to_unix(start_time, end_time))
+
+        return jsonify({"summary": gaps.summary(), "gaps": gaps.to_records(limit)}), 200
+
+    except Exception as e:
+        log.error(f"Error in gaps route: {str(e)}", exc_info=True)
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/cache-stats", methods=["GET"])
+def fetch_cache_stats():
+    return jsonify(cache_stats()), 200
+
+@app.route("/cache-invalidate", methods=["POST"])
+def invalidate_cache():
+    """Body (optional): {"csv_file": "..."}. Without a file every in-memory cache is cleared."""
+    json_data = request.get_json(silent=True) or {}
+    removed = invalidate_cached_data(json_data.get("csv_file"))
+    return jsonify({"status": "invalidated", "removed": removed}), 200
+
 @app.route("/save", methods=["POST"])
 def save():
     if LAST_BACKTEST_RESULT is None:
@@ -128,6 +161,26 @@ def save():
             "error": str(e)
         }), 500
 
+@app.route("/chart-data", methods=["GET"])
+def fetch_chart_data():
+    """
+    Candles and indicator lines of the last backtest for a visible range, e.g. after zooming the chart.
+    Query: start, end (unix seconds) and max_points, the number of points to reduce the range to.
+    """
+    if LAST_BACKTEST_RESULT is None:
+        return jsonify({"error": "No backtest result available. Call /submit first."}), 400
+
+    try:
+        config = LAST_BACKTEST_RESULT["config"]
+        max_points, start, end = _chart_range_args(request.args)
+        return jsonify({
+            "candles": _format_candle_data(config.main_time_series.df, max_points, start, end),
+            "indicators": _format_plotting(config.indicators, max_points, start, end),
+        }), 200
+    except Exception as e:
+        log.error(f"Error in chart-data route: {str(e)}", exc_info=True)
+        return jsonify({"error": str(e)}), 500
+
 @app.route("/submit", methods=["POST"])
 def submit():
     global LAST_BACKTEST_RESULT
@@ -184,9 +237,10 @@ def submit():
         }
 
         # === 4. Store everything globally ===
-        candle_data = _format_candle_data(config.main_time_series.df)
+        max_points, start, end = _chart_range_args(request.args)
+        candle_data = _format_candle_data(config.main_time_series.df, max_points, start, end)
         trade_markers = _build_trade_markers(closed_positions)
-        plotting = _format_plotting(config.indicators)
+        plotting = _format_plotting(config.indicators, max_points, start, end)
 
         # === 5. Render HTML partials ===
         trade_analysis_html = render_template(
@@ -228,34 +282,10 @@ def submit():
         }), 500
     
 
-def _format_candle_data(df):
-    # Format candle data for TradingView Lightweight Charts
-    candle_data = []
-    for idx, row in df.iterrows():
-        timestamp = row["Timestamp"]
-        open_val = row["Open"]
-        high_val = row["High"]
-        low_val = row["Low"]
-        close_val = row["Close"]
-        
-        # Skip rows with null/NaN values
-        if any(pd.isna(x) for x in [timestamp, open_val, high_val, low_val, close_val]):
-            continue
-        
-        try:
-            candle_data.append({
-                "time": int(timestamp),
-                "open": float(open_val),
-                "high": float(high_val),
-                "low": float(low_val),
-                "close": float(close_val),
-            })
-        except Exception as e:
-            log.warning(f"Error processing row {idx}: {e}")
-            continue
-
+def _format_candle_data(df, max_points=None, start=None, end=None):
+    # Format candle data for TradingView Lightweight Charts, rows with null/NaN values are skipped
+    candle_data = candles_payload(df, max_points, start, end)
     log.info(f"Generated {len(candle_data)} valid candles for chart")
-
     return candle_data
 
 def _build_trade_markers(closed_positions):
@@ -294,7 +324,7 @@ def _build_trade_markers(closed_positions):
 
     return trade_markers
 
-def _format_plotting(indicators):
+def _format_plotting(indicators, max_points=None, start=None, end=None):
     plotting = []
 
     for indicator in indicators:
@@ -302,31 +332,38 @@ def _format_plotting(indicators):
         if not indicator_plots:
             continue
 
+        # Rows of each plot inside the visible range, segments outside of it are skipped
+        visible_rows = []
         for plot in indicator_plots:
-            df = plot["data"]
+            window = visible_range(plot["data"]["Timestamp"].to_numpy(), start, end)
+            visible_rows.append(window.stop - window.start)
 
-            timestamps = []
-            values = []
+        # Each plot gets its share of max_points, so a line split in many segments is reduced as a whole
+        budgets = [None] * len(indicator_plots)
+        if max_points is not None:
+            budgets = split_points(visible_rows, max_points)
 
-            for idx, row in df.iterrows():
-                try:
-                    timestamps.append(int(row["Timestamp"]))
-                    # IMPORTANT: preserve None for JS null handling
-                    val = row["values"]
-                    values.append(None if pd.isna(val) else float(val))
-                except Exception as e:
-                    log.warning(f"Error processing row {idx}: {e}")
-                    continue
+        for plot, rows, plot_max_points in zip(indicator_plots, visible_rows, budgets):
+            df = plot["data"]
+            if rows == 0 or plot_max_points == 0:
+                continue # nothing of this plot is visible, or no points left for it
 
-            new_plot = plot.copy()
-            new_plot["data"] = {
-                "Timestamp": timestamps,
-                "values": values
-            }
+            # IMPORTANT: NaN values are kept as None for JS null handling
+            data = line_payload(df["Timestamp"].to_numpy(), df["values"].to_numpy(), plot_max_points, start, end)
 
+            new_plot = plot.copy()
+            new_plot["data"] = data
             plotting.append(new_plot)
     return plotting
 
+def _chart_range_args(args):
+    """Optional downsampling arguments: max_points and the visible range start/end (unix seconds)."""
+    return (
+        args.get("max_points", type=int),
+        args.get("start", type=int),
+        args.get("end", type=int),
+    )
+
 def log_closed_positions(closed_positions):
     if not closed_positions:
         log.info("No closed positions.")
@@ -0,0 +1,42 @@
+from collections.abc import Mapping
+import importlib
+
+'''
+Lazy lookup of the classes a config can be built from.
+
+Components are registered by the module they live in and imported the first time a config uses them,
+so building a config only imports the indicators and strategies it contains (and pandas_ta, numba, ...
+only if one of them needs it) instead of every component the backtester has.
+'''
+
+
+class ComponentRegistry(Mapping):
+    """Class name -> class, where each class is imported from its module on first lookup."""
+    def __init__(self, paths: dict[str, str]):
+        # "SupertrendMA" -> "indicators.supertrendMA"
+        self.paths = dict(paths)
+        self._classes = {}
+
+    def __getitem__(self, name: str) -> type:
+        cls = self._classes.get(name)
+        if cls is None:
+            try:
+                module_path = self.paths[name]
+            except KeyError:
+                raise KeyError(f"Unknown component '{name}'. Available: {', '.join(self.paths.keys())}")
+            cls = getattr(importlib.import_module(module_path), name)
+            self._classes[name] = cls
+        return cls
+
+    def __iter__(self):
+        return iter(self.paths)
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def __contains__(self, name) -> bool:
+        return name in self.paths
+
+    def loaded(self) -> list[str]:
+        """Names of the components imported so far."""
+        return list(self._classes.keys())
@@ -2,75 +2,51 @@ from init.config import Config
 from decimal import Decimal
 import json
 
-# === Indicators ===
-from indicators.simple_moving_average import SimpleMovingAverage
-from indicators.supertrend import Supertrend
-from indicators.supertrendMA import SupertrendMA
+from configs.component_registry import ComponentRegistry
 
-# === Identify Entry ===
-from customization.identify.entry.supertrend_ma import SupertrendMAEntry
-from customization.identify.entry.supertrend import SupertrendEntry
-from customization.identify.entry.time_interval import TimeIntervalEntry
+ENTRY_CONDITIONS = "customization.conditions.entry_trade_conditions"
+EXIT_CONDITIONS = "customization.conditions.exit_trade_conditions"
 
-# === Identify Exit ===
-from customization.identify.exit.supertrend_ma import SupertrendMAExit
-from customization.identify.exit.supertrend import SupertrendExit
-
-# === Entry Conditions ===
-from customization.conditions.entry_trade_conditions import NoEntryCondition, OnlyOneOpenBuyCondition, OnlyOneOpenPositionEntryCondition, MustBeWithinPercentEntryCondition
-
-# === Exit Conditions ===
-from customization.conditions.exit_trade_conditions import NoExitCondition, ExitOnPercentIncrease, ExitOnPercentDecrease, ExitOnPercentIncreaseAndPositionIsUnsold, ExitOnIncreaseOrDecrease, ExitIfBelowPrice, ExitAfterPeriodOfTime
-
-# === Buy Strategies ===
-from customization.buy_sell_strategies.buy_strategies import LimitBuyPercentEquity
-
-# === Sell Strategies ===
-from customization.buy_sell_strategies.sell_strategies import MarketSell
-
-# === Exit Strategies ===
-from customization.buy_sell_strategies.exit_strategies import LimitExitPercentAbove
-
-# Class lookup dictionary
-CLASS_MAP = {
+# Class lookup dictionary, each class is imported from its module the first time a config uses it
+CLASS_MAP = ComponentRegistry({
     # === Indicators ===
-    "Supertrend": Supertrend,
-    "SupertrendMA": SupertrendMA,
-    "SimpleMovingAverage": SimpleMovingAverage,
+    "Supertrend": "indicators.supertrend",
+    "SupertrendMA": "indicators.supertrendMA",
+    "SimpleMovingAverage": "indicators.simple_moving_average",
 
     # === Identify Entry ===
-    "SupertrendEntry": SupertrendEntry,
-    "SupertrendMAEntry": SupertrendMAEntry,
-    "TimeIntervalEntry": TimeIntervalEntry,
+    "SupertrendEntry": "customization.identify.entry.supertrend",
+    "SupertrendMAEntry": "customization.identify.entry.supertrend_ma",
+    "TimeIntervalEntry": "customization.identify.entry.time_interval",
 
     # === Identify Exit ===
-    "SupertrendExit": SupertrendExit,
-    "SupertrendMAExit": SupertrendMAExit,
+    "SupertrendExit": "customization.identify.exit.supertrend",
+    "SupertrendMAExit": "customization.identify.exit.supertrend_ma",
 
     # === Entry Conditions ===
-    "NoEntryCondition": NoEntryCondition,
-    "OnlyOneOpenBuyCondition": OnlyOneOpenBuyCondition,
-    "OnlyOneOpenPositionEntryCondition": OnlyOneOpenPositionEntryCondition,
-    "MustBeWithinPercentEntryCondition": MustBeWithinPercentEntryCondition,
+    "NoEntryCondition": ENTRY_CONDITIONS,
+    "OnlyOneOpenBuyCondition": ENTRY_CONDITIONS,
+    "OnlyOneOpenPositionEntryCondition": ENTRY_CONDITIONS,
+    "MustBeWithinPercentEntryCondition": ENTRY_CONDITIONS,
 
     # === Exit Conditions ===
-    "NoExitCondition": NoExitCondition,
-    "ExitOnPercentIncrease": ExitOnPercentIncrease,
-    "ExitOnPercentDecrease": ExitOnPercentDecrease,
-    "ExitOnPercentIncreaseAndPositionIsUnsold": ExitOnPercentIncreaseAndPositionIsUnsold,
-    "ExitOnIncreaseOrDecrease": ExitOnIncreaseOrDecrease,
-    "ExitIfBelowPrice": ExitIfBelowPrice,
-    "ExitAfterPeriodOfTime": ExitAfterPeriodOfTime,
+    "NoExitCondition": EXIT_CONDITIONS,
+    "ExitOnPercentIncrease": EXIT_CONDITIONS,
+    "ExitOnPercentDecrease": EXIT_CONDITIONS,
+    "ExitOnPercentIncreaseAndPositionIsUnsold": EXIT_CONDITIONS,
+    "ExitOnIncreaseOrDecrease": EXIT_CONDITIONS,
+    "ExitIfBelowPrice": EXIT_CONDITIONS,
+    "ExitAfterPeriodOfTime": EXIT_CONDITIONS,
 
     # === Buy Strategies ===
-    "LimitBuyPercentEquity": LimitBuyPercentEquity,
+    "LimitBuyPercentEquity": "customization.buy_sell_strategies.buy_strategies",
 
     # === Sell Strategies ===
-    "MarketSell": MarketSell,
+    "MarketSell": "customization.buy_sell_strategies.sell_strategies",
 
     # === Exit Strategies ===
-    "LimitExitPercentAbove": LimitExitPercentAbove,
-}
+    "LimitExitPercentAbove": "customization.buy_sell_strategies.exit_strategies",
+})
 
 def serialize_obj(obj, indicator_map=None):
     from core.time_series import TimeSeries
@@ -172,7 +148,8 @@ def config_to_json(config):
         "sell_strategy": serialize_obj(config.sell_strategy),
         "exit_strategy": serialize_obj(config.exit_strategy),
 
-        "csv_input_file": config.csv_input_file
+        "csv_input_file": config.csv_input_file,
+        "accounting": config.accounting
     }
 
 
@@ -232,7 +209,8 @@ def create_config_from_json(json_data):
         buy_strategy=buy_strategy,
         sell_strategy=sell_strategy,
         exit_strategy=exit_strategy,
-        csv_input_file=json_data["csv_input_file"]
+        csv_input_file=json_data["csv_input_file"],
+        accounting=json_data.get("accounting", "decimal")
     )
 
 
@@ -37,9 +37,15 @@ class BacktestClient(Client):
         s = self.exg_state  # shorthand for readability
 
         executable_orders = []
-        for order_number, order in s.order_book.items():
-            if order.order_is_executable(s.current_price, s, mode="BACKTEST"):
-                executable_orders.append(order)
+        if s.fixed_point:
+            # Compare in fixed point, the Decimal current price is not built on every check
+            for order in s.order_book.values():
+                if order.order_is_executable_fixed(s.current_price_fixed):
+                    executable_orders.append(order)
+        else:
+            for order_number, order in s.order_book.items():
+                if order.order_is_executable(s.current_price, s, mode="BACKTEST"):
+                    executable_orders.append(order)
 
         for order in executable_orders:
             logger.info(f"Executing order: {order.order_string()}")
@@ -1,11 +1,11 @@
 from decimal import Decimal
-import datetime
 import time
 import math
 
 from utils.calc import quantize
 from utils.calc import percent_change
-from utils.time_conversion import timestamp_to_datetime
+from utils.fixed_point import to_fixed, from_fixed, PRICE_SCALE
+from utils.time_conversion import LazyDatetime
 
 import logging
 from log.logger import LOGGER_NAME
@@ -13,6 +13,9 @@ logger = logging.getLogger(LOGGER_NAME)
 
 
 class ExchangeState:
+    # Whether current_price_fixed is kept, see FixedPointExchangeState
+    fixed_point = False
+
     def __init__(self, USD_holdings: Decimal, coin_holdings: Decimal, maker_fee: Decimal, taker_fee: Decimal):
         # Portfolio state
         self.USD_holdings = Decimal(USD_holdings)
@@ -43,7 +46,7 @@ class ExchangeState:
                 raise ValueError(f"{name} is NaN")
 
         # Check required fields
-        validate_not_none_and_not_nan("current_price", self.current_price)
+        self._validate_current_price(validate_not_none_and_not_nan)
         validate_not_none_and_not_nan("current_timestamp", self.current_timestamp)
         validate_not_none_and_not_nan("USD_holdings", self.USD_holdings)
         validate_not_none_and_not_nan("coin_holdings", self.coin_holdings)
@@ -57,6 +60,13 @@ class ExchangeState:
             logger.error(f"COIN HOLDINGS: {self.coin_holdings}")
             raise ValueError("coin_holdings < 0")
 
+    def _validate_current_price(self, validate) -> None:
+        validate("current_price", self.current_price)
+
+    def current_whole_price(self) -> int:
+        """The current price in whole dollars, rounded down."""
+        return int(self.current_price)
+
     def update_current_price_timestamp(self, current_price: float, timestamp: float) -> None:
         """Update the current market price and timestamp."""
         if current_price is None or math.isnan(current_price):
@@ -132,8 +142,9 @@ class ExchangeState:
     def get_portfolio_percent_change_from_start(self) -> Decimal:
         return percent_change(self.current_portfolio_value(), self.initial_portfolio_value)
 
-    def get_current_datetime(self) -> datetime:
-        return timestamp_to_datetime(self.current_timestamp)
+    def get_current_datetime(self) -> LazyDatetime:
+        """The current time as a string, formatted only when it is displayed."""
+        return LazyDatetime(self.current_timestamp)
 
     def log_portfolio(self) -> None:
         USD_holdings = f"{self.get_USD_holdings():.2f}"
@@ -145,3 +156,64 @@ class ExchangeState:
             f"USD hold: ${USD_holds} Coin Hold: {coin_holds}"
         )
 
+
+
+class FixedPointExchangeState(ExchangeState):
+    '''
+    ExchangeState with the current price kept as an int of millionths (utils.fixed_point).
+
+    The price is updated four times per 1 minute row, and building quantize(Decimal(price)) for each was the
+    largest cost of a row. Here an update is integer arithmetic, and the Decimal current_price is only built
+    when something reads it. Open positions, order fills and LimitAdjust compare current_price_fixed instead.
+    The holdings, fees and order amounts stay Decimal, they only change when an order is placed or filled.
+    The results are the same as with ExchangeState.
+    '''
+    fixed_point = True
+
+    def __init__(self, USD_holdings: Decimal, coin_holdings: Decimal, maker_fee: Decimal, taker_fee: Decimal):
+        self.current_price_fixed = None
+        self._current_price = None
+        super().__init__(USD_holdings, coin_holdings, maker_fee, taker_fee)
+
+    @property
+    def current_price(self) -> Decimal:
+        if self._current_price is None and self.current_price_fixed is not None:
+            self._current_price = from_fixed(self.current_price_fixed)
+        return self._current_price
+
+    @current_price.setter
+    def current_price(self, value) -> None:
+        self.current_price_fixed = None if value is None else to_fixed(value)
+        self._current_price = None
+
+    def _validate_current_price(self, validate) -> None:
+        validate("current_price", self.current_price_fixed)
+
+    def current_whole_price(self) -> int:
+        return self.current_price_fixed // PRICE_SCALE
+
+    def update_current_price_timestamp(self, current_price: float, timestamp: float) -> None:
+        """Update the current market price and timestamp."""
+        if current_price is None or math.isnan(current_price):
+            raise ValueError("Invalid current_price: None or NaN")
+
+        current_price_fixed = to_fixed(current_price)
+        if current_price_fixed != self.current_price_fixed:
+            self.current_price_fixed = current_price_fixed
+            self._current_price = None
+        self.current_timestamp = timestamp
+
+        self.set_initial_conditions_if_first_iteration()
+
+
+ACCOUNTING_BACKENDS = {
+    "decimal": ExchangeState,
+    "fixed": FixedPointExchangeState,
+}
+
+def exchange_state_factory(accounting: str, USD_holdings, coin_holdings, maker_fee, taker_fee) -> ExchangeState:
+    exchange_state_class = ACCOUNTING_BACKENDS.get(accounting.lower())
+    if not exchange_state_class:
+        raise ValueError(f"Unknown accounting backend: '{accounting}'. Expected one of {list(ACCOUNTING_BACKENDS)}")
+
+    return exchange_state_class(USD_holdings, coin_holdings, maker_fee, taker_fee)
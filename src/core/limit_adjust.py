@@ -2,6 +2,15 @@ import logging
 from log.logger import LOGGER_NAME
 logger = logging.getLogger(LOGGER_NAME)
 
+class _LazyMessage:
+    __slots__ = ("build",)
+
+    def __init__(self, build):
+        self.build = build
+
+    def __str__(self):
+        return self.build()
+
 class LimitAdjust:
     def __init__(self, mode, limit_order_duration_sec=3600):
         self.mode = mode
@@ -34,7 +43,6 @@ class LimitAdjust:
 
     def _buy_limit_order_adjust(self, buy_order, place_buy, exg_state, buy_strategy):
         placed_market_price = buy_order.placed.market_price
-        current_market_price = exg_state.current_price
 
         message = self._get_message(buy_order, exg_state, placed_market_price)
 
@@ -46,11 +54,11 @@ class LimitAdjust:
                 return
 
         # Market price has DECREASED or stayed the same — no need to adjust
-        if int(current_market_price) <= int(placed_market_price):
-            logger.info(f"No Limit Adjust (price hasn't increased) for buy order {buy_order.order_number}:\n{message}")
+        if exg_state.current_whole_price() <= int(placed_market_price):
+            logger.info("No Limit Adjust (price hasn't increased) for buy order %s:\n%s", buy_order.order_number, message)
             return
 
-        logger.info("Limit order adjust: " + message)
+        logger.info("Limit order adjust: %s", message)
 
         if place_buy.cancel_buy_order(buy_order, exg_state):
             new_order = buy_strategy.create_buy_order(None, None, exg_state)
@@ -73,7 +81,6 @@ class LimitAdjust:
 
     def _sell_limit_order_adjust(self, sell_order, place_sell, exg_state, trading_state, sell_strategy):
         placed_market_price = sell_order.placed.market_price
-        current_market_price = exg_state.current_price
         open_position = trading_state.get_position_by_sell_order_number(sell_order.order_number)
 
         message = self._get_message(sell_order, exg_state, placed_market_price)
@@ -86,11 +93,11 @@ class LimitAdjust:
                 return
         
         # Market price has INCREASED or stayed the same — no need to adjust
-        if int(current_market_price) >= int(placed_market_price):
-            logger.info(f"No Limit Adjust (price hasn't increased) for SELL order {sell_order.order_number}:\n{message}")
+        if exg_state.current_whole_price() >= int(placed_market_price):
+            logger.info("No Limit Adjust (price hasn't increased) for SELL order %s:\n%s", sell_order.order_number, message)
             return
 
-        logger.info("Limit order adjust: " + message)
+        logger.info("Limit order adjust: %s", message)
 
         if place_sell.cancel_sell_order(sell_order, exg_state):
             new_order = sell_strategy.create_sell_order(open_position, None, None, exg_state)
@@ -141,12 +148,17 @@ class LimitAdjust:
 
 
     def _get_message(self, order, exg_state, placed_price):
-        return (
+        '''
+        Limit orders are checked on every candle, so the message is only built if it is logged.
+        Pass it to the logger as a %s argument rather than formatting it into an f-string.
+        '''
+        current_datetime = exg_state.get_current_datetime()
+        return _LazyMessage(lambda: (
             f"{order.order_string()}\n"
-            f"\tCurrent Time: {exg_state.get_current_datetime()}\n"
+            f"\tCurrent Time: {current_datetime}\n"
             f"\tCurrent Price: ${exg_state.current_price:.2f}\n"
             f"\tPlaced Price: ${int(placed_price)}"
-        )
+        ))
     
     def _create_new_order_string(self, order, new_order, exg_state):
         old_order_nums = ', '.join(map(str, new_order.old_limit_order_numbers))
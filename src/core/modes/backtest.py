@@ -4,13 +4,17 @@ from init.config import Config
 from decorators.timeit import timeit
 
 from utils.time_conversion import START_END_TIME_FORMAT
+from input.candle_feed import CandleFeed
+from core.modes.fast_forward import FastForward
+from core.modes.intrabar_path import IntrabarPath
+from core.modes.vectorized import VectorizedBacktest
 
 import logging
 from log.logger import LOGGER_NAME
 logger = logging.getLogger(LOGGER_NAME)
 
 class Backtest:
-    def __init__(self, config: 'Config'):
+    def __init__(self, config: 'Config', fast_forward: bool = True, intrabar_path: str = None, vectorized: bool = True):
         # Store config reference
         self.config = config
 
@@ -41,10 +45,23 @@ class Backtest:
         self.start_unix = config.start_unix
         self.end_unix = config.end_unix
 
+        # Resolve the fills of a row along one price path ("OLHC", "OHLC", "closest") instead of checking its open, low and high
+        self.intrabar_path = IntrabarPath(self, intrabar_path) if intrabar_path else None
+
+        # Jump over the 1 minute rows where nothing can happen. The results are the same as visiting every row
+        if fast_forward and min(time_series.candle_size_seconds for time_series in self.time_series_list) <= 60:
+            # A 1 minute time series closes a candle on every row, so every row is an event and skipping only costs time
+            logger.info("Fast forward disabled: a 1 minute time series makes every row an event")
+            fast_forward = False
+        self.fast_forward = FastForward(self) if fast_forward else None
+
+        # Run the configs VectorizedBacktest supports from arrays, the others (or vectorized=False) in the event engine
+        self.vectorized = VectorizedBacktest(self) if vectorized else None
+
 
     @timeit
-    def execute(self, df):
-        logger.info(df)
+    def execute(self, feed):
+        logger.info(feed)
 
         '''Convert time_series Timestamp column to a list. This MASSIVELY improves speed'''
         list_timestamp = {} #the timestamp list of a time_series
@@ -53,65 +70,95 @@ class Backtest:
             #list_timestamp[time_series] = time_series.df["Timestamp"].tolist()
             list_timestamp[time_series] = time_series.df["Timestamp"].to_numpy()
 
-        timestamps = df["Timestamp"].to_numpy()
-        opens = df["Open"].to_numpy()
-        lows = df["Low"].to_numpy()
-        highs = df["High"].to_numpy()
-
-        for i in range(len(df)):
-            '''Treat the current state as the start of the candle. Ex: At 1200, the price is 'X'. Hence use open price'''
-            ''' Perform checks on the highs and lows to see if order executed. Then set price at open for candles'''
-            self._perform_checks(opens[i], timestamps[i])
-            self._perform_checks(lows[i], timestamps[i])
-            self._perform_checks(highs[i], timestamps[i])
-            self.exg_state.update_current_price_timestamp(opens[i], timestamps[i])
-
-            '''
-            Check each time_series and see if the current timestamp matches the next timestamp in the time_series.
-            If it matches, we've reached the next candle in the time_series, meaning it's been updated
-            '''
-            timestamp = timestamps[i]
-            time_series_updated = []
-            for time_series in self.time_series_list:
-                timestamp_numpy = list_timestamp[time_series]
-
-                '''Prevent index 'out of bounds' '''
-                if(time_series.time_series_index + 2 >= len(timestamp_numpy)):
-                    continue
+        '''
+        Read the 1 minute candles straight from the feed arrays.
+        A streamed backtest passes an iterable of CandleFeed chunks instead, which are consumed one at a time
+        '''
+        chunks = [feed] if isinstance(feed, CandleFeed) else feed
+
+        '''Entry/exit signals that only depend on the populated indicators are computed once, the loop looks them up by index'''
+        for identify in self.config.identify_entry + self.config.identify_exit:
+            if hasattr(identify, "precompute_signals"):
+                identify.precompute_signals()
+
+        if self.vectorized is not None and self.vectorized.run(feed, list_timestamp):
+            self.vectorized.log_summary()
+            return
+
+        for chunk in chunks:
+            timestamps = chunk.timestamps
+            opens = chunk.opens
+            lows = chunk.lows
+            highs = chunk.highs
+            closes = chunk.closes
+
+            i = 0
+            while i < len(chunk):
+                '''Treat the current state as the start of the candle. Ex: At 1200, the price is 'X'. Hence use open price'''
+                if self.intrabar_path is None:
+                    ''' Perform checks on the highs and lows to see if order executed. Then set price at open for candles'''
+                    self._perform_checks(opens[i], timestamps[i])
+                    self._perform_checks(lows[i], timestamps[i])
+                    self._perform_checks(highs[i], timestamps[i])
+                self.exg_state.update_current_price_timestamp(opens[i], timestamps[i])
 
                 '''
-                Consider time_series updated if we have reached the end time of the current index.
-                Ex: 5 minute candle -> Begins at 12:00, we should consider it updated/complete at the 12:05 minute candle
-                Ex: 5 minute candle -> At timestamp 12:07, the index should be at the 12:00 candle
-                A live intake would update at 12:04 candle, since the candle would be complete at 12:05
+                Check each time_series and see if the current timestamp matches the next timestamp in the time_series.
+                If it matches, we've reached the next candle in the time_series, meaning it's been updated
                 '''
-                if(timestamp >= timestamp_numpy[time_series.time_series_index + 1] + time_series.candle_size_seconds):
-                    time_series_updated.append(time_series)
-                    time_series.time_series_index = time_series.time_series_index + 1
+                timestamp = timestamps[i]
+                time_series_updated = []
+                for time_series in self.time_series_list:
+                    timestamp_numpy = list_timestamp[time_series]
+
+                    '''Prevent index 'out of bounds' '''
+                    if(time_series.time_series_index + 2 >= len(timestamp_numpy)):
+                        continue
+
+                    '''
+                    Consider time_series updated if we have reached the end time of the current index.
+                    Ex: 5 minute candle -> Begins at 12:00, we should consider it updated/complete at the 12:05 minute candle
+                    Ex: 5 minute candle -> At timestamp 12:07, the index should be at the 12:00 candle
+                    A live intake would update at 12:04 candle, since the candle would be complete at 12:05
+                    '''
+                    if(timestamp >= timestamp_numpy[time_series.time_series_index + 1] + time_series.candle_size_seconds):
+                        time_series_updated.append(time_series)
+                        time_series.time_series_index = time_series.time_series_index + 1
 
                 
-                # logger.info("SIZE: " + time_series.candle_string)
-                # logger.info("Current Timestamp: " + utils.convert_time(namedtuple_candle.Timestamp))
-                # logger.info("Index Timestamp: " + utils.convert_time(timestamp_list[time_series.time_series_index]))
-                # logger.info("Update Timestamp: " + utils.convert_time(timestamp_list[time_series.time_series_index + 1]  + time_series.candle_size_seconds))
-                # logger.info(str(time_series.candle_size_seconds) + " " + str(time_series.time_series_index) + " " + time_series.candle_list_dict[time_series.time_series_index]["Datetime"] + " " + utils.convert_time(namedtuple_candle.Timestamp))
-
-
-            '''If a time_series was updated, execute trading_strategy'''
-            if self.min_num_candles_buffered and time_series_updated and timestamp >= self.start_unix:
-                #Update OpenPositions first
-                # if self.main_time_series in time_series_updated:
-                #     self.trading_state.update_open_positions(Decimal(opens[i]))
-
-                self.trading.execute_trading_strategy(self.exg_state, time_series_updated)
-                self.client.check_orders_for_execution()
-                self.trading.check_open_orders_for_completion(self.exg_state)
-
-
-
-            '''Check here following the increment of the index. Takes effect the next iteration'''
-            self._check_min_num_of_candles()
-            self.exg_state.validate_exchange_state()
+                    # logger.info("SIZE: " + time_series.candle_string)
+                    # logger.info("Current Timestamp: " + utils.convert_time(namedtuple_candle.Timestamp))
+                    # logger.info("Index Timestamp: " + utils.convert_time(timestamp_list[time_series.time_series_index]))
+                    # logger.info("Update Timestamp: " + utils.convert_time(timestamp_list[time_series.time_series_index + 1]  + time_series.candle_size_seconds))
+                    # logger.info(str(time_series.candle_size_seconds) + " " + str(time_series.time_series_index) + " " + time_series.candle_list_dict[time_series.time_series_index]["Datetime"] + " " + utils.convert_time(namedtuple_candle.Timestamp))
+
+
+                '''If a time_series was updated, execute trading_strategy'''
+                if self.min_num_candles_buffered and time_series_updated and timestamp >= self.start_unix:
+                    #Update OpenPositions first
+                    # if self.main_time_series in time_series_updated:
+                    #     self.trading_state.update_open_positions(Decimal(opens[i]))
+
+                    self.trading.execute_trading_strategy(self.exg_state, time_series_updated)
+                    self.client.check_orders_for_execution()
+                    self.trading.check_open_orders_for_completion(self.exg_state)
+
+                '''With a path model the orders placed at the open can fill within the same row'''
+                if self.intrabar_path is not None:
+                    self.intrabar_path.evaluate(opens[i], lows[i], highs[i], closes[i], timestamps[i])
+
+                '''Check here following the increment of the index. Takes effect the next iteration'''
+                self._check_min_num_of_candles()
+                self.exg_state.validate_exchange_state()
+
+                i += 1
+                if self.fast_forward is not None and i < len(chunk):
+                    i = self.fast_forward.skip(chunk, i, list_timestamp)
+
+        if self.fast_forward is not None:
+            self.fast_forward.log_summary()
+        if self.intrabar_path is not None:
+            self.intrabar_path.log_summary()
 
     def _perform_checks(self, price, timestamp):
         self.exg_state.update_current_price_timestamp(price, timestamp)
@@ -0,0 +1,167 @@
+from decimal import Decimal
+
+import numpy as np
+
+from utils.calc import quantize
+from utils.range_extremes import RangeExtremes
+
+import logging
+from log.logger import LOGGER_NAME
+logger = logging.getLogger(LOGGER_NAME)
+
+'''
+Event driven fast forward for Backtest.execute.
+
+Most 1 minute rows change nothing: no time series candle closes, no resting order can fill, be adjusted
+or expire, and the open positions only record the prices they have seen. After each row the next row
+where something can happen (the next event) is found, and the rows before it are applied in one step.
+Price events are found in O(log n) with range min/max indexes over the row lows and highs, so a limit
+order resting for days costs as little as one that fills on the next minute.
+
+Events:
+    a time series candle closes (the strategy runs, indicators move on)
+    a price reaches a resting limit order (it fills)
+    a price crosses the level where LimitAdjust replaces a limit order
+    a limit order reaches its fill time (LimitAdjust cancels it)
+    a row with a missing price (processed normally, so the error is the same)
+    any MARKET order on the book (executes on the next check)
+
+Price levels are compared with a small margin, so a row close to a level is processed like any other
+row. A skipped row is one where the per minute engine provably changes nothing but the current price
+and the price extremes of the open positions, which makes the results identical.
+
+With a 1 minute time series every row closes a candle, so Backtest does not create a FastForward then.
+'''
+
+# Prices are quantized to 6 decimals (rounded down). Rows within this distance of a level are events.
+PRICE_MARGIN = 1e-5
+
+
+class FastForward:
+    def __init__(self, backtest):
+        self.exg_state = backtest.exg_state
+        self.trading_state = backtest.trading_state
+        self.limit_adjust = backtest.limit_adjust
+        self.time_series_list = backtest.time_series_list
+        # With an intrabar path model a row also goes through its close, and ends there
+        self.intrabar_path = backtest.intrabar_path is not None
+
+        self.rows_skipped = 0
+        self.jumps = 0
+
+        self._chunk = None
+
+    def _prepare(self, chunk) -> None:
+        """Per row lowest and highest price of the current chunk (NaN for a missing price), and their range indexes."""
+        if self._chunk is chunk:
+            return
+        self._chunk = chunk
+        self.row_low = np.minimum(np.minimum(chunk.opens, chunk.lows), chunk.highs)
+        self.row_high = np.maximum(np.maximum(chunk.opens, chunk.lows), chunk.highs)
+        if self.intrabar_path:
+            self.row_low = np.minimum(self.row_low, chunk.closes)
+            self.row_high = np.maximum(self.row_high, chunk.closes)
+        self.low_index = RangeExtremes(self.row_low, "min")
+        self.high_index = RangeExtremes(self.row_high, "max")
+
+    def skip(self, chunk, start: int, list_timestamp: dict) -> int:
+        """
+        Apply the rows from start up to the next event at once.
+
+        Returns:
+            int: Index of the next row the per minute engine has to process
+        """
+        self._prepare(chunk)
+        # A time series that fell behind (a gap in the data) closes another candle right away
+        event = max(start, self.next_event(chunk, start, list_timestamp))
+        if event > start:
+            self._apply(chunk, start, event)
+            self.rows_skipped += event - start
+            self.jumps += 1
+        return event
+
+    def next_event(self, chunk, start: int, list_timestamp: dict) -> int:
+        timestamps = chunk.timestamps
+        stop = len(chunk)
+
+        '''Time based events: the next candle close of every time series, and the limit order fill times'''
+        for time_series in self.time_series_list:
+            timestamp_numpy = list_timestamp[time_series]
+            if time_series.time_series_index + 2 >= len(timestamp_numpy):
+                continue
+            candle_close = timestamp_numpy[time_series.time_series_index + 1] + time_series.candle_size_seconds
+            stop = min(stop, int(np.searchsorted(timestamps, candle_close, side="left")))
+
+        '''Price based events: a row whose low is at or below low_level, or whose high is at or above high_level'''
+        low_level = -np.inf
+        high_level = np.inf
+        for order in self.exg_state.order_book.values():
+            if order.order_type != "LIMIT":
+                return start
+
+            limit_price = float(order.limit_price)
+            if order.order_side == "BUY":
+                low_level = max(low_level, limit_price + PRICE_MARGIN)
+            else:
+                high_level = min(high_level, limit_price - PRICE_MARGIN)
+
+            if order.allow_limit_adjust:
+                expiry = order.placed.timestamp + self.limit_adjust.limit_order_duration_sec
+                stop = min(stop, int(np.searchsorted(timestamps, expiry, side="left")))
+
+                # LimitAdjust replaces the order once the whole dollar price moves away from the placed price
+                placed_price = int(order.placed.market_price)
+                if order.order_side == "BUY":
+                    high_level = min(high_level, placed_price + 1 - PRICE_MARGIN)
+                else:
+                    low_level = max(low_level, placed_price + PRICE_MARGIN)
+
+        return self._first_event_row(start, stop, low_level, high_level)
+
+    def _first_event_row(self, start: int, stop: int, low_level: float, high_level: float) -> int:
+        # Both searches also stop at a row with a missing price. With no level the low search only looks for those
+        stop = self.low_index.first_reaching(start, low_level, stop)
+        if high_level != np.inf:
+            stop = self.high_index.first_reaching(start, high_level, stop)
+        return stop
+
+    def _apply(self, chunk, start: int, end: int) -> None:
+        """The state the per minute engine leaves after rows [start, end) when none of them is an event."""
+        timestamps = chunk.timestamps
+
+        if self.trading_state.open_positions:
+            rows = slice(start, end)
+            highest, highest_timestamp = self._first_extreme(chunk, rows, self.row_high, np.argmax, max)
+            lowest, lowest_timestamp = self._first_extreme(chunk, rows, self.row_low, np.argmin, min)
+
+            # Each row checks the open, the low and the high
+            checks = 3 * (end - start)
+            for open_position in self.trading_state.open_positions.values():
+                open_position.update_position_range(highest, highest_timestamp, lowest, lowest_timestamp, checks)
+
+        '''The last row ends with the price at its open, or at its close with an intrabar path model'''
+        last_prices = chunk.closes if self.intrabar_path else chunk.opens
+        self.exg_state.update_current_price_timestamp(last_prices[end - 1], timestamps[end - 1])
+
+    def _first_extreme(self, chunk, rows: slice, row_extremes, arg_extreme, extreme) -> tuple[Decimal, int]:
+        """
+        Quantized highest (or lowest) price of the rows and the timestamp of the first row that reaches it.
+        Prices that only differ after the 6th decimal quantize to the same value, so the rows near the float
+        extreme are checked with the exact quantization, in order.
+        """
+        extremes = row_extremes[rows]
+        target = quantize(Decimal(extremes[arg_extreme(extremes)]))
+
+        near = np.flatnonzero(np.abs(extremes - float(target)) <= PRICE_MARGIN)
+        for i in near:
+            row = rows.start + int(i)
+            prices = (chunk.opens[row], chunk.lows[row], chunk.highs[row])
+            if self.intrabar_path:
+                prices += (chunk.closes[row],)
+            if extreme(quantize(Decimal(price)) for price in prices) == target:
+                return target, chunk.timestamps[row]
+
+        raise RuntimeError(f"Fast forward: no row reaches the extreme price {target}")
+
+    def log_summary(self) -> None:
+        logger.info(f"Fast forward: {self.rows_skipped} rows skipped in {self.jumps} jumps")
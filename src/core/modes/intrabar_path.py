@@ -0,0 +1,152 @@
+import math
+
+from utils.fixed_point import to_fixed, from_fixed, PRICE_SCALE
+
+import logging
+from log.logger import LOGGER_NAME
+logger = logging.getLogger(LOGGER_NAME)
+
+'''
+Intrabar path model for Backtest.execute.
+
+By default every 1 minute row is checked at its open, low and high, each check running the position
+updates, the order scan, the completion checks and LimitAdjust, and then the price is set back to the open.
+With a path model the strategy acts at the open of the row and the bar is walked once along a price path:
+
+    OLHC     open -> low -> high -> close
+    OHLC     open -> high -> low -> close
+    closest  open -> the extreme closest to the open -> the other extreme -> close
+
+Limit orders are resolved in the order the path reaches their prices, each at the price where it is
+reached, so an order placed by a fill (an exit order) can fill later in the same bar. An order whose
+price is outside of a leg costs a single comparison. LimitAdjust runs at the open and, when one of its
+orders would be replaced, at the two extremes, the same points the default checks. The open positions
+record the range of the path once per bar, or once per fill when there is one.
+
+Prices on the path are fixed point (utils.fixed_point), a level is reached when the quantized price
+reaches it, the same comparison the exchange state makes.
+'''
+
+PATH_MODELS = ("OLHC", "OHLC", "closest")
+
+# Checks per bar counted in OpenPosition.bars, the same as the open/low/high checks of the default
+CHECKS_PER_BAR = 3
+
+
+class IntrabarPath:
+    def __init__(self, backtest, model: str):
+        if model not in PATH_MODELS:
+            raise ValueError(f"Unknown intrabar path model: '{model}'. Expected one of {list(PATH_MODELS)}")
+        self.model = model
+
+        self.exg_state = backtest.exg_state
+        self.trading_state = backtest.trading_state
+        self.client = backtest.client
+        self.trading = backtest.trading
+        self.limit_adjust = backtest.limit_adjust
+        self.buy_strategy = backtest.buy_strategy
+        self.sell_strategy = backtest.sell_strategy
+
+        self.fills = 0
+
+    def path(self, open_price: float, low: float, high: float, close: float) -> list[int]:
+        """The fixed point prices the path goes through, in order."""
+        open_fixed, low_fixed, high_fixed, close_fixed = to_fixed(open_price), to_fixed(low), to_fixed(high), to_fixed(close)
+        if self.model == "OLHC" or (self.model == "closest" and open_fixed - low_fixed <= high_fixed - open_fixed):
+            return [open_fixed, low_fixed, high_fixed, close_fixed]
+        return [open_fixed, high_fixed, low_fixed, close_fixed]
+
+    def evaluate(self, open_price: float, low: float, high: float, close: float, timestamp) -> None:
+        """Resolve the fills of one bar, the price is at its open. Ends with the price at the close."""
+        for price in (low, high, close):
+            if math.isnan(price):
+                raise ValueError("Invalid current_price: None or NaN")
+
+        '''Everything executable at the open, and the LimitAdjust timeouts'''
+        self._settle(None, timestamp)
+
+        if not self.exg_state.order_book and not self.trading_state.open_positions:
+            self.exg_state.update_current_price_timestamp(close, timestamp)
+            return
+
+        path = self.path(open_price, low, high, close)
+
+        # Position on the path: (leg, price), leg k goes from path[k] to path[k + 1]
+        position = (0, path[0])
+        for leg in range(len(path) - 1):
+            '''Fills inside the leg, in the order the price reaches them'''
+            while True:
+                fill = self._next_fill(leg, position[1], path[leg + 1])
+                if fill is None:
+                    break
+                self._record_range(path, position, fill, timestamp, checks=0)
+                self._settle(from_fixed(fill[1]), timestamp, adjust=False)
+                self.fills += 1
+                position = fill
+
+            '''LimitAdjust looks at the extremes, like the open/low/high checks of the default'''
+            vertex = path[leg + 1]
+            if leg + 1 < len(path) - 1 and self._limit_adjust_reached(vertex):
+                vertex_position = (leg + 1, vertex)
+                self._record_range(path, position, vertex_position, timestamp, checks=0)
+                self._settle(from_fixed(vertex), timestamp)
+                position = vertex_position
+
+        end = (len(path) - 2, path[-1])
+        self._record_range(path, position, end, timestamp, checks=CHECKS_PER_BAR)
+        self.exg_state.update_current_price_timestamp(close, timestamp)
+
+    def _settle(self, price, timestamp, adjust: bool = True) -> None:
+        """The checks of Backtest._perform_checks, without the open position update. price None keeps the current price."""
+        if price is not None:
+            self.exg_state.update_current_price_timestamp(price, timestamp)
+        self.client.check_orders_for_execution()
+        self.trading.check_open_orders_for_completion(self.exg_state)
+        if adjust:
+            self.limit_adjust.adjust_limit_orders(self.trading.placeBuy, self.trading.placeSell, self.exg_state, self.trading_state, self.buy_strategy, self.sell_strategy)
+
+    def _next_fill(self, leg: int, start: int, end: int):
+        """
+        The first (leg, price) after start on the leg where the price reaches a limit order, None if there is none.
+        Orders whose limit price is outside of the leg are skipped with a single comparison.
+        """
+        reached = None
+        for order in self.exg_state.order_book.values():
+            if order.order_type != "LIMIT":
+                continue
+
+            level = order.limit_price_fixed
+            if order.order_side == "BUY":
+                # Going down, the highest BUY limit is reached first
+                if end <= level < start and (reached is None or level > reached):
+                    reached = level
+            elif start < level <= end and (reached is None or level < reached):
+                reached = level
+
+        return None if reached is None else (leg, reached)
+
+    def _limit_adjust_reached(self, price_fixed: int) -> bool:
+        """Whether LimitAdjust would replace an order at this price, see LimitAdjust.adjust_limit_orders."""
+        for order in self.exg_state.order_book.values():
+            if order.order_type != "LIMIT" or not order.allow_limit_adjust:
+                continue
+
+            placed_price = int(order.placed.market_price)
+            if order.order_side == "BUY" and price_fixed >= (placed_price + 1) * PRICE_SCALE:
+                return True
+            if order.order_side == "SELL" and price_fixed < placed_price * PRICE_SCALE:
+                return True
+        return False
+
+    def _record_range(self, path: list[int], start: tuple[int, int], end: tuple[int, int], timestamp, checks: int) -> None:
+        """Update the open positions with the prices of the path from start to end."""
+        if not self.trading_state.open_positions:
+            return
+
+        prices = [start[1]] + path[start[0] + 1:end[0] + 1] + [end[1]]
+        highest, lowest = from_fixed(max(prices)), from_fixed(min(prices))
+        for open_position in self.trading_state.open_positions.values():
+            open_position.update_position_range(highest, timestamp, lowest, timestamp, checks)
+
+    def log_summary(self) -> None:
+        logger.info(f"Intrabar path {self.model}: {self.fills} limit prices reached inside bars")
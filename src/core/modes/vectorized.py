@@ -0,0 +1,520 @@
+from collections import namedtuple
+
+import numpy as np
+
+from input.candle_feed import CandleFeed
+from core.trading import Trading
+from core.strategy import Strategy
+from core.limit_adjust import LimitAdjust
+from core.clients.backtest_client import BacktestClient
+from core.position_tracking.open_position import OpenPosition
+from core.position_tracking.closed_position import ClosedPosition
+from customization.buy_sell_strategies.buy_strategies import LimitBuyPercentEquity
+from customization.buy_sell_strategies.sell_strategies import MarketSell
+from customization.buy_sell_strategies.exit_strategies import LimitExitPercentAbove
+from customization.conditions.entry_trade_conditions import NoEntryCondition, OnlyOneOpenBuyCondition, OnlyOneOpenPositionEntryCondition
+from customization.conditions.exit_trade_conditions import (
+    NoExitCondition, ExitOnPercentIncrease, ExitOnPercentDecrease, ExitOnIncreaseOrDecrease, ExitIfBelowPrice
+)
+from utils.fixed_point import to_fixed, to_fixed_ceiling, to_fixed_array, from_fixed, PRICE_SCALE
+from utils.range_extremes import RangeExtremes
+
+import logging
+from log.logger import LOGGER_NAME
+logger = logging.getLogger(LOGGER_NAME)
+
+'''
+Vectorized backtest for signal only strategies.
+
+A config whose entries and exits come from precomputed signals (SupertrendEntry/Exit and the like),
+with OnlyOneOpenPositionEntryCondition, percent/price exit conditions, LimitBuyPercentEquity,
+MarketSell and optionally LimitExitPercentAbove holds at most one buy order or one position at a
+time. Its whole run is decided by a handful of array searches instead of three checks per 1 minute row:
+
+    plan     The rows where the strategy runs and the time series indices there come from the candle
+             timestamps, the entry/exit signals are looked up in the SignalArrays. The check prices
+             (open, low, high of every row) are fixed point ints, so the fills, the LimitAdjust
+             replacements and the timeouts of a buy order, and the fill of the exit order are found
+             exactly with range min/max searches. Exit conditions are screened over the strategy rows
+             with NumPy and only the candidates are evaluated by the condition itself.
+    replay   The planned events (a buy placed, filled, replaced or timed out, a position exited) are
+             applied in order with the config's own strategies, client, Orders and positions, so the
+             holdings, fees, order numbers, positions and the equity log are the ones the event engine
+             computes. The open positions record the price range since the last event in one update.
+
+The per row Trading, Strategy, PlaceBuy/PlaceSell and LimitAdjust machinery never runs. Anything the
+plan does not model (another component, a second buy order while one rests, a missing price) is found
+before the state is touched, and Backtest falls back to the event engine.
+'''
+
+# Exit condition rows are screened in floats, rows within this margin (in percent or in dollars) are evaluated exactly
+SCREEN_MARGIN = 1e-6
+
+ENTRY_CONDITIONS = (NoEntryCondition, OnlyOneOpenBuyCondition, OnlyOneOpenPositionEntryCondition)
+
+'''Per exit condition: the strategy rows where it can be met, from the open prices and the entry price as floats'''
+EXIT_CONDITION_SCREENS = {
+    NoExitCondition: lambda condition, prices, entry: np.zeros(len(prices), dtype=bool),
+    ExitOnPercentIncrease: lambda condition, prices, entry:
+        (prices - entry) * 100 / entry >= condition.percent_increase - SCREEN_MARGIN,
+    ExitOnPercentDecrease: lambda condition, prices, entry:
+        (prices - entry) * 100 / entry <= -condition.percent_decrease + SCREEN_MARGIN,
+    ExitOnIncreaseOrDecrease: lambda condition, prices, entry:
+        ((prices - entry) * 100 / entry >= condition.percent_increase - SCREEN_MARGIN) |
+        ((prices - entry) * 100 / entry <= -condition.percent_decrease + SCREEN_MARGIN),
+    ExitIfBelowPrice: lambda condition, prices, entry: prices < float(condition.exit_price) + SCREEN_MARGIN,
+}
+
+# What the exit conditions read when one is evaluated for a planned position
+_Market = namedtuple("_Market", "current_price")
+_Position = namedtuple("_Position", "entry_price times_sold")
+
+
+class _Unsupported(Exception):
+    """The plan reached something only the event engine handles."""
+
+
+class VectorizedBacktest:
+    def __init__(self, backtest):
+        self.backtest = backtest
+        self.config = backtest.config
+
+        self.exg_state = backtest.exg_state
+        self.trading_state = backtest.trading_state
+        self.client = backtest.client
+        self.trading = backtest.trading
+        self.limit_adjust = backtest.limit_adjust
+        self.buy_strategy = backtest.buy_strategy
+        self.sell_strategy = backtest.sell_strategy
+        self.exit_strategy = self.trading.exit_strategy
+
+        self.events = []
+
+    def unsupported_reason(self, feed) -> str | None:
+        """Why this config and feed need the event engine, None if they can run vectorized."""
+        config = self.config
+        if config.mode != "BACKTEST":
+            return f"mode {config.mode}"
+        if not isinstance(feed, CandleFeed):
+            return "streamed feed"
+        if len(feed) == 0:
+            return "no candles"
+        if self.backtest.intrabar_path is not None:
+            return "intrabar path model"
+
+        components = [
+            (self.trading, Trading), (self.trading.strategy, Strategy), (self.client, BacktestClient),
+            (self.limit_adjust, LimitAdjust), (self.buy_strategy, LimitBuyPercentEquity), (self.sell_strategy, MarketSell),
+        ]
+        for component, supported in components:
+            if type(component) is not supported:
+                return f"{type(component).__name__} instead of {supported.__name__}"
+        if self.exit_strategy is not None and type(self.exit_strategy) is not LimitExitPercentAbove:
+            return f"exit strategy {type(self.exit_strategy).__name__}"
+        if self.buy_strategy.percent_equity > 1:
+            return "buy strategy uses more than 100% of the equity"
+
+        for identify in config.identify_entry + config.identify_exit:
+            if getattr(identify, "signals", None) is None:
+                return f"{type(identify).__name__} has no precomputed signals"
+
+        entry_conditions = [type(condition) for condition in config.entry_trade_conditions]
+        if OnlyOneOpenPositionEntryCondition not in entry_conditions:
+            return "more than one open position allowed"
+        for condition in entry_conditions:
+            if condition not in ENTRY_CONDITIONS:
+                return f"entry condition {condition.__name__}"
+        for condition in config.exit_trade_conditions:
+            if type(condition) not in EXIT_CONDITION_SCREENS:
+                return f"exit condition {type(condition).__name__}"
+
+        if self.exg_state.order_book or self.trading_state.open_positions:
+            return "orders or positions from an earlier run"
+        return None
+
+    def run(self, feed, list_timestamp: dict) -> bool:
+        """
+        Run the backtest over feed if the config is supported.
+
+        Returns:
+            bool: False if the event engine has to run it instead, nothing has been changed then
+        """
+        reason = self.unsupported_reason(feed)
+        if reason is None:
+            try:
+                self._plan(feed, list_timestamp)
+            except _Unsupported as e:
+                reason = str(e)
+
+        if reason is not None:
+            logger.info(f"Vectorized backtest not used: {reason}")
+            return False
+
+        self._replay(feed)
+        return True
+
+    '''-----------------------------------PLAN-----------------------------------'''
+    def _plan(self, feed, list_timestamp: dict) -> None:
+        timestamps = feed.timestamps
+        rows = len(feed)
+
+        '''Check prices in the order of the event engine: open, low, high of every row'''
+        self.check_prices = np.empty(3 * rows)
+        self.check_prices[0::3] = feed.opens
+        self.check_prices[1::3] = feed.lows
+        self.check_prices[2::3] = feed.highs
+        if not (self.check_prices >= 0).all():
+            raise _Unsupported("missing or negative prices")
+
+        self.fixed = to_fixed_array(self.check_prices)
+        self.low_index = RangeExtremes(self.fixed, "min")
+        self.high_index = RangeExtremes(self.fixed, "max")
+
+        self._plan_strategy_rows(timestamps, list_timestamp)
+
+        self.events = []
+        if self.trading.trade:
+            self._plan_trades(timestamps)
+
+    def _plan_strategy_rows(self, timestamps, list_timestamp: dict) -> None:
+        """
+        The rows where each time series moves to its next candle (self.updates, rows and the index after the row),
+        and the rows where the strategy runs with its entry signal, exit signal and exit condition rows.
+        """
+        self.updates = {}
+        buffered = [] # row after which each time series has the minimum number of candles
+        for time_series in self.backtest.time_series_list:
+            timestamp_numpy = list_timestamp[time_series]
+            start = time_series.time_series_index
+
+            '''A candle closes on the first row at or after its end, a time series moves at most one candle per row'''
+            candle_closes = timestamp_numpy[start + 1:len(timestamp_numpy) - 1] + time_series.candle_size_seconds
+            steps = np.arange(len(candle_closes))
+            update_rows = np.maximum.accumulate(np.searchsorted(timestamps, candle_closes, side="left") - steps) + steps
+            update_rows = update_rows[update_rows < len(timestamps)]
+            self.updates[time_series] = (update_rows, start + 1 + np.arange(len(update_rows)))
+
+            needed = self.backtest.min_num_of_candles_required - 1 - start
+            if needed <= 0:
+                buffered.append(-1)
+            elif needed <= len(update_rows):
+                buffered.append(int(update_rows[needed - 1]))
+            else:
+                buffered.append(len(timestamps)) # never
+
+        '''Backtest._check_min_num_of_candles runs at the end of a row, the strategy runs from the next one'''
+        self.buffered_row = max(buffered + [0])
+        self.strategy_start_row = int(np.searchsorted(timestamps, self.config.start_unix, side="left"))
+
+        self.entry_rows = self._signal_rows(self.config.identify_entry)
+        self.exit_signal_rows = self._signal_rows(self.config.identify_exit)
+        self.strategy_rows = self._strategy_rows([update_rows for update_rows, indices in self.updates.values()])
+        self.exit_condition_rows = self._strategy_rows(
+            [self.updates[time_series][0] for time_series in self.config.exit_time_series if time_series in self.updates]
+        )
+
+    def _strategy_rows(self, row_arrays: list) -> np.ndarray:
+        """Sorted rows of row_arrays where the strategy runs."""
+        rows = np.unique(np.concatenate(row_arrays)) if row_arrays else np.empty(0, dtype=np.int64)
+        return rows[(rows > self.buffered_row) & (rows >= self.strategy_start_row)]
+
+    def _signal_rows(self, identify_list: list) -> np.ndarray:
+        """Strategy rows where one of identify_list has a signal on the candle its time series just moved to."""
+        row_arrays = []
+        for identify in identify_list:
+            if identify.time_series in self.updates:
+                update_rows, indices = self.updates[identify.time_series]
+                row_arrays.append(update_rows[identify.signals.values[indices]])
+        return self._strategy_rows(row_arrays)
+
+    def _signalled(self, identify_list: list, row: int) -> list:
+        """The members of identify_list whose time series moved on row and signal there, like Strategy does."""
+        signalled = []
+        for identify in identify_list:
+            if identify.time_series not in self.updates:
+                continue
+            update_rows, indices = self.updates[identify.time_series]
+            position = int(np.searchsorted(update_rows, row))
+            if position < len(update_rows) and update_rows[position] == row and identify.signals[indices[position]]:
+                signalled.append(identify)
+        return signalled
+
+    '''
+    Events are ordered by key: check j (0 open, 1 low, 2 high) of row r is 4r + j, the strategy on row r is 4r + 3.
+    Check c (index into the check prices) is row c // 3, check c % 3. The strategy runs at the open price.
+    '''
+    @staticmethod
+    def _check_key(check: int) -> int:
+        return 4 * (check // 3) + check % 3
+
+    @staticmethod
+    def _first_check_after(key: int) -> int:
+        row, step = divmod(key, 4)
+        return 3 * row + step + 1 if step < 3 else 3 * (row + 1)
+
+    @staticmethod
+    def _first_strategy_row_after(key: int) -> int:
+        return (key + 1) // 4
+
+    def _price_fixed(self, key: int) -> int:
+        row, step = divmod(key, 4)
+        return int(self.fixed[3 * row + (step if step < 3 else 0)])
+
+    def _first_key_reaching(self, key: int, index: RangeExtremes, level: int) -> int:
+        """
+        First key after key where the price reaches level (at or below it for the min index, at or above
+        it for the max index), self.end_key if there is none.
+        After the checks of a strategy row the price is set back to the open and the orders are checked once
+        more, so an order placed on a check of that row can still fill at the open of the same row. On a
+        later row the open check comes first with the same price.
+        """
+        check = index.first_reaching(self._first_check_after(key), level)
+        first = self._check_key(check) if check < len(self.fixed) else self.end_key
+
+        row, step = divmod(key, 4)
+        if step < 3 and self._is_strategy_row(row):
+            open_price = int(self.fixed[3 * row])
+            if (open_price <= level) if index.kind == "min" else (open_price >= level):
+                first = min(first, 4 * row + 3)
+        return first
+
+    def _is_strategy_row(self, row: int) -> bool:
+        position = int(np.searchsorted(self.strategy_rows, row))
+        return position < len(self.strategy_rows) and self.strategy_rows[position] == row
+
+    def _plan_trades(self, timestamps) -> None:
+        """Walk the states: no order, a buy order resting, a position open. Each step finds the next event."""
+        one_buy_order = any(type(condition) is OnlyOneOpenBuyCondition for condition in self.config.entry_trade_conditions)
+        expiry_seconds = self.limit_adjust.limit_order_duration_sec
+        self.end_key = 4 * len(timestamps)
+
+        key = -1
+        order = None    # (limit price, limit fixed, placed whole dollar price, placed timestamp) of the resting buy order
+        position = None # (entry price, key of the fill, exit limit fixed or None)
+        while True:
+            if order is None and position is None:
+                '''Nothing open: the next entry signal places a buy order'''
+                next_entry = int(np.searchsorted(self.entry_rows, self._first_strategy_row_after(key)))
+                if next_entry == len(self.entry_rows):
+                    return
+                key = 4 * int(self.entry_rows[next_entry]) + 3
+                order = self._plan_buy_order(key, timestamps)
+                self.events.append(("enter", key, order is not None))
+
+            elif order is not None:
+                limit_price, limit_fixed, placed_price, placed_timestamp = order
+                fill = self._first_key_reaching(key, self.low_index, limit_fixed)
+
+                '''LimitAdjust only runs on the checks'''
+                start = self._first_check_after(key)
+                replace = self.high_index.first_reaching(start, (placed_price + 1) * PRICE_SCALE)
+                replace = self._check_key(replace) if replace < len(self.fixed) else self.end_key
+                expiry = max(3 * int(np.searchsorted(timestamps, placed_timestamp + expiry_seconds, side="left")), start)
+                expiry = self._check_key(expiry) if expiry < len(self.fixed) else self.end_key
+                event = min(fill, replace, expiry)
+
+                '''Another entry signal while the order rests places a second order, which is not modeled (the buy logic runs before a fill at the open)'''
+                if not one_buy_order:
+                    next_entry = int(np.searchsorted(self.entry_rows, self._first_strategy_row_after(key)))
+                    if next_entry < len(self.entry_rows) and 4 * int(self.entry_rows[next_entry]) + 3 <= event:
+                        raise _Unsupported(f"second buy order on row {int(self.entry_rows[next_entry])}")
+
+                if event >= self.end_key:
+                    return
+                key = event
+                order = None
+                if event == fill:
+                    self.events.append(("buy_fill", event))
+                    position = self._plan_position(limit_price, event)
+                elif event == expiry:
+                    self.events.append(("expire", event))
+                else:
+                    order = self._plan_buy_order(event, timestamps)
+                    self.events.append(("replace", event, order is not None))
+
+            else:
+                entry_price, fill_key, exit_fixed = position
+                exit_fill = self.end_key
+                if exit_fixed is not None:
+                    exit_fill = self._first_key_reaching(key, self.high_index, exit_fixed)
+
+                '''The strategy exits before the exit order fills if it runs first (the sell logic runs before a fill at the open)'''
+                first_row = self._first_strategy_row_after(key)
+                last_row = self._first_strategy_row_after(exit_fill)
+                fill_timestamp = timestamps[fill_key // 4]
+                exit_row = self._plan_exit_row(entry_price, timestamps, fill_timestamp, first_row, last_row)
+
+                if exit_row is not None:
+                    key = 4 * exit_row + 3
+                    self.events.append(("exit", key, self._exits(entry_price, timestamps, fill_timestamp, exit_row)))
+                elif exit_fill < self.end_key:
+                    key = exit_fill
+                    self.events.append(("exit_fill", exit_fill))
+                else:
+                    return
+                position = None
+
+    def _plan_buy_order(self, key: int, timestamps):
+        """The buy order placed at key, or None if the client rejects it (a limit price that is not below the price)."""
+        current_price_fixed = self._price_fixed(key)
+        current_price = from_fixed(current_price_fixed)
+        limit_price = self.buy_strategy.limit_price(current_price)
+        if not limit_price < current_price:
+            return None
+        return (limit_price, to_fixed(limit_price), current_price_fixed // PRICE_SCALE, timestamps[key // 4])
+
+    def _plan_position(self, entry_price, fill_key: int) -> tuple:
+        """The position a buy fill opens (at the limit price), with the exit order placed by the exit strategy."""
+        exit_fixed = None
+        if self.exit_strategy is not None:
+            exit_price = self.exit_strategy.limit_price(entry_price)
+            if exit_price > from_fixed(self._price_fixed(fill_key)):
+                exit_fixed = to_fixed_ceiling(exit_price)
+        return (entry_price, fill_key, exit_fixed)
+
+    def _plan_exit_row(self, entry_price, timestamps, fill_timestamp, first_row: int, last_row: int):
+        """First strategy row in [first_row, last_row) that exits the position, None if there is none."""
+        signal = int(np.searchsorted(self.exit_signal_rows, first_row))
+        if signal < len(self.exit_signal_rows) and self.exit_signal_rows[signal] < last_row:
+            last_row = int(self.exit_signal_rows[signal])
+        else:
+            signal = None
+
+        '''Exit conditions: screen the rows in floats, evaluate the candidates in order'''
+        rows = self.exit_condition_rows
+        rows = rows[int(np.searchsorted(rows, first_row)):int(np.searchsorted(rows, last_row))]
+        if len(rows) and self.config.exit_trade_conditions:
+            prices = self.check_prices[3 * rows]
+            entry = float(entry_price)
+            candidates = np.zeros(len(rows), dtype=bool)
+            for condition in self.config.exit_trade_conditions:
+                candidates |= EXIT_CONDITION_SCREENS[type(condition)](condition, prices, entry)
+
+            for row in rows[candidates]:
+                if self._conditions_met(entry_price, timestamps, fill_timestamp, int(row)):
+                    return int(row)
+
+        return last_row if signal is not None else None
+
+    def _conditions_met(self, entry_price, timestamps, fill_timestamp, row: int) -> list:
+        """The exit conditions met on row, skipped on the row of the buy like Strategy._exit_from_conditions."""
+        if int(fill_timestamp) == int(timestamps[row]):
+            return []
+        market = _Market(from_fixed(int(self.fixed[3 * row])))
+        position = _Position(entry_price, 0)
+        return [condition for condition in self.config.exit_trade_conditions if condition.conditions_met_exit(None, market, position)]
+
+    def _exits(self, entry_price, timestamps, fill_timestamp, row: int) -> list:
+        """What Strategy.exit_positions gives for the position on row."""
+        exits = []
+        position = int(np.searchsorted(self.exit_condition_rows, row))
+        if position < len(self.exit_condition_rows) and self.exit_condition_rows[position] == row:
+            exits += self._conditions_met(entry_price, timestamps, fill_timestamp, row)
+        return exits + self._signalled(self.config.identify_exit, row)
+
+    '''-----------------------------------REPLAY-----------------------------------'''
+    def _replay(self, feed) -> None:
+        timestamps = feed.timestamps
+        place_buy = self.trading.placeBuy
+        place_sell = self.trading.placeSell
+        exg_state = self.exg_state
+
+        exg_state.update_current_price_timestamp(feed.opens[0], timestamps[0])
+
+        buy_order = None
+        self.position = None
+        self.position_checks_from = None
+        for event in self.events:
+            kind, key = event[0], event[1]
+            row, step = divmod(key, 4)
+            price = feed.opens[row] if step == 3 else self.check_prices[3 * row + step]
+            exg_state.update_current_price_timestamp(price, timestamps[row])
+
+            if kind == "enter":
+                entries = self._signalled(self.config.identify_entry, row) + self.config.entry_trade_conditions
+                buy_order = self.buy_strategy.create_buy_order(entries, self.trading_state, exg_state)
+                buy_order = self._place_buy(buy_order, event[2])
+
+            elif kind == "replace":
+                place_buy.cancel_buy_order(buy_order, exg_state)
+                new_order = self.buy_strategy.create_buy_order(None, None, exg_state)
+                self.limit_adjust._modify_new_order(buy_order, new_order, exg_state)
+                buy_order = self._place_buy(new_order, event[2])
+
+            elif kind == "expire":
+                place_buy.cancel_buy_order(buy_order, exg_state)
+                buy_order = None
+
+            elif kind == "buy_fill":
+                self.client.check_orders_for_execution()
+                for trade_overview_buy in place_buy.check_and_complete_all_buy_orders(exg_state):
+                    self._open_position(trade_overview_buy, key)
+                buy_order = None
+
+            elif kind == "exit_fill":
+                self._record_position_range(timestamps, self._first_check_after(key))
+                self.client.check_orders_for_execution()
+                self._close_sold_position()
+
+            elif kind == "exit":
+                self._record_position_range(timestamps, self._first_check_after(key))
+                if self.position.is_locked:
+                    place_sell.cancel_sell_order(self.position.placed_sell_order, exg_state, self.position)
+                sell_order = self.sell_strategy.create_sell_order(self.position, event[2], self.trading_state, exg_state)
+                place_sell.place_sell_order(sell_order, exg_state, self.position)
+                self._close_sold_position()
+
+        '''The event engine ends on the open of the last row, with every time series moved to its last candle'''
+        if self.position is not None:
+            self._record_position_range(timestamps, len(self.fixed))
+        exg_state.update_current_price_timestamp(feed.opens[-1], timestamps[-1])
+
+        for time_series, (update_rows, indices) in self.updates.items():
+            if len(indices):
+                time_series.time_series_index = int(indices[-1])
+        self.backtest.min_num_candles_buffered = self.buffered_row < len(timestamps)
+
+    def _place_buy(self, buy_order, planned: bool):
+        placed = self.trading.placeBuy.place_buy_order(buy_order, self.exg_state)
+        if placed != planned:
+            raise RuntimeError(f"Vectorized backtest: buy order {buy_order.order_string()} placed: {placed}, planned: {planned}")
+        return buy_order if placed else None
+
+    def _open_position(self, trade_overview_buy, fill_key: int) -> None:
+        """Trading._check_open_buy_orders for the planned fill."""
+        self.trading.trade_num += 1
+        self.position = OpenPosition(trade_overview_buy, self.trading.trade_num)
+        self.position_checks_from = self._first_check_after(fill_key)
+        self.trading_state.add_open_position(self.position)
+
+        if self.exit_strategy is not None:
+            sell_order = self.exit_strategy.create_sell_order(self.position, self.exg_state)
+            self.trading.placeSell.place_sell_order(sell_order, self.exg_state, self.position)
+
+    def _close_sold_position(self) -> None:
+        """Trading._check_open_sell_orders for the filled sell order of the position."""
+        for sell_trade_overview in self.trading.placeSell.check_and_complete_all_sell_orders(self.exg_state):
+            self.position.record_sell(sell_trade_overview)
+
+        if self.position.percent_sold < 0.999:
+            raise RuntimeError(f"Vectorized backtest: position #{self.position.trade_num} not closed by its sell")
+        self.trading_state.add_closed_position(ClosedPosition(self.position))
+        self.position = None
+
+    def _record_position_range(self, timestamps, end_check: int) -> None:
+        """The open position update of every check since the last one recorded, up to end_check (exclusive)."""
+        start_check = self.position_checks_from
+        if end_check <= start_check:
+            return
+        prices = self.fixed[start_check:end_check]
+        highest, lowest = int(np.argmax(prices)), int(np.argmin(prices))
+        self.position.update_position_range(
+            from_fixed(int(prices[highest])), timestamps[(start_check + highest) // 3],
+            from_fixed(int(prices[lowest])), timestamps[(start_check + lowest) // 3],
+            end_check - start_check,
+        )
+        self.position_checks_from = end_check
+
+    def log_summary(self) -> None:
+        trades = sum(1 for event in self.events if event[0] == "buy_fill")
+        logger.info(f"Vectorized backtest: {len(self.events)} events, {trades} positions opened")
@@ -3,6 +3,7 @@ from core.order.order_classes import OrderPlaced
 from core.order.order_classes import OrderExecution
 
 from utils.calc import quantize
+from utils.fixed_point import to_fixed, to_fixed_ceiling
 
 import logging
 from log.logger import LOGGER_NAME
@@ -51,6 +52,14 @@ class Order:
         ''' Parameter check'''
         self._validate_order_fields()
 
+        '''
+        Limit price in millionths, for a FixedPointExchangeState. Rounded down for a BUY and up for a SELL,
+        so comparing it with a quantized price gives the same result as comparing limit_price
+        '''
+        self.limit_price_fixed = None
+        if self.limit_price is not None:
+            self.limit_price_fixed = to_fixed(self.limit_price) if self.order_side == "BUY" else to_fixed_ceiling(self.limit_price)
+
     def _validate_order_fields(self):
         valid_types = {"MARKET", "LIMIT"}
         valid_sides = {"BUY", "SELL"}
@@ -147,19 +156,28 @@ class Order:
             reason = "Order not currently executable. Market price is lower than limit SELL price."
 
         if reason:
-            info_string = (
-                f"\t{self.order_string()}\n"
-                f"\tCurrent Market Price : ${round(current_price, 2)}\n"
-                f"\tLimit Price          : ${round(self.limit_price, 2)}\n"
-                f"\tCurrent Time         : {exg_state.get_current_datetime()}"
-            )
-            if mode != "BACKTEST": # When backtesting there is too much logging 
+            if mode != "BACKTEST": # When backtesting there is too much logging, don't even build the message
+                info_string = (
+                    f"\t{self.order_string()}\n"
+                    f"\tCurrent Market Price : ${round(current_price, 2)}\n"
+                    f"\tLimit Price          : ${round(self.limit_price, 2)}\n"
+                    f"\tCurrent Time         : {exg_state.get_current_datetime()}"
+                )
                 logger.debug(f"{reason}\n{info_string}")
             return False
 
         return True
 
 
+    def order_is_executable_fixed(self, current_price_fixed: int) -> bool:
+        """order_is_executable with the fixed point price of a FixedPointExchangeState, without the debug logging."""
+        if self.order_type == "MARKET":
+            return True
+
+        if self.order_side == "BUY":
+            return current_price_fixed <= self.limit_price_fixed
+        return current_price_fixed >= self.limit_price_fixed
+
     def hold_funds(self, exg_state):
         """
         Gemini holds the fee in USD for BUY orders (fee added to the hold).
@@ -1,5 +1,7 @@
 from decimal import Decimal
 
+from utils.time_conversion import timestamp_to_datetime
+
 class OrderPlaced:
     def __init__(
         self,
@@ -8,9 +10,13 @@ class OrderPlaced:
         market_price: Decimal
     ):
         self.timestamp = timestamp
-        self.datetime = datetime
+        self._datetime = datetime # May be a LazyDatetime, formatted on first access
         self.market_price = market_price
 
+    @property
+    def datetime(self) -> str:
+        return str(self._datetime) if self._datetime is not None else timestamp_to_datetime(self.timestamp)
+
 class OrderExecution:
     def __init__(
         self,
@@ -25,11 +31,15 @@ class OrderExecution:
         price_difference_percent: Decimal,
     ):
         self.timestamp = timestamp
-        self.datetime = datetime
+        self._datetime = datetime # May be a LazyDatetime, formatted on first access
         self.market_price = market_price
         self.dollar_amount = dollar_amount
         self.quantity = quantity
         self.fee = fee
         self.time_to_execute = time_to_execute
         self.price_difference = price_difference #Slipage
-        self.price_difference_percent = price_difference_percent
\ No newline at end of file
+        self.price_difference_percent = price_difference_percent
+
+    @property
+    def datetime(self) -> str:
+        return str(self._datetime) if self._datetime is not None else timestamp_to_datetime(self.timestamp)
\ No newline at end of file
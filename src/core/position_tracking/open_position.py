@@ -2,6 +2,7 @@ from decimal import Decimal
 
 from core.position_tracking.trade_data import TradeOverview, TradeResult
 from core.order.order import Order
+from utils.fixed_point import to_fixed, to_fixed_ceiling
 
 class OpenPosition:
     def __init__(self, trade_overview_buy: 'TradeOverview', trade_num) -> None:
@@ -28,6 +29,10 @@ class OpenPosition:
         self.max_price_seen_timestamp = trade_overview_buy.executed_timestamp
         self.min_price_seen = self.entry_price
         self.min_price_seen_timestamp = trade_overview_buy.executed_timestamp
+        # For a FixedPointExchangeState. A limit entry price can have more than 6 decimals, rounding the max down
+        # and the min up keeps the comparisons with a quantized price exact
+        self.max_price_seen_fixed = to_fixed(self.max_price_seen)
+        self.min_price_seen_fixed = to_fixed_ceiling(self.min_price_seen)
 
         self.run_up = Decimal(0)
         self.run_up_dollar = Decimal(0)
@@ -39,6 +44,10 @@ class OpenPosition:
 
     def update_position(self, exg_state) -> None:
         """Update run-up and drawdown stats based on current market price."""
+        if exg_state.fixed_point:
+            self._update_position_fixed(exg_state)
+            return
+
         # Update max price
         if exg_state.current_price > self.max_price_seen:
             self.max_price_seen = exg_state.current_price
@@ -69,6 +78,38 @@ class OpenPosition:
 
         self.bars += 1  # Optionally increment bar count here
 
+    def _update_position_fixed(self, exg_state) -> None:
+        """update_position comparing the fixed point prices, the Decimal price is only read for a new extreme."""
+        current_price_fixed = exg_state.current_price_fixed
+        if current_price_fixed > self.max_price_seen_fixed:
+            self.max_price_seen_fixed = current_price_fixed
+            self.max_price_seen = exg_state.current_price
+            self.max_price_seen_timestamp = exg_state.current_timestamp
+
+        if current_price_fixed < self.min_price_seen_fixed:
+            self.min_price_seen_fixed = current_price_fixed
+            self.min_price_seen = exg_state.current_price
+            self.min_price_seen_timestamp = exg_state.current_timestamp
+
+        self.bars += 1
+
+    def update_position_range(self, max_price, max_price_timestamp, min_price, min_price_timestamp, checks: int) -> None:
+        """
+        update_position for a run of prices at once, as the fast forward of the backtest applies them.
+        max_price/min_price are the extremes of the run, with the timestamp at which each was first reached.
+        """
+        if max_price > self.max_price_seen:
+            self.max_price_seen = max_price
+            self.max_price_seen_fixed = to_fixed(max_price)
+            self.max_price_seen_timestamp = max_price_timestamp
+
+        if min_price < self.min_price_seen:
+            self.min_price_seen = min_price
+            self.min_price_seen_fixed = to_fixed_ceiling(min_price)
+            self.min_price_seen_timestamp = min_price_timestamp
+
+        self.bars += checks
+
     def record_sell(self, sell_trade_overview: 'TradeOverview') -> None:
         """Record a completed or placed sell order."""
         quantity = sell_trade_overview.quantity
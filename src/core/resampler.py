@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+
+from utils.candle import candle_columns
+from utils.time_conversion import timestamps_to_datetimes
+
+'''
+Vectorized equivalent of feeding 1 minute candles through TimeSeries.update_series one at a time.
+
+The per-minute path merges a bucket when its last minute is processed (missing minutes are filled
+with empty candles, so a gap that crosses the end of a bucket still closes it), drops zero volume
+candles before merging and skips buckets where every candle had zero volume. The first bucket may be
+partial. The last bucket is only merged once its final minute has been seen.
+
+resample_candles works on arrays held in memory. StreamingResampler produces the same candles from a
+sequence of chunks while only holding one chunk (plus the rows of one bucket) at a time.
+'''
+
+OHLCV_COLUMNS = ["Timestamp", "Open", "High", "Low", "Close", "Volume"]
+
+
+def bucket_timestamps(timestamps: np.ndarray, candle_size_seconds: int) -> np.ndarray:
+    """Floor every timestamp to the start of its candle. Array form of most_recent_complete_timestamp."""
+    return timestamps - (timestamps % candle_size_seconds)
+
+
+def last_bucket_complete(last_timestamp, candle_size_seconds: int, candle_tick: int = 60) -> bool:
+    """True if the candle containing last_timestamp would be merged by the per-minute path."""
+    bucket_end = last_timestamp - (last_timestamp % candle_size_seconds) + candle_size_seconds
+    return last_timestamp + candle_tick >= bucket_end
+
+
+def resample_candles(timestamps, opens, highs, lows, closes, volumes, candle_size_seconds: int, candle_tick: int = 60) -> dict:
+    """
+    Resample sorted 1 minute OHLCV arrays into candle_size_seconds candles in one pass.
+
+    Returns:
+        dict: Column name -> array for Timestamp (int64), Open, High, Low, Close and Volume (float64)
+    """
+    timestamps = np.asarray(timestamps)
+    if len(timestamps) == 0:
+        return _empty_columns()
+
+    # The per-minute path leaves the last bucket in its buffer until the final minute arrives
+    end = len(timestamps)
+    if not last_bucket_complete(timestamps[-1], candle_size_seconds, candle_tick):
+        open_bucket = timestamps[-1] - (timestamps[-1] % candle_size_seconds)
+        end = int(np.searchsorted(timestamps, open_bucket, side="left"))
+
+    return _reduce_buckets(timestamps[:end], opens[:end], highs[:end], lows[:end], closes[:end], volumes[:end], candle_size_seconds)
+
+
+def _reduce_buckets(timestamps, opens, highs, lows, closes, volumes, candle_size_seconds: int) -> dict:
+    """Merge every bucket of the sorted rows into one candle. Zero volume candles never take part in a merge."""
+    keep = np.asarray(volumes) != 0
+
+    timestamps = np.asarray(timestamps)[keep].astype(np.int64)
+    if len(timestamps) == 0:
+        return _empty_columns()
+
+    opens = np.asarray(opens, dtype=np.float64)[keep]
+    highs = np.asarray(highs, dtype=np.float64)[keep]
+    lows = np.asarray(lows, dtype=np.float64)[keep]
+    closes = np.asarray(closes, dtype=np.float64)[keep]
+    volumes = np.asarray(volumes, dtype=np.float64)[keep]
+
+    # Rows are sorted, so each bucket is a contiguous run
+    buckets = bucket_timestamps(timestamps, candle_size_seconds)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(buckets)] - 1
+
+    return {
+        "Timestamp": buckets[starts],
+        "Open": opens[starts],
+        "High": np.maximum.reduceat(highs, starts),
+        "Low": np.minimum.reduceat(lows, starts),
+        "Close": closes[ends],
+        "Volume": np.add.reduceat(volumes, starts),
+    }
+
+
+class StreamingResampler:
+    """
+    Chunked form of resample_candles for inputs that do not fit in memory.
+
+    Feed consecutive CandleFeed chunks to update(). Every call returns the candles completed by that
+    chunk. The rows of the last bucket are carried into the next call since later rows may still
+    belong to it. finish() closes the stream the same way resample_candles treats the end of its
+    input, and the rows still pending afterwards are the ones the per-minute path would hold in its buffer.
+    """
+    def __init__(self, candle_size_seconds: int, candle_tick: int = 60):
+        self.candle_size_seconds = candle_size_seconds
+        self.candle_tick = candle_tick
+        self.pending = None # Column arrays of the rows in the open bucket
+
+    def update(self, feed) -> dict:
+        columns = feed.columns()
+        if self.pending is not None and len(self.pending[0]):
+            columns = tuple(np.concatenate((pending, column)) for pending, column in zip(self.pending, columns))
+
+        timestamps = columns[0]
+        if len(timestamps) == 0:
+            return _empty_columns()
+
+        open_bucket = bucket_timestamps(timestamps[-1], self.candle_size_seconds)
+        split = int(np.searchsorted(timestamps, open_bucket, side="left"))
+
+        self.pending = tuple(column[split:] for column in columns)
+        return _reduce_buckets(*(column[:split] for column in columns), self.candle_size_seconds)
+
+    def finish(self) -> dict:
+        if self.pending is None:
+            return _empty_columns()
+
+        timestamps = self.pending[0]
+        if len(timestamps) == 0 or not last_bucket_complete(timestamps[-1], self.candle_size_seconds, self.candle_tick):
+            return _empty_columns()
+
+        columns = _reduce_buckets(*self.pending, self.candle_size_seconds)
+        self.pending = tuple(column[:0] for column in self.pending)
+        return columns
+
+
+def concat_columns(column_chunks: list) -> dict:
+    """Join resampled column dicts, in order, into one."""
+    if not column_chunks:
+        return _empty_columns()
+    return {column: np.concatenate([chunk[column] for chunk in column_chunks]) for column in OHLCV_COLUMNS}
+
+
+def candles_to_dataframe(columns: dict) -> pd.DataFrame:
+    """Build a time series DataFrame (candle_columns order) from resampled columns."""
+    df = pd.DataFrame({column: columns[column] for column in OHLCV_COLUMNS})
+    df.insert(0, "Datetime", timestamps_to_datetimes(columns["Timestamp"]))
+    return df[candle_columns]
+
+
+def _empty_columns() -> dict:
+    columns = {column: np.empty(0, dtype=np.float64) for column in OHLCV_COLUMNS}
+    columns["Timestamp"] = np.empty(0, dtype=np.int64)
+    return columns
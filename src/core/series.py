@@ -1,34 +1,75 @@
+import numpy as np
 import pandas as pd
-import pandas_ta as ta
 
 class Series:
+    '''
+    Values of one indicator output, one per candle of its time series.
+    They are kept in a contiguous NumPy array so the per bar reads of the entry/exit identifiers are plain
+    array reads, and the first valid index is found once when the series is populated instead of on every check.
+    '''
     def __init__ (self, name, time_series, smoothing = None):
         self.name = name
         self.series = pd.Series()
         self.time_series = time_series
         self.smoothing = smoothing
+        self._set_values(np.empty(0))
 
     def populate(self, series):
         if(self.smoothing == None):
             self.series = series
         elif(self.smoothing == "rma"):
-            self.series = ta.rma(series)
+            from pandas_ta import rma # only imported by smoothed series
+            self.series = rma(series)
         else:
             raise ValueError("smoothing value incorrectly set")
+        self._set_values(self.series.to_numpy())
+
+    def _set_values(self, values):
+        self._buffer = np.array(values) # a copy, cached indicator results are shared and must not be written
+        self._size = len(self._buffer)
+        self.values = self._buffer[:self._size] # view of the valid part of the buffer
+
+        valid = np.flatnonzero(pd.notna(self.values))
+        self._first_valid_index = int(valid[0]) if len(valid) else None
+
+    def append(self, value):
+        '''
+        Add the value of a newly closed candle in amortized constant time.
+        The value is stored as given, smoothing is up to the incremental indicator that produced it.
+        '''
+        if self._size == len(self._buffer):
+            buffer = np.empty(max(2 * len(self._buffer), 16), dtype=np.result_type(self._buffer, value))
+            buffer[:self._size] = self._buffer[:self._size]
+            self._buffer = buffer
+
+        self._buffer[self._size] = value
+        if self._first_valid_index is None and value == value:
+            self._first_valid_index = self._size
+        self._size += 1
+        self.values = self._buffer[:self._size]
 
     def time_period_met(self):
-        if(self.time_series.time_series_index >= self.series.first_valid_index()):
+        first_valid_index = self._first_valid_index
+        if(first_valid_index is not None and self.time_series.time_series_index >= first_valid_index):
             return True
         return False
 
+    def first_valid_index(self):
+        return self._first_valid_index
+
     def length(self):
-        return len(self.series) - self.series.first_valid_index()
+        return self._size - self._first_valid_index
 
     def get_curr(self):
-        return self.series.iloc[self.time_series.time_series_index]
+        return self.values[self.time_series.time_series_index]
 
     def get_index(self, index):
-        return self.series.iloc[index]
+        return self.values[index]
 
     def get_series(self):
-            return self.series
\ No newline at end of file
+            if self._size != len(self.series):
+                return pd.Series(self.values)
+            return self.series
+
+    def __len__(self):
+        return self._size
@@ -1,3 +1,6 @@
+import hashlib
+
+import numpy as np
 import pandas as pd
 
 import logging
@@ -5,8 +8,12 @@ from log.logger import LOGGER_NAME
 logger = logging.getLogger(LOGGER_NAME)
 
 from utils.time_conversion import timestamp_to_datetime
-from utils.candle import create_empty_candle, Candle, candle_columns
+from utils.candle import Candle, candle_columns
 from utils.calc import most_recent_complete_timestamp
+from core.resampler import (
+    resample_candles, candles_to_dataframe, bucket_timestamps, last_bucket_complete, StreamingResampler, concat_columns
+)
+from input.candle_feed import CandleFeed
 
 
 class TimeSeries:
@@ -24,6 +31,7 @@ class TimeSeries:
         self.first_candle = True # First candle may not have the correct number of sub candles
 
         self.time_series_index = 0 
+        self._content_hash = None # (df, hash) of the df the hash was computed for
 
     def update_series(self, namedtuple_candle):
         if self.last_timestamp is None:
@@ -33,16 +41,7 @@ class TimeSeries:
 
         # Missing candles
         if(self.last_timestamp + self.candle_tick < update_timestamp):
-            logger.error(
-                f"Missing candles from {timestamp_to_datetime(self.last_timestamp + self.candle_tick)} "
-                f"to {timestamp_to_datetime(update_timestamp - self.candle_tick)}"
-            )
-
-            while(self.last_timestamp + self.candle_tick < update_timestamp):
-                self.last_timestamp = self.last_timestamp + self.candle_tick
-                empty_candle = create_empty_candle(self.last_timestamp)
-                self.candle_buffer.append(empty_candle)
-                self._process_candle(empty_candle.Timestamp)
+            self._skip_gap(update_timestamp)
 
         self.candle_buffer.append(namedtuple_candle)
         self.last_timestamp = namedtuple_candle.Timestamp
@@ -52,8 +51,90 @@ class TimeSeries:
     
     def create_dataframe(self):
         self.df = pd.DataFrame(self.candle_list, columns = candle_columns)
+
+    def content_hash(self) -> str:
+        '''
+        Hash of the candles in df, used to key cached indicator results.
+        Computed once per DataFrame, a new df (backfill, create_dataframe) is hashed again.
+        '''
+        if self._content_hash is None or self._content_hash[0] is not self.df:
+            digest = hashlib.sha1()
+            for column in ("Timestamp", "Open", "High", "Low", "Close", "Volume"):
+                digest.update(np.ascontiguousarray(self.df[column].to_numpy()).tobytes())
+            self._content_hash = (self.df, digest.hexdigest())
+        return self._content_hash[1]
+
+    def resample(self, feed, cache=None):
+        '''
+        Backfill the series from a CandleFeed of sorted 1 minute candles in one vectorized pass.
+        Produces the same candles as calling update_series for every minute followed by create_dataframe.
+        A ResampleCache can be passed to reuse the candles resampled from the same feed in an earlier run.
+        '''
+        columns = cache.load_resampled(feed, self.candle_size_seconds, self.candle_tick) if cache else None
+        if columns is None:
+            columns = resample_candles(*feed.columns(), self.candle_size_seconds, self.candle_tick)
+            if cache:
+                cache.save_resampled(feed, self.candle_size_seconds, self.candle_tick, columns)
+
+        # Keep the unmerged minutes of the last candle buffered so update_series can carry on from here
+        buffer_feed = None
+        if not feed.empty and not last_bucket_complete(feed.last_timestamp, self.candle_size_seconds, self.candle_tick):
+            open_bucket = bucket_timestamps(feed.last_timestamp, self.candle_size_seconds)
+            buffer_feed = feed.slice(int(np.searchsorted(feed.timestamps, open_bucket, side="left")), len(feed))
+
+        self._set_resampled(columns, buffer_feed, feed.last_timestamp)
+
+        if feed.gaps is not None and len(feed.gaps):
+            logger.info(
+                f"{self.candle_size_str}: {len(self.df)} candles, "
+                f"{feed.gaps.affected_candles(self.candle_size_seconds)} with missing minutes"
+            )
+
+    def resample_stream(self, stream):
+        '''
+        Backfill the series from an iterable of CandleFeed chunks (e.g. a CandleStream).
+        Same result as resample over the joined chunks, while only one chunk is held in memory.
+        '''
+        resampler = StreamingResampler(self.candle_size_seconds, self.candle_tick)
+        column_chunks = []
+        last_timestamp = None
+
+        for feed in stream:
+            column_chunks.append(resampler.update(feed))
+            last_timestamp = feed.last_timestamp if not feed.empty else last_timestamp
+        column_chunks.append(resampler.finish())
+
+        buffer_feed = CandleFeed(*resampler.pending) if resampler.pending is not None else None
+        self._set_resampled(concat_columns(column_chunks), buffer_feed, last_timestamp)
+
+    def _set_resampled(self, columns, buffer_feed, last_timestamp):
+        self.df = candles_to_dataframe(columns)
+        self.candle_list = list(map(Candle._make, self.df.itertuples(index=False, name=None)))
+        self.candle_buffer = list(buffer_feed) if buffer_feed is not None else []
+
+        if last_timestamp is not None:
+            self.last_timestamp = last_timestamp
+            self.first_candle = self.df.empty
     
 
+    def _skip_gap(self, update_timestamp):
+        '''
+        Jump over the missing minutes before update_timestamp.
+        Empty candles never take part in a merge, all they did was close the candle in progress once the
+        gap ran past its end, so that is done directly instead of synthesizing a candle per missing minute.
+        Gaps are reported once per dataset by the GapIndex, here they are only logged at debug level.
+        '''
+        logger.debug(
+            f"Missing candles from {timestamp_to_datetime(self.last_timestamp + self.candle_tick)} "
+            f"to {timestamp_to_datetime(update_timestamp - self.candle_tick)}"
+        )
+
+        candle_in_progress_timestamp = most_recent_complete_timestamp(self.last_timestamp, self.candle_size_seconds)
+        if update_timestamp >= candle_in_progress_timestamp + self.candle_size_seconds:
+            self._close_candle()
+
+        self.last_timestamp = update_timestamp - self.candle_tick
+
     def _process_candle(self, update_timestamp):
         candle_in_progress_timestamp = most_recent_complete_timestamp(update_timestamp, self.candle_size_seconds)
         
@@ -62,55 +143,51 @@ class TimeSeries:
         candle_end_time = candle_in_progress_timestamp + self.candle_size_seconds
 
         if next_tick_time >= candle_end_time:
+            return self._close_candle()
+        return False
 
-            #Remove all zero volume candles from candle_buffer
-            filtered_buffer = [i for i in self.candle_buffer if i.Volume != 0]
-            
-            self._error_check(filtered_buffer)
-
-            if not filtered_buffer:
-                self.candle_buffer.clear()
-                return False
-
-            merged_candle = self._merge_candles(filtered_buffer)
+    def _close_candle(self):
+        #Remove all zero volume candles from candle_buffer
+        filtered_buffer = [i for i in self.candle_buffer if i.Volume != 0]
 
-            '''append the merged candle'''
-            self.candle_list.append(merged_candle)
+        self._error_check(filtered_buffer)
 
+        if not filtered_buffer:
             self.candle_buffer.clear()
-            self.first_candle = False
-
-            return True
-        return False
-    
-
-    def _error_check(self, filtered_buffer):
-        if not self.first_candle:
-            expected_count = int(self.candle_size_seconds / self.candle_tick)
-            actual_count = len(self.candle_buffer)
-            range_duration = self.candle_buffer[-1].Timestamp - self.candle_buffer[0].Timestamp
+            return False
 
-            error = False
+        merged_candle = self._merge_candles(filtered_buffer)
 
-            if actual_count != expected_count:
-                logger.error(f"Incorrect number of candles in buffer: expected {expected_count}, got {actual_count}")
-                error = True
+        '''append the merged candle'''
+        self.candle_list.append(merged_candle)
 
-            expected_range = self.candle_size_seconds - self.candle_tick
-            if range_duration != expected_range:
-                logger.error(f"Timestamp mismatch: start={self.candle_buffer[0].Datetime}, end={self.candle_buffer[-1].Datetime}, actual range={range_duration}, expected={expected_range}")
-                error = True
+        self.candle_buffer.clear()
+        self.first_candle = False
 
-            if error:
-                logger.error(f"--- Candle Buffer Dump ({actual_count} candles) ---")
-                for candle in self.candle_buffer:
-                    logger.error(candle)
-
-            # if(len(filtered_list) == 0):
-            #     logger.error("Candle Missing: " + self.candle_buffer[0].Datetime)
+        return True
+    
 
-            # if(len(filtered_list) != len(self.candle_buffer)):
-            #     logger.error(self.candle_buffer[0].Datetime + " Valid candles #: " +  str(len(filtered_list)) + " Expected: " + str(self.candle_size_seconds /self.candle_tick)) 
+    def _error_check(self, filtered_buffer):
+        '''
+        The buffer only holds the minutes that exist, missing ones are already in the GapIndex.
+        An error is only logged when the buffer spans more than one candle.
+        '''
+        if self.first_candle or not self.candle_buffer:
+            return
+
+        expected_count = int(self.candle_size_seconds / self.candle_tick)
+        actual_count = len(self.candle_buffer)
+        first = self.candle_buffer[0]
+        last = self.candle_buffer[-1]
+
+        if (most_recent_complete_timestamp(first.Timestamp, self.candle_size_seconds) !=
+                most_recent_complete_timestamp(last.Timestamp, self.candle_size_seconds)):
+            logger.error(
+                f"Candle buffer spans more than one {self.candle_size_str} candle: start={first.Datetime}, "
+                f"end={last.Datetime}, candles={actual_count}"
+            )
+        elif actual_count != expected_count:
+            logger.debug(f"{self.candle_size_str} candle {first.Datetime}: {actual_count} of {expected_count} minutes present")
 
 
     def _merge_candles(self, filtered_list):
@@ -14,12 +14,12 @@ class LimitBuyPercentEquity:
         self.percent_equity = Decimal(percent_equity)
         self.percent_below_current_price = Decimal(percent_below_current_price)
 
+    def limit_price(self, current_price: Decimal) -> Decimal:
+        """Limit price of an order placed at current_price, rounded down to the whole dollar."""
+        return Decimal(math.floor(current_price - percent_of(self.percent_below_current_price, current_price)))
+
     def create_buy_order(self, identified_entries, trading_state, exg_state):
-        limit_buy_price = Decimal(
-            math.floor(
-                exg_state.current_price - percent_of(self.percent_below_current_price, exg_state.current_price)
-            )
-        )
+        limit_buy_price = self.limit_price(exg_state.current_price)
         logger.debug(f"exg_state.current_price: {exg_state.current_price}")
         logger.debug(f"limit_buy_price: {limit_buy_price}")
 
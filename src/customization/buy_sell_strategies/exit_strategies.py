@@ -8,14 +8,16 @@ class LimitExitPercentAbove:
     def __init__(self, percent_above_current_price=1.25):
         self.percent_above_current_price = Decimal(percent_above_current_price)
 
+    def limit_price(self, entry_price: Decimal) -> Decimal:
+        """Limit price of the exit for a position bought at entry_price."""
+        return Decimal(entry_price + percent_of(self.percent_above_current_price, entry_price))
+
     def create_sell_order(self, open_position, exg_state):
         order_number = exg_state.provide_order_number()
         quantity = quantity = open_position.entry_quantity - open_position.quantity_sold
         quantity = quantize(quantity)
 
-        execution_market_price = open_position.entry_price
-
-        limit_price = Decimal(execution_market_price + percent_of(self.percent_above_current_price, execution_market_price))
+        limit_price = self.limit_price(open_position.entry_price)
         sell_order = Order(order_number, "LIMIT", "SELL", quantity, exg_state.maker_fee, exg_state.current_timestamp, limit_price)
         sell_order.allow_limit_adjust = False
 
@@ -1,15 +1,24 @@
+from customization.identify.signals import direction_change_signals
+
 '''Entry identified when a long is beginning'''
 class SupertrendEntry:
     def __init__(self, supertrend):
         self.supertrend = supertrend
         self.time_series = supertrend.time_series
+        self.signals = None # SignalArray, see precompute_signals
+
+    def precompute_signals(self):
+        '''Compute the entry signal of every bar once the indicator is populated. identify_entry then only does a lookup'''
+        self.signals = direction_change_signals(self.supertrend.supertrend_main, self.supertrend.supertrend_direction, -1, 1)
 
     def identify_entry(self):
+        index = self.time_series.time_series_index
+        if self.signals is not None and index < len(self.signals):
+            return bool(self.signals[index])
+
         if not self.supertrend.time_period_met():
             return False
 
-        index = self.time_series.time_series_index
-
         last = self.supertrend.supertrend_direction.get_index(index - 1)
         current = self.supertrend.supertrend_direction.get_index(index)
 
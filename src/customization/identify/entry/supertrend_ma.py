@@ -1,3 +1,5 @@
+from customization.identify.signals import direction_change_signals
+
 import logging
 from log.logger import LOGGER_NAME
 logger = logging.getLogger(LOGGER_NAME)
@@ -8,13 +10,20 @@ class SupertrendMAEntry:
     def __init__(self, supertrendMA):
         self.supertrendMA = supertrendMA
         self.time_series = supertrendMA.time_series
+        self.signals = None # SignalArray, see precompute_signals
+
+    def precompute_signals(self):
+        '''Compute the entry signal of every bar once the indicator is populated. identify_entry then only does a lookup'''
+        self.signals = direction_change_signals(self.supertrendMA.supertrend_ma_main, self.supertrendMA.supertrend_ma_direction, -1, 1)
 
     def identify_entry(self):
+        index = self.time_series.time_series_index
+        if self.signals is not None and index < len(self.signals):
+            return bool(self.signals[index])
+
         if not self.supertrendMA.time_period_met():
             return False
 
-        index = self.time_series.time_series_index
-
         last = self.supertrendMA.supertrend_ma_direction.get_index(index - 1)
         current = self.supertrendMA.supertrend_ma_direction.get_index(index)
 
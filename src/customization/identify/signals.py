@@ -0,0 +1,47 @@
+import numpy as np
+
+'''
+Entry/exit signals of every bar, computed once from populated indicator data.
+
+The Supertrend identifiers only look at indicator values that are known once the indicators are
+populated, so instead of checking time_period_met and reading two directions on every update,
+the signal of each bar is computed in one vectorized pass and looked up by time_series_index.
+'''
+
+
+class SignalArray:
+    """Boolean signal per bar of a time series."""
+    def __init__(self, values: np.ndarray):
+        self.values = np.asarray(values, dtype=bool)
+        self.indices = np.flatnonzero(self.values) # bars with a signal, ascending
+
+    def next_index(self, index: int) -> int | None:
+        """First bar at or after index with a signal, or None if there are no more signals."""
+        position = int(np.searchsorted(self.indices, index, side="left"))
+        return int(self.indices[position]) if position < len(self.indices) else None
+
+    def __getitem__(self, index: int) -> bool:
+        return self.values[index]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __repr__(self) -> str:
+        return f"SignalArray(bars={len(self)}, signals={len(self.indices)})"
+
+
+def direction_change_signals(main_series, direction_series, from_direction: int, to_direction: int) -> SignalArray:
+    """
+    Signal on the bars where direction_series turns from from_direction to to_direction, once main_series
+    has valid values. Same as the identifiers' per bar check, including get_index(-1) reading the last
+    value for bar 0.
+    """
+    direction = direction_series.values
+    last = np.roll(direction, 1)
+
+    met = np.zeros(len(direction), dtype=bool)
+    first_valid_index = main_series.first_valid_index()
+    if first_valid_index is not None:
+        met[first_valid_index:] = True
+
+    return SignalArray(met & (last == from_direction) & (direction == to_direction))
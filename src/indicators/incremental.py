@@ -0,0 +1,403 @@
+from collections import deque
+import math
+
+import numpy as np
+import pandas as pd
+
+'''
+Incremental versions of the indicator math, for live mode.
+
+The indicators compute over the whole time_series.df at once through pandas_ta. Recomputing the full
+history for every new candle would make each live bar cost O(n), so every class here keeps the rolling
+state (EWM weights, window sums, band state) and takes one value per update call in constant time.
+
+The arithmetic follows pandas_ta step by step, including the pandas rolling/ewm kernels it relies on,
+so a stream of updates produces the same numbers as the batch call over the same bars. Values before
+an indicator has enough bars are NaN, like the leading values of the batch output.
+'''
+
+nan = float("nan")
+
+
+class EWM:
+    """
+    One step at a time equivalent of pandas Series.ewm(com=..., adjust=..., min_periods=...).mean().
+    Mirrors the pandas ewm kernel, including how NaN inputs decay the weights.
+    """
+    def __init__(self, com: float, adjust: bool = True, min_periods: int = 0, ignore_na: bool = False):
+        alpha = 1. / (1. + com)
+        self.old_wt_factor = 1. - alpha
+        self.new_wt = 1. if adjust else alpha
+        self.adjust = adjust
+        self.min_periods = max(int(min_periods), 1)
+        self.ignore_na = ignore_na
+
+        self.weighted = nan
+        self.old_wt = 1.
+        self.nobs = 0
+        self.started = False
+
+    @classmethod
+    def from_span(cls, span: float, **kwargs) -> 'EWM':
+        return cls((span - 1) / 2.0, **kwargs)
+
+    @classmethod
+    def from_alpha(cls, alpha: float, **kwargs) -> 'EWM':
+        return cls((1.0 - alpha) / alpha, **kwargs)
+
+    def update(self, cur: float) -> float:
+        is_observation = cur == cur
+
+        if not self.started:
+            self.started = True
+            self.weighted = cur
+            self.nobs = int(is_observation)
+        else:
+            self.nobs += is_observation
+            if self.weighted == self.weighted:
+                if is_observation or not self.ignore_na:
+                    self.old_wt *= self.old_wt_factor
+                    if is_observation:
+                        # pandas skips the update on a constant series to avoid rounding drift
+                        if self.weighted != cur:
+                            self.weighted = self.old_wt * self.weighted + self.new_wt * cur
+                            self.weighted /= (self.old_wt + self.new_wt)
+                        if self.adjust:
+                            self.old_wt += self.new_wt
+                        else:
+                            self.old_wt = 1.
+            elif is_observation:
+                self.weighted = cur
+
+        return self.weighted if self.nobs >= self.min_periods else nan
+
+
+class RollingWindow:
+    """
+    Fixed size window with the compensated running sum of the pandas rolling kernels.
+    mean() and sum() give what Series.rolling(window, min_periods).mean() / .sum() give for the last value.
+    """
+    def __init__(self, window: int, min_periods: int = None):
+        self.window = window
+        self.min_periods = window if min_periods is None else min_periods
+        self.values = deque()
+
+        self.nobs = 0
+        self.neg_ct = 0
+        self.sum_x = 0.
+        self.compensation_add = 0.
+        self.compensation_remove = 0.
+        self.num_consecutive_same_value = 0
+        self.prev_value = nan
+
+    def update(self, val: float) -> None:
+        if not self.values or self.window == 1:
+            # pandas starts over when a window shares nothing with the previous one
+            self.values.clear()
+            self.nobs = self.neg_ct = 0
+            self.sum_x = self.compensation_add = self.compensation_remove = 0.
+            self.num_consecutive_same_value = 0
+            self.prev_value = val
+        elif len(self.values) == self.window:
+            self._remove(self.values.popleft())
+
+        self.values.append(val)
+        self._add(val)
+
+    def _add(self, val: float) -> None:
+        if val != val:
+            return
+        self.nobs += 1
+        y = val - self.compensation_add
+        t = self.sum_x + y
+        self.compensation_add = t - self.sum_x - y
+        self.sum_x = t
+        if math.copysign(1., val) < 0:
+            self.neg_ct += 1
+        if val == self.prev_value:
+            self.num_consecutive_same_value += 1
+        else:
+            self.num_consecutive_same_value = 1
+        self.prev_value = val
+
+    def _remove(self, val: float) -> None:
+        if val != val:
+            return
+        self.nobs -= 1
+        y = -val - self.compensation_remove
+        t = self.sum_x + y
+        self.compensation_remove = t - self.sum_x - y
+        self.sum_x = t
+        if math.copysign(1., val) < 0:
+            self.neg_ct -= 1
+
+    def mean(self) -> float:
+        if self.nobs < self.min_periods or self.nobs == 0:
+            return nan
+        result = self.sum_x / self.nobs
+        if self.num_consecutive_same_value >= self.nobs:
+            return self.prev_value
+        if self.neg_ct == 0 and result < 0:
+            return 0.
+        if self.neg_ct == self.nobs and result > 0:
+            return 0.
+        return result
+
+    def sum(self) -> float:
+        if self.nobs == 0 == self.min_periods:
+            return 0.
+        if self.nobs < self.min_periods:
+            return nan
+        if self.num_consecutive_same_value >= self.nobs:
+            return self.prev_value * self.nobs
+        return self.sum_x
+
+    def full(self) -> bool:
+        return len(self.values) == self.window
+
+    def array(self) -> np.ndarray:
+        return np.fromiter(self.values, dtype=np.float64, count=len(self.values))
+
+
+'''
+Moving averages. Each takes the next value of its input and returns the next value of the average.
+'''
+
+class IncrementalSMA:
+    def __init__(self, length: int = 10):
+        self.window = RollingWindow(length)
+
+    def update(self, value: float) -> float:
+        self.window.update(value)
+        return self.window.mean()
+
+
+class IncrementalEMA:
+    """pandas_ta ema: seeded with the SMA of the first length values, then ewm(span=length, adjust=False)."""
+    def __init__(self, length: int = 10):
+        self.length = length
+        self.ewm = EWM.from_span(length, adjust=False)
+        self.seed_values = []
+
+    def update(self, value: float) -> float:
+        if self.seed_values is not None:
+            self.seed_values.append(value)
+            if len(self.seed_values) < self.length:
+                return self.ewm.update(nan)
+
+            # Mean of the non NaN values, summed the way pandas sums them
+            seed = np.asarray(self.seed_values, dtype=np.float64)
+            observed = ~np.isnan(seed)
+            value = np.where(observed, seed, 0.).sum() / observed.sum() if observed.any() else nan
+            self.seed_values = None
+
+        return self.ewm.update(value)
+
+
+class IncrementalRMA:
+    """pandas_ta rma: ewm(alpha=1/length, min_periods=length)."""
+    def __init__(self, length: int = 10):
+        alpha = (1.0 / length) if length > 0 else 0.5
+        self.ewm = EWM.from_alpha(alpha, min_periods=length)
+
+    def update(self, value: float) -> float:
+        return self.ewm.update(value)
+
+
+class IncrementalWMA:
+    """pandas_ta wma: linearly weighted mean of the last length values, NaN until the window is full."""
+    def __init__(self, length: int = 10, asc: bool = True):
+        self.window = RollingWindow(length)
+        weights = np.arange(1, length + 1)
+        self.weights = weights if asc else weights[::-1]
+        self.total_weight = 0.5 * length * (length + 1)
+
+    def update(self, value: float) -> float:
+        self.window.update(value)
+        if not self.window.full() or self.window.nobs < self.window.window:
+            return nan
+        return float(np.dot(self.window.array(), self.weights) / self.total_weight)
+
+
+class IncrementalDEMA:
+    def __init__(self, length: int = 10):
+        self.ema1 = IncrementalEMA(length)
+        self.ema2 = IncrementalEMA(length)
+
+    def update(self, value: float) -> float:
+        ema1 = self.ema1.update(value)
+        ema2 = self.ema2.update(ema1)
+        return 2 * ema1 - ema2
+
+
+class IncrementalTEMA:
+    def __init__(self, length: int = 10):
+        self.ema1 = IncrementalEMA(length)
+        self.ema2 = IncrementalEMA(length)
+        self.ema3 = IncrementalEMA(length)
+
+    def update(self, value: float) -> float:
+        ema1 = self.ema1.update(value)
+        ema2 = self.ema2.update(ema1)
+        ema3 = self.ema3.update(ema2)
+        return 3 * (ema1 - ema2) + ema3
+
+
+class IncrementalT3:
+    def __init__(self, length: int = 10, a: float = 0.7):
+        self.emas = [IncrementalEMA(length) for _ in range(6)]
+        self.c1 = -a * a ** 2
+        self.c2 = 3 * a ** 2 + 3 * a ** 3
+        self.c3 = -6 * a ** 2 - 3 * a - 3 * a ** 3
+        self.c4 = a ** 3 + 3 * a ** 2 + 3 * a + 1
+
+    def update(self, value: float) -> float:
+        e = []
+        for ema in self.emas:
+            value = ema.update(value)
+            e.append(value)
+        return self.c1 * e[5] + self.c2 * e[4] + self.c3 * e[3] + self.c4 * e[2]
+
+
+class IncrementalHMA:
+    def __init__(self, length: int = 10):
+        self.wmaf = IncrementalWMA(int(length / 2))
+        self.wmas = IncrementalWMA(length)
+        self.hma = IncrementalWMA(int(np.sqrt(length)))
+
+    def update(self, value: float) -> float:
+        return self.hma.update(2 * self.wmaf.update(value) - self.wmas.update(value))
+
+
+class IncrementalTRIMA:
+    def __init__(self, length: int = 10):
+        half_length = round(0.5 * (length + 1))
+        self.sma1 = IncrementalSMA(half_length)
+        self.sma2 = IncrementalSMA(half_length)
+
+    def update(self, value: float) -> float:
+        return self.sma2.update(self.sma1.update(value))
+
+
+class IncrementalZLMA:
+    """EMA of the close with its lag removed: ema(2 * close - close.shift(lag))."""
+    def __init__(self, length: int = 10):
+        self.lag = int(0.5 * (length - 1))
+        self.history = deque(maxlen=self.lag + 1)
+        self.ema = IncrementalEMA(length)
+
+    def update(self, value: float) -> float:
+        self.history.append(value)
+        lagged = self.history[0] if len(self.history) == self.lag + 1 else nan
+        return self.ema.update(2 * value - lagged)
+
+
+class IncrementalVIDYA:
+    """Variable index dynamic average, an EMA whose alpha is scaled by the absolute CMO."""
+    def __init__(self, length: int = 14, drift: int = 1):
+        self.length = length
+        self.alpha = 2 / (length + 1)
+        self.closes = deque(maxlen=drift + 1)
+        self.positive = RollingWindow(length)
+        self.negative = RollingWindow(length)
+        self.index = 0
+        self.vidya = 0.
+
+    def update(self, value: float) -> float:
+        self.closes.append(value)
+        mom = value - self.closes[0] if len(self.closes) == self.closes.maxlen else nan
+        self.positive.update(max(mom, 0.) if mom == mom else nan)
+        self.negative.update(abs(min(mom, 0.)) if mom == mom else nan)
+
+        index = self.index
+        self.index += 1
+        if index < self.length:
+            return nan
+
+        pos_sum, neg_sum = self.positive.sum(), self.negative.sum()
+        abs_cmo = abs((pos_sum - neg_sum) / (pos_sum + neg_sum)) if pos_sum + neg_sum != 0 else nan
+        self.vidya = self.alpha * abs_cmo * value + self.vidya * (1 - self.alpha * abs_cmo)
+        # The batch version marks zeros as missing
+        return self.vidya if self.vidya != 0 else nan
+
+
+class WindowMA:
+    """
+    Any moving average whose value only depends on the last length inputs (fwma, linreg, midpoint, ...).
+    The batch function is run over the trailing window, a fixed cost per bar however long the history is.
+    """
+    def __init__(self, ma_function, length: int = 10):
+        self.ma_function = ma_function
+        self.length = length
+        self.values = deque(maxlen=length)
+
+    def update(self, value: float) -> float:
+        self.values.append(value)
+        if len(self.values) < self.length:
+            return nan
+
+        result = self.ma_function(pd.Series(list(self.values), dtype=np.float64), length=self.length)
+        return float(result.iloc[-1]) if result is not None else nan
+
+
+'''
+Volatility and trend.
+'''
+
+class IncrementalATR:
+    """pandas_ta atr with the default rma smoothing of the true range."""
+    def __init__(self, length: int = 14):
+        self.rma = IncrementalRMA(length)
+        self.prev_close = None
+
+    def update(self, high: float, low: float, close: float) -> float:
+        if self.prev_close is None:
+            true_range = nan # the batch version has no previous close for the first bar
+        else:
+            high_low_range = high - low
+            if high_low_range == 0:
+                # pandas_ta's non_zero_range nudges zero ranges by epsilon
+                high_low_range += np.finfo(float).eps
+            true_range = max(abs(high_low_range), abs(high - self.prev_close), abs(self.prev_close - low))
+        self.prev_close = close
+        return self.rma.update(true_range)
+
+
+class SupertrendState:
+    """
+    One bar of the Supertrend band ratcheting loop.
+    Takes the raw upper and lower band of the bar and returns (trend, direction, long, short).
+    """
+    def __init__(self):
+        self.direction = 1
+        self.upperband = None
+        self.lowerband = None
+
+    def update(self, close: float, upperband: float, lowerband: float) -> tuple:
+        if self.upperband is None:
+            self.upperband, self.lowerband = upperband, lowerband
+            return 0.0, 1, nan, nan
+
+        if close > self.upperband:
+            self.direction = 1
+        elif close < self.lowerband:
+            self.direction = -1
+        else:
+            if self.direction > 0 and lowerband < self.lowerband:
+                lowerband = self.lowerband
+            if self.direction < 0 and upperband > self.upperband:
+                upperband = self.upperband
+
+        self.upperband, self.lowerband = upperband, lowerband
+        if self.direction > 0:
+            return lowerband, self.direction, lowerband, nan
+        return upperband, self.direction, nan, upperband
+
+
+def replay_candles(indicator, count: int) -> None:
+    """
+    Bring the incremental state of an indicator up to the first count candles of its time series.
+    Used once, when an indicator populated in batch receives its first live update.
+    """
+    for candle in indicator.time_series.candle_list[:count]:
+        indicator._step(candle)
@@ -0,0 +1,51 @@
+from utils.lru_cache import LRUCache
+
+import logging
+from log.logger import LOGGER_NAME
+logger = logging.getLogger(LOGGER_NAME)
+
+'''
+Process wide cache of indicator outputs.
+
+Entries are keyed by (time series content hash, candle size, indicator name, parameters), so a
+/submit that only changes an exit condition or a fee gets the indicators of the previous run back
+instead of recomputing them. Data that changed hashes differently and simply misses.
+
+Cached values are shared between runs and must be treated as read only.
+'''
+
+INDICATOR_CACHE_MAX_BYTES = 256 * 1024 ** 2 # 256 MiB
+
+
+class IndicatorCache:
+    def __init__(self, max_bytes: int = INDICATOR_CACHE_MAX_BYTES, enabled: bool = True):
+        self.enabled = enabled
+        self.results = LRUCache("indicator results", max_bytes)
+
+    def get_or_compute(self, time_series, name: str, params: tuple, compute):
+        """
+        Output of compute() for an indicator over time_series, reused if the same indicator with the
+        same params was computed over the same candles before.
+        """
+        if not self.enabled or time_series.df is None:
+            return compute()
+
+        key = (time_series.content_hash(), time_series.candle_size_seconds, name, params)
+        result = self.results.get(key)
+        if result is not None:
+            logger.info(f"Indicator cache hit: {name}{params} on {time_series.candle_size_str}")
+            return result
+
+        result = compute()
+        if result is not None:
+            self.results.put(key, result)
+        return result
+
+    def invalidate(self) -> int:
+        return self.results.invalidate()
+
+    def stats(self) -> dict:
+        return self.results.stats()
+
+
+indicator_cache = IndicatorCache()
@@ -0,0 +1,117 @@
+from indicators.moving_averages import get_ma
+from indicators.indicator_cache import indicator_cache
+
+import logging
+from log.logger import LOGGER_NAME
+logger = logging.getLogger(LOGGER_NAME)
+
+'''
+Intermediate results shared between indicators.
+
+Indicators declare the inputs they are built from (hl2, ATR(n), MA(type, n)) through an inputs() method
+and read them from an IndicatorGraph instead of computing them themselves. The graph evaluates each
+input once per time series, after the inputs it depends on, so two indicators on the same time series
+that both need ATR(10) share one computation. Inputs also go through the indicator cache, a later run
+over the same candles gets them without computing anything.
+
+Inputs are tuples so they can be compared and hashed:
+    ("hl2",)
+    ("atr", length)
+    ("ma", moving_average_type, length)
+    ("bands", center input, atr_length, multiplier) - center +/- multiplier * ATR, depends on the center and the ATR
+'''
+
+
+def hl2_input() -> tuple:
+    return ("hl2",)
+
+def atr_input(length: int) -> tuple:
+    return ("atr", length)
+
+def ma_input(moving_average_type: str, length: int) -> tuple:
+    return ("ma", moving_average_type.strip().lower(), length)
+
+def bands_input(center: tuple, atr_length: int, multiplier: float) -> tuple:
+    return ("bands", center, atr_length, float(multiplier))
+
+
+# pandas_ta is imported by the inputs that use it, on first use
+def _compute_hl2(df, graph):
+    from pandas_ta.overlap import hl2
+    return hl2(df["High"], df["Low"])
+
+def _compute_atr(df, graph, length):
+    from pandas_ta.volatility import atr
+    return atr(df["High"], df["Low"], df["Close"], length)
+
+def _compute_ma(df, graph, moving_average_type, length):
+    return get_ma(moving_average_type)(df["Close"], length=length)
+
+def _compute_bands(df, graph, center, atr_length, multiplier):
+    """(upperband, lowerband) before the Supertrend ratcheting."""
+    matr = multiplier * graph.get(atr_input(atr_length))
+    center = graph.get(center)
+    return center + matr, center - matr
+
+# kind -> (compute function, dependencies of an input of that kind)
+INPUTS = {
+    "hl2": (_compute_hl2, lambda: []),
+    "atr": (_compute_atr, lambda length: []),
+    "ma": (_compute_ma, lambda moving_average_type, length: []),
+    "bands": (_compute_bands, lambda center, atr_length, multiplier: [center, atr_input(atr_length)]),
+}
+
+
+class IndicatorGraph:
+    """Inputs of the indicators on one time series, each computed once."""
+    def __init__(self, time_series):
+        self.time_series = time_series
+        self.values = {}
+
+    def get(self, node: tuple):
+        """Value of an input, computing its dependencies first if they are not known yet."""
+        if node in self.values:
+            return self.values[node]
+
+        kind, *params = node
+        try:
+            compute, dependencies = INPUTS[kind]
+        except KeyError:
+            raise ValueError(f"Unknown indicator input '{kind}'. Available: {', '.join(INPUTS.keys())}")
+
+        for dependency in dependencies(*params):
+            self.get(dependency)
+
+        df = self.time_series.df
+        value = indicator_cache.get_or_compute(
+            self.time_series, f"input:{kind}", tuple(params), lambda: compute(df, self, *params)
+        )
+        self.values[node] = value
+        return value
+
+    def evaluate(self, nodes) -> None:
+        for node in nodes:
+            self.get(node)
+
+
+def populate_indicators(indicators) -> None:
+    """
+    Populate every indicator of a config.
+    The inputs declared by all the indicators (their inputs() method) are evaluated first, once per
+    time series, then each indicator is populated from the shared values.
+    """
+    graphs = {}
+    for indicator in indicators:
+        graph = graphs.setdefault(id(indicator.time_series), IndicatorGraph(indicator.time_series))
+        if hasattr(indicator, "inputs"):
+            graph.evaluate(indicator.inputs())
+
+    for indicator in indicators:
+        if hasattr(indicator, "inputs"):
+            indicator.populate(graphs[id(indicator.time_series)])
+        else:
+            # An indicator that computes everything itself
+            indicator.populate()
+
+    for graph in graphs.values():
+        logger.info(f"{graph.time_series.candle_size_str}: {len(graph.values)} shared indicator inputs")
@@ -0,0 +1,111 @@
+from itertools import product
+
+import numpy as np
+import pandas as pd
+
+from pandas_ta.overlap import hl2
+from pandas_ta.volatility import atr
+
+from indicators.moving_averages import get_ma
+from indicators.supertrend_kernel import supertrend_grid_kernel
+
+from decorators.timeit import timeit
+
+'''
+Indicators for a whole grid of parameters in one pass, for parameter sweeps.
+
+Calling ta.supertrend once per (atr_length, multiplier) recomputes hl2 and the ATR for every
+combination. Here every ATR length is computed once and shared by all multipliers, every moving
+average length once and shared by all ATR lengths, and the band recurrence runs for all combinations
+together over a (bars x combinations) matrix.
+'''
+
+SUPERTREND_OUTPUTS = ["SUPERT", "SUPERTd", "SUPERTl", "SUPERTs"]
+
+
+class IndicatorGrid:
+    """
+    Outputs of one indicator for many parameter combinations.
+    Each output is a (bars x combinations) array whose columns follow params.
+    """
+    def __init__(self, name: str, param_names: list[str], params: list[tuple], index: pd.Index, outputs: dict):
+        self.name = name
+        self.param_names = param_names
+        self.params = params
+        self.index = index
+        self.outputs = outputs
+        self._columns = {combination: i for i, combination in enumerate(params)}
+
+    def column(self, *combination) -> int:
+        try:
+            return self._columns[combination]
+        except KeyError:
+            raise ValueError(f"{self.name}: {combination} is not in the grid of {self.param_names}")
+
+    def frame(self, *combination) -> pd.DataFrame:
+        """The outputs of one combination, named like the batch indicator (e.g. SUPERT_10_3.0)."""
+        i = self.column(*combination)
+        props = f"_{combination[0]}_{combination[1]}"
+        return pd.DataFrame({name + props: values[:, i] for name, values in self.outputs.items()}, index=self.index)
+
+    def __len__(self) -> int:
+        return len(self.params)
+
+    def __repr__(self) -> str:
+        return f"IndicatorGrid({self.name}, combinations={len(self)}, bars={len(self.index)})"
+
+
+def _atr_by_length(high, low, close, atr_lengths) -> dict:
+    return {length: atr(high, low, close, length) for length in dict.fromkeys(atr_lengths)}
+
+
+def _supertrend_outputs(close, upperband, lowerband) -> dict:
+    dir_, trend, long, short = supertrend_grid_kernel(close.to_numpy(), upperband, lowerband)
+    return dict(zip(SUPERTREND_OUTPUTS, (trend, dir_, long, short)))
+
+
+@timeit
+def supertrend_grid(high, low, close, atr_lengths, multipliers) -> IndicatorGrid:
+    """
+    Supertrend for every (atr_length, multiplier) in the product of the two lists.
+    Each column is equal to the batch Supertrend of that combination.
+    """
+    multipliers = [float(multiplier) for multiplier in multipliers]
+    params = list(product(atr_lengths, multipliers))
+
+    hl2_ = hl2(high, low)
+    atrs = _atr_by_length(high, low, close, atr_lengths)
+
+    upperband = np.empty((len(close), len(params)))
+    lowerband = np.empty((len(close), len(params)))
+    for i, (length, multiplier) in enumerate(params):
+        matr = multiplier * atrs[length]
+        upperband[:, i] = hl2_ + matr
+        lowerband[:, i] = hl2_ - matr
+
+    return IndicatorGrid("Supertrend", ["atr_length", "multiplier"], params, close.index,
+                         _supertrend_outputs(close, upperband, lowerband))
+
+
+@timeit
+def supertrend_ma_grid(high, low, close, atr_lengths, multipliers, ma_lengths, moving_average_type: str = "ema") -> IndicatorGrid:
+    """
+    SupertrendMA for every (atr_length, multiplier, ma_length) in the product of the three lists.
+    Each column is equal to SupertrendMA(time_series, atr_length, multiplier, ma_length, moving_average_type).
+    """
+    multipliers = [float(multiplier) for multiplier in multipliers]
+    params = list(product(atr_lengths, multipliers, ma_lengths))
+
+    moving_average = get_ma(moving_average_type)
+    atrs = _atr_by_length(high, low, close, atr_lengths)
+    moving_avgs = {length: moving_average(close, length=length) for length in dict.fromkeys(ma_lengths)}
+
+    upperband = np.empty((len(close), len(params)))
+    lowerband = np.empty((len(close), len(params)))
+    for i, (length, multiplier, ma_length) in enumerate(params):
+        matr = multiplier * atrs[length]
+        upperband[:, i] = moving_avgs[ma_length] + matr
+        lowerband[:, i] = moving_avgs[ma_length] - matr
+
+    return IndicatorGrid("SupertrendMA", ["atr_length", "multiplier", "ma_length"], params, close.index,
+                         _supertrend_outputs(close, upperband, lowerband))
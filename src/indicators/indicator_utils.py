@@ -1,15 +1,14 @@
+import numpy as np
+
+
 def split_on_nulls(df, value_col):
     """
     Splits a DataFrame into multiple DataFrames
     whenever a null value appears in value_col.
     """
-    is_null = df[value_col].isna()
-
-    # Increment segment id whenever we hit a null
-    segment_id = is_null.cumsum()
+    is_valid = df[value_col].notna().to_numpy()
 
-    segments = []
-    for _, group in df[~is_null].groupby(segment_id):
-        segments.append(group)
+    # Start and end rows of each run of non null values
+    edges = np.flatnonzero(np.diff(np.r_[0, is_valid.astype(np.int8), 0]))
 
-    return segments
\ No newline at end of file
+    return [df.iloc[start:end] for start, end in zip(edges[::2], edges[1::2])]
@@ -0,0 +1,79 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from indicators.moving_averages import MOVING_AVERAGES, get_ma, get_pandas_ta_ma
+
+'''
+Checks the native moving averages against pandas_ta and times both.
+
+For every entry of MOVING_AVERAGES both versions run over the same random walk, the report gives the
+largest absolute difference (EXACT, CLOSE within float rounding, or DIFF) and the best time of each.
+The recurrences (ema, dema, tema, t3, zlma, vidya, sma, rma, trima) follow the pandas kernels and are
+exact. rma follows pandas_ta 0.3.14b, ewm(alpha=1/length, min_periods=length); later pandas_ta
+versions use adjust=False and show up as DIFF.
+Run from src:
+    python -m indicators.moving_average_benchmark
+    python -m indicators.moving_average_benchmark --bars 1000000 --length 50 ema hma
+'''
+
+
+def _best_time(function, runs: int) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def compare(name: str, close: pd.Series, length: int, runs: int = 3) -> dict:
+    native, reference = get_ma(name), get_pandas_ta_ma(name)
+    native(close, length=length) # compiles the numba kernels outside of the timing
+
+    result = native(close, length=length).to_numpy()
+    expected = reference(close, length=length).to_numpy(dtype=np.float64)
+
+    if np.array_equal(result, expected, equal_nan=True):
+        parity = "EXACT"
+    elif np.allclose(result, expected, rtol=1e-10, atol=1e-8, equal_nan=True):
+        parity = "CLOSE"
+    else:
+        parity = "DIFF"
+
+    native_s = _best_time(lambda: native(close, length=length), runs)
+    reference_s = _best_time(lambda: reference(close, length=length), runs)
+    return {
+        "name": name,
+        "parity": parity,
+        "max_abs_diff": float(np.nanmax(np.abs(result - expected))) if len(result) else 0.0,
+        "native_s": native_s,
+        "pandas_ta_s": reference_s,
+        "speedup": reference_s / native_s if native_s > 0 else float("inf"),
+    }
+
+
+def random_walk(bars: int, seed: int = 0) -> pd.Series:
+    rng = np.random.default_rng(seed)
+    return pd.Series(30000 + np.cumsum(rng.normal(0, 50, bars)), name="Close")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and time the native moving averages against pandas_ta.")
+    parser.add_argument("names", nargs="*", default=MOVING_AVERAGES)
+    parser.add_argument("--bars", type=int, default=200_000)
+    parser.add_argument("--length", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    close = random_walk(args.bars)
+    print(f"{'name':10s}{'parity':8s}{'max diff':>12s}{'native':>11s}{'pandas_ta':>11s}{'speedup':>9s}")
+    for name in args.names:
+        r = compare(name, close, args.length, args.runs)
+        print(f"{r['name']:10s}{r['parity']:8s}{r['max_abs_diff']:12.3g}{r['native_s'] * 1e3:9.2f}ms{r['pandas_ta_s'] * 1e3:9.2f}ms{r['speedup']:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,31 +1,56 @@
-import pandas_ta as ta
-
-MOVING_AVERAGES = {
-    "dema": ta.dema,
-    "ema": ta.ema,
-    "fwma": ta.fwma,
-    "hma": ta.hma,
-    "linreg": ta.linreg,
-    "midpoint": ta.midpoint,
-    "pwma": ta.pwma,
-    "rma": ta.rma,
-    "sinwma": ta.sinwma,
-    "sma": ta.sma,
-    "swma": ta.swma,
-    "t3": ta.t3,
-    "tema": ta.tema,
-    "trima": ta.trima,
-    "vidya": ta.vidya,
-    "wma": ta.wma,
-    "zlma": ta.zlma,
-}
+import importlib
 
-def get_ma(name: str):
+from indicators.incremental import (
+    IncrementalSMA, IncrementalEMA, IncrementalRMA, IncrementalWMA, IncrementalDEMA, IncrementalTEMA,
+    IncrementalT3, IncrementalHMA, IncrementalTRIMA, IncrementalZLMA, IncrementalVIDYA, WindowMA
+)
+
+# The averages are the array based versions of indicators/native_moving_averages.py, which give the
+# pandas_ta results without pandas_ta. Like numba, which they use, they are imported on first use.
+MOVING_AVERAGES = [
+    "dema", "ema", "fwma", "hma", "linreg", "midpoint", "pwma", "rma", "sinwma",
+    "sma", "swma", "t3", "tema", "trima", "vidya", "wma", "zlma",
+]
+
+def _ma_key(name: str) -> str:
     key = name.strip().lower()
-    try:
-        return MOVING_AVERAGES[key]
-    except KeyError:
+    if key not in MOVING_AVERAGES:
         raise ValueError(
             f"Invalid moving average '{name}'. "
-            f"Available: {', '.join(MOVING_AVERAGES.keys())}"
+            f"Available: {', '.join(MOVING_AVERAGES)}"
         )
+    return key
+
+def get_ma(name: str):
+    return getattr(importlib.import_module("indicators.native_moving_averages"), _ma_key(name))
+
+def get_pandas_ta_ma(name: str):
+    """The pandas_ta function of a moving average, the reference the native versions are checked against."""
+    return getattr(importlib.import_module("pandas_ta"), _ma_key(name))
+
+
+# Constant time per bar versions for live updates. Averages that only look at the last length values
+# and have no recurrence of their own are run over the trailing window by WindowMA.
+INCREMENTAL_MOVING_AVERAGES = {
+    "dema": IncrementalDEMA,
+    "ema": IncrementalEMA,
+    "fwma": lambda length: WindowMA(get_ma("fwma"), length),
+    "hma": IncrementalHMA,
+    "linreg": lambda length: WindowMA(get_ma("linreg"), length),
+    "midpoint": lambda length: WindowMA(get_ma("midpoint"), length),
+    "pwma": lambda length: WindowMA(get_ma("pwma"), length),
+    "rma": IncrementalRMA,
+    "sinwma": lambda length: WindowMA(get_ma("sinwma"), length),
+    "sma": IncrementalSMA,
+    "swma": lambda length: WindowMA(get_ma("swma"), length),
+    "t3": IncrementalT3,
+    "tema": IncrementalTEMA,
+    "trima": IncrementalTRIMA,
+    "vidya": IncrementalVIDYA,
+    "wma": IncrementalWMA,
+    "zlma": IncrementalZLMA,
+}
+
+def get_incremental_ma(name: str, length: int):
+    get_ma(name) # same validation and error message as the batch lookup
+    return INCREMENTAL_MOVING_AVERAGES[name.strip().lower()](length)
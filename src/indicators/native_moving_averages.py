@@ -0,0 +1,441 @@
+from math import comb, floor, sin, pi
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+'''
+Array based versions of the pandas_ta moving averages of the MOVING_AVERAGES table.
+
+Every function takes the arguments of its pandas_ta counterpart and returns a Series with the same name
+and index, but works on one float64 array from start to end: no intermediate Series, and no pandas_ta
+import. The recurrences (EWM, rolling sums, VIDYA) mirror the pandas kernels pandas_ta relies on and are
+compiled with numba when it is installed, otherwise they run on the pandas kernels themselves. The
+windowed averages (wma, fwma, pwma, sinwma, swma, linreg) are one matrix product over a strided view of
+the windows, which only differs from the per window np.dot of pandas_ta by float rounding.
+
+indicators/moving_average_benchmark.py checks every average against pandas_ta and times both.
+'''
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+nan = np.nan
+
+
+def _ewm_loop(values, com, adjust, min_periods, out):
+    """pandas ewm(com=com, adjust=adjust, min_periods=min_periods).mean(), ignore_na=False."""
+    alpha = 1. / (1. + com)
+    old_wt_factor = 1. - alpha
+    new_wt = 1. if adjust else alpha
+    min_periods = max(min_periods, 1)
+
+    weighted = values[0]
+    nobs = 1 if weighted == weighted else 0
+    old_wt = 1.
+    out[0] = weighted if nobs >= min_periods else nan
+
+    for i in range(1, len(values)):
+        cur = values[i]
+        is_observation = cur == cur
+        if is_observation:
+            nobs += 1
+        if weighted == weighted:
+            old_wt *= old_wt_factor
+            if is_observation:
+                # pandas skips the update on a constant series to avoid rounding drift
+                if weighted != cur:
+                    weighted = old_wt * weighted + new_wt * cur
+                    weighted /= (old_wt + new_wt)
+                if adjust:
+                    old_wt += new_wt
+                else:
+                    old_wt = 1.
+        elif is_observation:
+            weighted = cur
+        out[i] = weighted if nobs >= min_periods else nan
+
+
+def _rolling_loop(values, window, min_periods, mean, out):
+    """pandas rolling(window, min_periods).mean() (mean=True) or .sum(), with its compensated running sum."""
+    nobs = 0
+    neg_ct = 0
+    sum_x = 0.
+    compensation_add = 0.
+    compensation_remove = 0.
+    num_consecutive_same_value = 0
+    prev_value = values[0]
+
+    for i in range(len(values)):
+        if window == 1 and i > 0:
+            # pandas starts over when a window shares nothing with the previous one
+            nobs = neg_ct = num_consecutive_same_value = 0
+            sum_x = compensation_add = compensation_remove = 0.
+            prev_value = values[i]
+        elif i >= window:
+            val = values[i - window]
+            if val == val:
+                nobs -= 1
+                y = -val - compensation_remove
+                t = sum_x + y
+                compensation_remove = t - sum_x - y
+                sum_x = t
+                if np.signbit(val):
+                    neg_ct -= 1
+
+        val = values[i]
+        if val == val:
+            nobs += 1
+            y = val - compensation_add
+            t = sum_x + y
+            compensation_add = t - sum_x - y
+            sum_x = t
+            if np.signbit(val):
+                neg_ct += 1
+            if val == prev_value:
+                num_consecutive_same_value += 1
+            else:
+                num_consecutive_same_value = 1
+            prev_value = val
+
+        if mean:
+            if nobs >= min_periods and nobs > 0:
+                result = sum_x / nobs
+                if num_consecutive_same_value >= nobs:
+                    result = prev_value
+                elif neg_ct == 0 and result < 0:
+                    result = 0.
+                elif neg_ct == nobs and result > 0:
+                    result = 0.
+                out[i] = result
+            else:
+                out[i] = nan
+        else:
+            if nobs == 0 == min_periods:
+                out[i] = 0.
+            elif nobs >= min_periods:
+                out[i] = prev_value * nobs if num_consecutive_same_value >= nobs else sum_x
+            else:
+                out[i] = nan
+
+
+def _vidya_loop(close, abs_cmo, alpha, length, out):
+    for i in range(length, len(close)):
+        out[i] = alpha * abs_cmo[i] * close[i] + out[i - 1] * (1 - alpha * abs_cmo[i])
+
+
+_compiled_ewm = njit(cache=True)(_ewm_loop) if njit is not None else None
+_compiled_rolling = njit(cache=True)(_rolling_loop) if njit is not None else None
+_compiled_vidya = njit(cache=True)(_vidya_loop) if njit is not None else None
+
+
+'''
+Kernels over float64 arrays
+'''
+
+def ewm_mean(values: np.ndarray, com: float, adjust: bool = True, min_periods: int = 0) -> np.ndarray:
+    out = np.empty(len(values))
+    if not len(values):
+        return out
+    if _compiled_ewm is not None:
+        _compiled_ewm(values, float(com), bool(adjust), int(min_periods), out)
+        return out
+    return pd.Series(values).ewm(com=com, adjust=adjust, min_periods=min_periods).mean().to_numpy()
+
+
+def rolling_mean(values: np.ndarray, window: int, min_periods: int = None) -> np.ndarray:
+    return _rolling(values, window, window if min_periods is None else min_periods, True)
+
+
+def rolling_sum(values: np.ndarray, window: int, min_periods: int = None) -> np.ndarray:
+    return _rolling(values, window, window if min_periods is None else min_periods, False)
+
+
+def _rolling(values, window, min_periods, mean):
+    out = np.empty(len(values))
+    if not len(values):
+        return out
+    if _compiled_rolling is not None:
+        _compiled_rolling(values, int(window), int(min_periods), mean, out)
+        return out
+    rolling = pd.Series(values).rolling(window, min_periods=min_periods)
+    return (rolling.mean() if mean else rolling.sum()).to_numpy()
+
+
+def rolling_weighted(values: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """Dot product of every full window with weights (oldest value first), NaN before the first full window."""
+    length = len(weights)
+    out = np.full(len(values), nan)
+    if len(values) >= length:
+        out[length - 1:] = sliding_window_view(values, length) @ np.asarray(weights, dtype=np.float64)
+    return out
+
+
+def rolling_extreme(values: np.ndarray, length: int, ufunc=np.minimum) -> np.ndarray:
+    """
+    Rolling min (np.minimum) or max (np.maximum) of full windows in O(n), NaN if the window has a NaN.
+    Van Herk/Gil-Werman: in blocks of length values, each window is the suffix of one block and the prefix of the next.
+    """
+    n = len(values)
+    out = np.full(n, nan)
+    if n < length:
+        return out
+    padding = np.inf if ufunc is np.minimum else -np.inf
+    blocks = np.concatenate([values, np.full(-n % length, padding)]).reshape(-1, length)
+    prefix = ufunc.accumulate(blocks, axis=1).ravel()
+    suffix = ufunc.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+    out[length - 1:] = ufunc(suffix[:n - length + 1], prefix[length - 1:n])
+    return out
+
+
+def _shift(values: np.ndarray, periods: int) -> np.ndarray:
+    out = np.full(len(values), nan)
+    if periods == 0:
+        out[:] = values
+    elif 0 < periods < len(values):
+        out[periods:] = values[:-periods]
+    return out
+
+
+'''
+Helpers shared by the moving averages
+'''
+
+def _values(close) -> np.ndarray:
+    return close.to_numpy(dtype=np.float64) if isinstance(close, pd.Series) else np.asarray(close, dtype=np.float64)
+
+
+def _length(length, default: int) -> int:
+    return int(length) if length and length > 0 else default
+
+
+def _verify(close, length: int):
+    """pandas_ta returns None instead of a result when there are fewer values than length."""
+    return close is not None and len(close) >= length
+
+
+def _to_series(values: np.ndarray, close, name: str, offset=None, **kwargs) -> pd.Series:
+    """The pandas_ta output: same index as close, offset and fills applied."""
+    index = close.index if isinstance(close, pd.Series) else None
+    result = pd.Series(values, index=index, name=name)
+
+    offset = int(offset) if offset else 0
+    if offset != 0:
+        result = result.shift(offset)
+    if "fillna" in kwargs:
+        result = result.fillna(kwargs["fillna"])
+    if "fill_method" in kwargs:
+        result = result.ffill() if kwargs["fill_method"] == "ffill" else result.bfill()
+    return result
+
+
+def _ema(values: np.ndarray, length: int, adjust: bool = False, presma: bool = True) -> np.ndarray:
+    """EMA seeded with the mean of the first length values, like pandas_ta's default sma=True."""
+    if presma and len(values) >= length:
+        values = values.copy()
+        seed = values[:length]
+        observed = ~np.isnan(seed)
+        # Series.mean of the window, summed the way pandas sums it
+        values[length - 1] = np.where(observed, seed, 0.).sum() / observed.sum() if observed.any() else nan
+        values[:length - 1] = nan
+    return ewm_mean(values, (length - 1) / 2.0, adjust=adjust)
+
+
+def _sma(values: np.ndarray, length: int) -> np.ndarray:
+    return rolling_mean(values, length)
+
+
+def _wma(values: np.ndarray, length: int, asc: bool = True) -> np.ndarray:
+    weights = np.arange(1, length + 1, dtype=np.float64)
+    weights = weights if asc else weights[::-1]
+    return rolling_weighted(values, weights / (0.5 * length * (length + 1)))
+
+
+'''
+Moving averages, named like the pandas_ta functions (get_ma and the indicator graph use the names)
+'''
+
+def sma(close, length=None, offset=None, **kwargs) -> pd.Series:
+    length = _length(length, 10)
+    if not _verify(close, length): return
+    min_periods = int(kwargs["min_periods"]) if kwargs.get("min_periods") is not None else length
+    return _to_series(rolling_mean(_values(close), length, min_periods), close, f"SMA_{length}", offset, **kwargs)
+
+
+def ema(close, length=None, offset=None, **kwargs) -> pd.Series:
+    length = _length(length, 10)
+    if not _verify(close, length): return
+    values = _ema(_values(close), length, kwargs.pop("adjust", False), kwargs.pop("sma", True))
+    return _to_series(values, close, f"EMA_{length}", offset, **kwargs)
+
+
+def rma(close, length=None, offset=None, **kwargs) -> pd.Series:
+    length = _length(length, 10)
+    if not _verify(close, length): return
+    alpha = (1.0 / length) if length > 0 else 0.5
+    values = ewm_mean(_values(close), (1.0 - alpha) / alpha, adjust=True, min_periods=length)
+    return _to_series(values, close, f"RMA_{length}", offset, **kwargs)
+
+
+def wma(close, length=None, asc=None, offset=None, **kwargs) -> pd.Series:
+    length = _length(length, 10)
+    if not _verify(close, length): return
+    return _to_series(_wma(_values(close), length, asc if asc is not None else True), close, f"WMA_{length}", offset, **kwargs)
+
+
+def dema(close, length=None, offset=None, **kwargs) -> pd.Series:
+    length = _length(length, 10)
+    if not _verify(close, length): return
+    ema1 = _ema(_values(close), length)
+    ema2 = _ema(ema1, length)
+    return _to_series(2 * ema1 - ema2, close, f"DEMA_{length}", offset, **kwargs)
+
+
+def tema(close, length=None, offset=None, **kwargs) -> pd.Series:
+    length = _length(length, 10)
+    if not _verify(close, length): return
+    ema1 = _ema(_values(close), length)
+    ema2 = _ema(ema1, length)
+    ema3 = _ema(ema2, length)
+    return _to_series(3 * (ema1 - ema2) + ema3, close, f"TEMA_{length}", offset, **kwargs)
+
+
+def t3(close, length=None, a=None, offset=None, **kwargs) -> pd.Series:
+    length = _length(length, 10)
+    a = float(a) if a and 0 < a < 1 else 0.7
+    if not _verify(close, length): return
+
+    c1 = -a * a ** 2
+    c2 = 3 * a ** 2 + 3 * a ** 3
+    c3 = -6 * a ** 2 - 3 * a - 3 * a ** 3
+    c4 = a ** 3 + 3 * a ** 2 + 3 * a + 1
+
+    e = [_values(close)]
+    for _ in range(6):
+        e.append(_ema(e[-1], length))
+    values = c1 * e[6] + c2 * e[5] + c3 * e[4] + c4 * e[3]
+    return _to_series(values, close, f"T3_{length}_{a}", offset, **kwargs)
+
+
+def hma(close, length=None, offset=None, **kwargs) -> pd.Series:
+    length = _length(length, 10)
+    if not _verify(close, length): return
+    values = _values(close)
+    wmaf = _wma(values, int(length / 2))
+    wmas = _wma(values, length)
+    return _to_series(_wma(2 * wmaf - wmas, int(np.sqrt(length))), close, f"HMA_{length}", offset, **kwargs)
+
+
+def trima(close, length=None, offset=None, **kwargs) -> pd.Series:
+    length = _length(length, 10)
+    if not _verify(close, length): return
+    half_length = round(0.5 * (length + 1))
+    values = _sma(_sma(_values(close), half_length), half_length)
+    return _to_series(values, close, f"TRIMA_{length}", offset, **kwargs)
+
+
+def zlma(close, length=None, offset=None, **kwargs) -> pd.Series:
+    """Zero lag EMA, the only mamode of the moving average table."""
+    length = _length(length, 10)
+    if not _verify(close, length): return
+    values = _values(close)
+    lag = int(0.5 * (length - 1))
+    values = _ema(2 * values - _shift(values, lag), length)
+    return _to_series(values, close, f"ZL_EMA_{length}", offset, **kwargs)
+
+
+def vidya(close, length=None, drift=None, offset=None, **kwargs) -> pd.Series:
+    length = _length(length, 14)
+    drift = int(drift) if drift and drift > 0 else 1
+    if not _verify(close, length): return
+    values = _values(close)
+
+    # Chande momentum oscillator
+    mom = values - _shift(values, drift)
+    positive = np.where(np.isnan(mom), nan, np.clip(mom, 0, None))
+    negative = np.abs(np.where(np.isnan(mom), nan, np.clip(mom, None, 0)))
+    pos_sum = rolling_sum(positive, length)
+    neg_sum = rolling_sum(negative, length)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        abs_cmo = np.abs((pos_sum - neg_sum) / (pos_sum + neg_sum))
+
+    alpha = 2 / (length + 1)
+    out = np.zeros(len(values))
+    if _compiled_vidya is not None:
+        _compiled_vidya(values, abs_cmo, alpha, length, out)
+    else:
+        out_list = out.tolist()
+        _vidya_loop(values.tolist(), abs_cmo.tolist(), alpha, length, out_list)
+        out = np.array(out_list)
+    out[out == 0] = nan
+    return _to_series(out, close, f"VIDYA_{length}", offset, **kwargs)
+
+
+def fwma(close, length=None, asc=None, offset=None, **kwargs) -> pd.Series:
+    length = _length(length, 10)
+    if not _verify(close, length): return
+    fibs = [1, 1]
+    while len(fibs) < length:
+        fibs.append(fibs[-1] + fibs[-2])
+    weights = np.array(fibs[:length], dtype=np.float64)
+    return _to_series(rolling_weighted(_values(close), weights / weights.sum()), close, f"FWMA_{length}", offset, **kwargs)
+
+
+def pwma(close, length=None, asc=None, offset=None, **kwargs) -> pd.Series:
+    length = _length(length, 10)
+    if not _verify(close, length): return
+    weights = np.array([comb(length - 1, i) for i in range(length)], dtype=np.float64)
+    return _to_series(rolling_weighted(_values(close), weights / weights.sum()), close, f"PWMA_{length}", offset, **kwargs)
+
+
+def sinwma(close, length=None, offset=None, **kwargs) -> pd.Series:
+    length = _length(length, 14)
+    if not _verify(close, length): return
+    weights = np.array([sin((i + 1) * pi / (length + 1)) for i in range(length)])
+    return _to_series(rolling_weighted(_values(close), weights / weights.sum()), close, f"SINWMA_{length}", offset, **kwargs)
+
+
+def swma(close, length=None, asc=None, offset=None, **kwargs) -> pd.Series:
+    length = _length(length, 10)
+    if not _verify(close, length): return
+    if length == 2:
+        triangle = [1, 1]
+    elif length % 2 == 0:
+        front = list(range(1, floor(length / 2) + 1))
+        triangle = front + front[::-1]
+    else:
+        front = list(range(1, floor(0.5 * (length + 1)) + 1))
+        triangle = front + front[:-1][::-1]
+    weights = np.array(triangle, dtype=np.float64)
+    return _to_series(rolling_weighted(_values(close), weights / weights.sum()), close, f"SWMA_{length}", offset, **kwargs)
+
+
+def linreg(close, length=None, offset=None, **kwargs) -> pd.Series:
+    """End point of the least squares line through each window (the default pandas_ta output)."""
+    length = _length(length, 14)
+    if not _verify(close, length): return
+    values = _values(close)
+
+    x = np.arange(1, length + 1, dtype=np.float64)
+    x_sum = 0.5 * length * (length + 1)
+    x2_sum = x_sum * (2 * length + 1) / 3
+    divisor = length * x2_sum - x_sum * x_sum
+
+    out = np.full(len(values), nan)
+    windows = sliding_window_view(values, length)
+    y_sum = windows.sum(axis=1)
+    xy_sum = windows @ x
+    m = (length * xy_sum - x_sum * y_sum) / divisor
+    b = (y_sum * x2_sum - x_sum * xy_sum) / divisor
+    out[length - 1:] = m * length + b
+    return _to_series(out, close, f"LR_{length}", offset, **kwargs)
+
+
+def midpoint(close, length=None, offset=None, **kwargs) -> pd.Series:
+    length = _length(length, 2)
+    if not _verify(close, length): return
+    values = _values(close)
+    out = 0.5 * (rolling_extreme(values, length, np.minimum) + rolling_extreme(values, length, np.maximum))
+    return _to_series(out, close, f"MIDPOINT_{length}", offset, **kwargs)
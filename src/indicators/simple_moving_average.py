@@ -1,6 +1,6 @@
-import pandas_ta as ta
-
 from core.series import Series
+from indicators.indicator_graph import IndicatorGraph, ma_input
+from indicators.incremental import IncrementalSMA, IncrementalRMA, replay_candles
 
 class SimpleMovingAverage:
     def __init__(self, time_series, sma_length=20, smoothing=None):
@@ -11,9 +11,29 @@ class SimpleMovingAverage:
         self.sma_name = f"SMA {self.sma_length}"
         self.sma = Series(self.sma_name, self.time_series, smoothing=self.smoothing)
 
-    def populate(self):
-        sma = ta.sma(self.time_series.df["Close"], self.sma_length)
-        self.sma.populate(sma)
+    def inputs(self):
+        return [ma_input("sma", self.sma_length)]
+
+    def populate(self, graph=None):
+        graph = graph if graph is not None else IndicatorGraph(self.time_series)
+        self.sma.populate(graph.get(self.inputs()[0]))
+
+    def update(self, candle):
+        '''
+        Add the SMA of a newly closed candle in constant time, for live mode.
+        The first call replays the candles that were already populated to build the rolling state.
+        '''
+        if getattr(self, "_incremental", None) is None:
+            # Series.populate smooths with ta.rma's default length
+            self._incremental = (IncrementalSMA(self.sma_length), IncrementalRMA(10) if self.smoothing == "rma" else None)
+            replay_candles(self, len(self.sma))
+
+        self.sma.append(self._step(candle))
+
+    def _step(self, candle):
+        sma, smoothing = self._incremental
+        value = sma.update(candle.Close)
+        return smoothing.update(value) if smoothing is not None else value
 
     def time_period_met(self):
         return self.sma.time_period_met()
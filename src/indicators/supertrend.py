@@ -1,8 +1,11 @@
 import pandas as pd
-import pandas_ta as ta
 
 from core.series import Series
 from indicators.indicator_utils import split_on_nulls
+from indicators.indicator_cache import indicator_cache
+from indicators.incremental import IncrementalATR, SupertrendState, replay_candles
+from indicators.indicator_graph import IndicatorGraph, bands_input, hl2_input
+from indicators.supertrend_kernel import supertrend_frame
 
 class Supertrend:
     def __init__(self, time_series, atr_length=10, multiplier=3.0):
@@ -15,9 +18,19 @@ class Supertrend:
         self.supertrend_long = Series("Supertrend Long", self.time_series)
         self.supertrend_short = Series("Supertrend Short", self.time_series)
 
-    def populate(self):
+    def inputs(self):
+        return [bands_input(hl2_input(), self.atr_length, self.multiplier)]
+
+    def populate(self, graph=None):
+        '''
+        Same result as ta.supertrend, computed from the hl2 and ATR shared through the IndicatorGraph.
+        '''
+        graph = graph if graph is not None else IndicatorGraph(self.time_series)
         df = self.time_series.df
-        self.pandas_supertrend = ta.supertrend(df["High"], df["Low"], df["Close"], length=self.atr_length, multiplier=self.multiplier)
+        self.pandas_supertrend = indicator_cache.get_or_compute(
+            self.time_series, "Supertrend", (self.atr_length, self.multiplier),
+            lambda: supertrend_frame(df["Close"], *graph.get(self.inputs()[0]), self.atr_length, self.multiplier)
+        )
         self.key = f"_{self.atr_length}_{self.multiplier}"
 
         self.supertrend_main.populate(pd.Series(self.pandas_supertrend["SUPERT" + self.key]))
@@ -25,6 +38,27 @@ class Supertrend:
         self.supertrend_long.populate(pd.Series(self.pandas_supertrend["SUPERTl" + self.key]))
         self.supertrend_short.populate(pd.Series(self.pandas_supertrend["SUPERTs" + self.key]))
 
+    def update(self, candle):
+        '''
+        Add the Supertrend of a newly closed candle in constant time, for live mode.
+        The first call replays the candles that were already populated to build the rolling state.
+        '''
+        if getattr(self, "_incremental", None) is None:
+            self._incremental = (IncrementalATR(self.atr_length), SupertrendState())
+            replay_candles(self, len(self.supertrend_main))
+
+        trend, direction, long, short = self._step(candle)
+        self.supertrend_main.append(trend)
+        self.supertrend_direction.append(direction)
+        self.supertrend_long.append(long)
+        self.supertrend_short.append(short)
+
+    def _step(self, candle):
+        atr, state = self._incremental
+        hl2 = 0.5 * (candle.High + candle.Low)
+        matr = self.multiplier * atr.update(candle.High, candle.Low, candle.Close)
+        return state.update(candle.Close, hl2 + matr, hl2 - matr)
+
     def plotting(self):
         ST_long = pd.DataFrame({
             "Timestamp": self.time_series.df["Timestamp"].values,
@@ -1,16 +1,18 @@
 import pandas as pd
-import pandas_ta as ta
 
 from core.series import Series
 
-from numpy import nan as npNaN
 from pandas import DataFrame
 from pandas_ta.overlap import hl2
 from pandas_ta.volatility import atr
 from pandas_ta.utils import get_offset, verify_series
 
 from indicators.indicator_utils import split_on_nulls
-from indicators.moving_averages import get_ma
+from indicators.moving_averages import get_ma, get_incremental_ma
+from indicators.supertrend_kernel import supertrend_kernel
+from indicators.indicator_cache import indicator_cache
+from indicators.incremental import IncrementalATR, SupertrendState, replay_candles
+from indicators.indicator_graph import IndicatorGraph, bands_input, ma_input
 
 class SupertrendMA:
     def __init__(self, time_series, atr_length=10, multiplier=3.0, ma_length = 100, moving_average_type=None):
@@ -25,9 +27,17 @@ class SupertrendMA:
         self.supertrend_ma_long = Series("Supertrend MA Long", self.time_series)
         self.supertrend_ma_short = Series("Supertrend MA Short", self.time_series)
 
-    def populate(self):
+    def inputs(self):
+        center = ma_input(self.ta_moving_average.__name__, self.ma_length)
+        return [bands_input(center, self.atr_length, self.multiplier)]
+
+    def populate(self, graph=None):
+        graph = graph if graph is not None else IndicatorGraph(self.time_series)
         df = self.time_series.df
-        self.pandas_supertrend_ma = self._supertrend(df["High"], df["Low"], df["Close"])
+        self.pandas_supertrend_ma = indicator_cache.get_or_compute(
+            self.time_series, "SupertrendMA", (self.atr_length, self.multiplier, self.ma_length, self.ta_moving_average.__name__),
+            lambda: self._supertrend(df["High"], df["Low"], df["Close"], bands=graph.get(self.inputs()[0]))
+        )
 
         self.key = f"_{self.atr_length}_{self.multiplier}"
 
@@ -36,7 +46,32 @@ class SupertrendMA:
         self.supertrend_ma_long.populate(pd.Series(self.pandas_supertrend_ma["SUPERTl" + self.key]))
         self.supertrend_ma_short.populate(pd.Series(self.pandas_supertrend_ma["SUPERTs" + self.key]))
 
-    def _supertrend(self, high, low, close, length=None, multiplier=None, offset=None, **kwargs):
+    def update(self, candle):
+        '''
+        Add the Supertrend MA of a newly closed candle in constant time, for live mode.
+        The first call replays the candles that were already populated to build the rolling state.
+        '''
+        if getattr(self, "_incremental", None) is None:
+            self._incremental = (
+                IncrementalATR(self.atr_length),
+                get_incremental_ma(self.ta_moving_average.__name__, self.ma_length),
+                SupertrendState(),
+            )
+            replay_candles(self, len(self.supertrend_ma_main))
+
+        trend, direction, long, short = self._step(candle)
+        self.supertrend_ma_main.append(trend)
+        self.supertrend_ma_direction.append(direction)
+        self.supertrend_ma_long.append(long)
+        self.supertrend_ma_short.append(short)
+
+    def _step(self, candle):
+        atr, moving_average, state = self._incremental
+        matr = self.multiplier * atr.update(candle.High, candle.Low, candle.Close)
+        moving_avg = moving_average.update(candle.Close)
+        return state.update(candle.Close, moving_avg + matr, moving_avg - matr)
+
+    def _supertrend(self, high, low, close, length=None, multiplier=None, offset=None, bands=None, **kwargs):
         """Indicator: Supertrend"""
         # Validate Arguments
         #length = int(length) if length and length > 0 else 7
@@ -51,32 +86,18 @@ class SupertrendMA:
         if high is None or low is None or close is None: return
 
         # Calculate Results
-        m = close.size
-        dir_, trend = [1] * m, [0] * m
-        long, short = [npNaN] * m, [npNaN] * m
-
-        #hl2_ = hl2(high, low)
-        matr = multiplier * atr(high, low, close, length)
-        moving_avg = self.ta_moving_average(close, length = self.ma_length)
-        upperband = moving_avg + matr
-        lowerband = moving_avg - matr
-
-        for i in range(1, m):
-            if close.iloc[i] > upperband.iloc[i - 1]:
-                dir_[i] = 1
-            elif close.iloc[i] < lowerband.iloc[i - 1]:
-                dir_[i] = -1
-            else:
-                dir_[i] = dir_[i - 1]
-                if dir_[i] > 0 and lowerband.iloc[i] < lowerband.iloc[i - 1]:
-                    lowerband.iloc[i] = lowerband.iloc[i - 1]
-                if dir_[i] < 0 and upperband.iloc[i] > upperband.iloc[i - 1]:
-                    upperband.iloc[i] = upperband.iloc[i - 1]
-
-            if dir_[i] > 0:
-                trend[i] = long[i] = lowerband.iloc[i]
-            else:
-                trend[i] = short[i] = upperband.iloc[i]
+        if bands is not None:
+            # Shared with the other indicators of the time series through the IndicatorGraph
+            upperband, lowerband = bands
+        else:
+            #hl2_ = hl2(high, low)
+            matr = multiplier * atr(high, low, close, length)
+            moving_avg = self.ta_moving_average(close, length = self.ma_length)
+            upperband = moving_avg + matr
+            lowerband = moving_avg - matr
+
+        # The band ratcheting loop runs over raw float64 arrays instead of the pandas Series
+        dir_, trend, long, short = supertrend_kernel(close.to_numpy(), upperband.to_numpy(), lowerband.to_numpy())
 
         # Prepare DataFrame to return
         _props = f"_{length}_{multiplier}"
@@ -0,0 +1,163 @@
+import numpy as np
+import pandas as pd
+
+'''
+Band ratcheting recurrence of the Supertrend, run over plain float64 arrays.
+
+Each bar depends on the direction and bands of the bar before it, so the loop can't be vectorized.
+It is compiled with numba when numba is installed, otherwise it runs over Python lists, which is
+still far faster than reading and writing pandas Series with .iloc on every bar.
+'''
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def _supertrend_loop(close, upperband, lowerband, dir_, trend, long, short):
+    """
+    Fills dir_, trend, long and short in place. upperband and lowerband are ratcheted in place.
+    Every comparison with a NaN band is False, the same as the pandas version.
+    """
+    for i in range(1, len(close)):
+        if close[i] > upperband[i - 1]:
+            dir_[i] = 1
+        elif close[i] < lowerband[i - 1]:
+            dir_[i] = -1
+        else:
+            dir_[i] = dir_[i - 1]
+            if dir_[i] > 0 and lowerband[i] < lowerband[i - 1]:
+                lowerband[i] = lowerband[i - 1]
+            if dir_[i] < 0 and upperband[i] > upperband[i - 1]:
+                upperband[i] = upperband[i - 1]
+
+        if dir_[i] > 0:
+            trend[i] = long[i] = lowerband[i]
+        else:
+            trend[i] = short[i] = upperband[i]
+
+
+def _supertrend_grid_loop(close, upperband, lowerband, dir_, trend, long, short):
+    """_supertrend_loop for a (bars x combinations) band matrix, one column per parameter combination."""
+    m, k = upperband.shape
+    for i in range(1, m):
+        for j in range(k):
+            if close[i] > upperband[i - 1, j]:
+                dir_[i, j] = 1
+            elif close[i] < lowerband[i - 1, j]:
+                dir_[i, j] = -1
+            else:
+                dir_[i, j] = dir_[i - 1, j]
+                if dir_[i, j] > 0 and lowerband[i, j] < lowerband[i - 1, j]:
+                    lowerband[i, j] = lowerband[i - 1, j]
+                if dir_[i, j] < 0 and upperband[i, j] > upperband[i - 1, j]:
+                    upperband[i, j] = upperband[i - 1, j]
+
+            if dir_[i, j] > 0:
+                trend[i, j] = long[i, j] = lowerband[i, j]
+            else:
+                trend[i, j] = short[i, j] = upperband[i, j]
+
+
+def _supertrend_grid_rows(close, upperband, lowerband, dir_, trend, long, short):
+    """Without numba the combinations of a bar are handled together with numpy, the loop only runs over bars."""
+    for i in range(1, len(close)):
+        up = close[i] > upperband[i - 1]
+        down = close[i] < lowerband[i - 1]
+        hold = ~(up | down)
+        dir_[i] = np.where(up, 1, np.where(down, -1, dir_[i - 1]))
+
+        ratchet_lower = hold & (dir_[i] > 0) & (lowerband[i] < lowerband[i - 1])
+        lowerband[i] = np.where(ratchet_lower, lowerband[i - 1], lowerband[i])
+        ratchet_upper = hold & (dir_[i] < 0) & (upperband[i] > upperband[i - 1])
+        upperband[i] = np.where(ratchet_upper, upperband[i - 1], upperband[i])
+
+        is_long = dir_[i] > 0
+        trend[i] = np.where(is_long, lowerband[i], upperband[i])
+        long[i] = np.where(is_long, lowerband[i], np.nan)
+        short[i] = np.where(is_long, np.nan, upperband[i])
+
+
+_compiled_loop = njit(cache=True)(_supertrend_loop) if njit is not None else None
+_compiled_grid_loop = njit(cache=True)(_supertrend_grid_loop) if njit is not None else None
+
+
+def supertrend_kernel(close, upperband, lowerband) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Run the Supertrend recurrence over the close and the raw upper/lower bands.
+
+    Returns:
+        tuple: (direction int64, trend float64, long float64, short float64) arrays
+    """
+    m = len(close)
+
+    if _compiled_loop is not None:
+        close = np.ascontiguousarray(close, dtype=np.float64)
+        upperband = np.array(upperband, dtype=np.float64)
+        lowerband = np.array(lowerband, dtype=np.float64)
+        dir_ = np.ones(m, dtype=np.int64)
+        trend = np.zeros(m, dtype=np.float64)
+        long = np.full(m, np.nan)
+        short = np.full(m, np.nan)
+        _compiled_loop(close, upperband, lowerband, dir_, trend, long, short)
+        return dir_, trend, long, short
+
+    # Indexing Python lists is much cheaper than indexing numpy arrays element by element
+    dir_, trend = [1] * m, [0.0] * m
+    long, short = [np.nan] * m, [np.nan] * m
+    _supertrend_loop(
+        np.asarray(close, dtype=np.float64).tolist(),
+        np.asarray(upperband, dtype=np.float64).tolist(),
+        np.asarray(lowerband, dtype=np.float64).tolist(),
+        dir_, trend, long, short,
+    )
+    return (
+        np.array(dir_, dtype=np.int64),
+        np.array(trend, dtype=np.float64),
+        np.array(long, dtype=np.float64),
+        np.array(short, dtype=np.float64),
+    )
+
+
+def supertrend_frame(close, upperband, lowerband, length, multiplier) -> pd.DataFrame:
+    """
+    The Supertrend DataFrame pandas_ta builds, from the close and the raw bands.
+    Columns SUPERT, SUPERTd, SUPERTl and SUPERTs suffixed with _{length}_{multiplier}.
+    """
+    dir_, trend, long, short = supertrend_kernel(close.to_numpy(), upperband.to_numpy(), lowerband.to_numpy())
+
+    _props = f"_{length}_{multiplier}"
+    df = pd.DataFrame({
+            f"SUPERT{_props}": trend,
+            f"SUPERTd{_props}": dir_,
+            f"SUPERTl{_props}": long,
+            f"SUPERTs{_props}": short,
+        }, index=close.index)
+
+    df.name = f"SUPERT{_props}"
+    df.category = "overlap"
+    return df
+
+
+def supertrend_grid_kernel(close, upperband, lowerband) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    supertrend_kernel for many parameter combinations at once.
+    upperband and lowerband are (bars x combinations), close is shared by every combination.
+
+    Returns:
+        tuple: (direction, trend, long, short) arrays of shape (bars x combinations)
+    """
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    upperband = np.array(upperband, dtype=np.float64, order="C")
+    lowerband = np.array(lowerband, dtype=np.float64, order="C")
+
+    shape = upperband.shape
+    dir_ = np.ones(shape, dtype=np.int64)
+    trend = np.zeros(shape, dtype=np.float64)
+    long = np.full(shape, np.nan)
+    short = np.full(shape, np.nan)
+
+    loop = _compiled_grid_loop if _compiled_grid_loop is not None else _supertrend_grid_rows
+    loop(close, upperband, lowerband, dir_, trend, long, short)
+    return dir_, trend, long, short
@@ -2,7 +2,7 @@ from datetime import datetime
 import inspect
 import json
 
-from core.exchange_state import ExchangeState
+from core.exchange_state import exchange_state_factory
 from core.position_tracking.trading_state import TradingState
 from customization.conditions.entry_trade_conditions import OnlyOneOpenBuyCondition, OnlyOneOpenPositionEntryCondition
 from core.trading import Trading
@@ -55,7 +55,10 @@ class Config:
         exit_strategy,
 
         # === Intake Fields ===
-        csv_input_file = None
+        csv_input_file = None,
+
+        # === Accounting ===
+        accounting: str = "decimal"
 
     ):
         # === Store Basic Configuration ===
@@ -93,6 +96,10 @@ class Config:
         # === Intake Fields ===
         self.csv_input_file = csv_input_file
 
+        # === Accounting ===
+        # "decimal" or "fixed" (prices as int millionths in the per minute hot path, same results)
+        self.accounting = accounting
+
         # === Time Series Assignment ===
         self.assign_time_series(self.indicators, self.time_series)
         self.assign_time_series(self.identify_entry, self.time_series)
@@ -103,7 +110,8 @@ class Config:
 
 
         # === State Initialization ===
-        self.exg_state = ExchangeState(
+        self.exg_state = exchange_state_factory(
+            self.accounting,
             self.USD_holdings,
             self.coin_holdings,
             self.maker_fee,
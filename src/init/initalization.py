@@ -6,12 +6,21 @@ from init.config import Config
 
 from core.modes.backtest import Backtest
 
-from input.csv_input import read_csv_file, parse_csv_data, get_buffered_start_time
-from utils.candle import Candle
+from input.csv_input import (
+    read_csv_file, parse_csv_data, get_buffered_start_time, TimestampIndex, time_range_to_unix,
+    file_signature, file_unchanged, file_appended, read_csv_tail
+)
+from input.candle_store import resolve_candle_store, load_candle_store, load_store_gaps
+from input.gap_index import GapIndex
+from input.candle_feed import CandleFeed
+from input.resample_cache import ResampleCache
+from input.candle_stream import CandleStream, DEFAULT_CHUNK_ROWS
+from utils.lru_cache import LRUCache
+from indicators.indicator_cache import indicator_cache
+from indicators.indicator_graph import populate_indicators
 
 from decorators.timeit import timeit
 
-from database.db_setup import init_db
 
 import logging
 from log.logger import LOGGER_NAME, setup_logger
@@ -44,89 +53,176 @@ def load_config(config_module_name: str) -> Config:
     except (ModuleNotFoundError, AttributeError) as e:
         raise ImportError(f"Could not load config from {config_module_name}: {e}")
 
-# def dict_to_candle(d: dict) -> Candle:
-#     """
-#     Convert a dictionary representing a candle to a Candle object.
-#     """
-#     return Candle(
-#         d["Datetime"], d["Timestamp"], d["Open"], d["High"], d["Low"], d["Close"], d["Volume"]
-#     )
+csv_cache = {
+    "file_name": None,
+    "df": None,
+    "index": None,
+    "signature": None, # file_signature of the CSV when it was read
+    "store_path": None,
+    "gaps": None, # GapIndex of the whole file, built on first use
+}
 
+FILTER_CACHE_MAX_BYTES = 1024 ** 3 # 1 GiB
+FILTER_CACHE_MAX_ENTRIES = 8
+RESAMPLED_CACHE_MAX_BYTES = 512 * 1024 ** 2 # 512 MiB
 
-def dict_to_candle(d: dict) -> Candle:
+# Cache for filtered CSV results, keyed by (csv_file, start_time, end_time)
+_filter_cache = LRUCache("filtered ranges", FILTER_CACHE_MAX_BYTES, FILTER_CACHE_MAX_ENTRIES)
+
+# Resampled time series and parsed CSV ranges. Kept in memory and persisted between runs
+_resampled_cache = LRUCache("resampled series", RESAMPLED_CACHE_MAX_BYTES)
+disk_cache = ResampleCache(memory_cache=_resampled_cache)
+
+def load_csv_file(csv_file: str) -> pd.DataFrame:
     """
-    Convert a dictionary representing a candle to a Candle object.
+    Read candle data from disk.
+    Opens the columnar candle store for the file if one is up to date, otherwise parses the CSV.
+    Caches the DataFrame if the file name matches. When rows were appended to the file since it was
+    cached, only the new rows are read and added to the cached data.
     """
-    return Candle(
-        d["Datetime"],
-        int(d["Timestamp"]),      # 👈 CRITICAL FIX
-        float(d["Open"]),
-        float(d["High"]),
-        float(d["Low"]),
-        float(d["Close"]),
-        float(d["Volume"]),
-    )
+    if csv_cache.get("file_name") == csv_file and csv_cache.get("df") is not None:
+        if _cached_csv_is_current(csv_file):
+            logger.info(f"📄 Reusing cached CSV: {csv_file}")
+            return csv_cache["df"]
+
+        df = _extend_cached_csv(csv_file)
+        if df is not None:
+            return df
+        logger.info(f"📄 {csv_file} was rewritten, reading it again")
+
+    # Ranges filtered from a previously loaded file no longer apply
+    if csv_cache.get("file_name") is not None:
+        invalidate_cached_data(csv_cache["file_name"])
+
+    signature = file_signature(csv_file) if os.path.isfile(csv_file) else None
+    store_path = resolve_candle_store(csv_file)
+    if store_path:
+        df = load_candle_store(store_path)
+    else:
+        logger.info(f"📄 Reading CSV from disk: {csv_file}")
+        df = read_csv_file(csv_file)  # your original I/O function
+    _set_cached_csv(csv_file, df, signature, store_path)
+    return df
 
+def _set_cached_csv(csv_file: str, df: pd.DataFrame, signature: dict, store_path: str) -> None:
+    csv_cache.update({
+        "file_name": csv_file,
+        "df": df,
+        "index": TimestampIndex(df),
+        "signature": signature,
+        "store_path": store_path,
+        "gaps": None,
+    })
 
+def _cached_csv_is_current(csv_file: str) -> bool:
+    signature = csv_cache.get("signature")
+    return signature is None or not os.path.isfile(csv_file) or file_unchanged(csv_file, signature)
 
-csv_cache = {
-    "file_name": None,
-    "df": None,
-}
+def _extend_cached_csv(csv_file: str) -> pd.DataFrame | None:
+    """
+    Add the rows appended to csv_file since it was cached.
+    Returns None if the file changed in some other way and has to be read in full.
+    """
+    signature = csv_cache["signature"]
+    store_path = csv_cache["store_path"]
+    timestamps = csv_cache["index"].timestamps
+    last_timestamp = int(timestamps[-1]) if len(timestamps) else None
+
+    if not file_appended(csv_file, signature):
+        return None
+
+    new_signature = file_signature(csv_file)
+    if store_path:
+        # resolve_candle_store appends the new rows to the store, the refreshed columns are mapped again
+        if resolve_candle_store(csv_file) != store_path:
+            return None
+        df = load_candle_store(store_path)
+    else:
+        try:
+            tail = read_csv_tail(csv_file, signature["size"], last_timestamp)
+        except ValueError as e:
+            logger.warning(f"Cannot extend cached CSV {csv_file}: {e}")
+            return None
+        df = pd.concat([csv_cache["df"], tail], ignore_index=True)
+
+    # Only ranges reaching past the old end of the data can include the new rows
+    removed = _filter_cache.invalidate(
+        lambda key: key[0] == csv_file and (
+            last_timestamp is None or time_range_to_unix(key[1], key[2])[1] >= last_timestamp
+        )
+    )
+    _set_cached_csv(csv_file, df, new_signature, store_path)
 
-# Cache for filtered CSV results
-_filter_cache = {
-    "csv_file": None,
-    "start_time": None,
-    "end_time": None,
-    "df_filtered": None,
-    "row_dicts": None,
-}
+    logger.info(f"📄 Extended cached CSV {csv_file} to {len(df)} rows | Invalidated {removed} filtered ranges")
+    return df
 
-def load_csv_file(csv_file: str) -> pd.DataFrame:
+def get_gap_index(csv_file: str) -> GapIndex:
     """
-    Pure CSV reading from disk.
-    Caches the DataFrame if the file name matches.
+    Gap table of a candle file. Candle stores keep theirs on disk, for a CSV it is built once
+    from the cached Timestamp column.
     """
+    load_csv_file(csv_file)
+    if csv_cache["gaps"] is None:
+        store_path = csv_cache["store_path"]
+        if store_path:
+            csv_cache["gaps"] = load_store_gaps(store_path)
+        else:
+            csv_cache["gaps"] = GapIndex.from_timestamps(csv_cache["index"].timestamps)
+    return csv_cache["gaps"]
+
+def _feed_gaps(csv_file: str, feed: CandleFeed) -> GapIndex:
     if csv_cache.get("file_name") == csv_file and csv_cache.get("df") is not None:
-        logger.critical(f"📄 Reusing cached CSV: {csv_file}")
-        return csv_cache["df"]
+        return get_gap_index(csv_file).between(feed.first_timestamp, feed.last_timestamp)
+    return GapIndex.from_timestamps(feed.timestamps)
 
-    logger.info(f"📄 Reading CSV from disk: {csv_file}")
-    df = read_csv_file(csv_file)  # your original I/O function
-    csv_cache["file_name"] = csv_file
-    csv_cache["df"] = df
-    return df
+def get_timestamp_index(df: pd.DataFrame) -> TimestampIndex:
+    """
+    Return the sorted timestamp index of df, reusing the one built when the CSV was loaded.
+    """
+    index = csv_cache.get("index")
+    if index is not None and index.df is df:
+        return index
+    return TimestampIndex(df)
 
-def filter_csv_by_time(df: pd.DataFrame, start_time: str, end_time: str, csv_file: str) -> tuple[pd.DataFrame, list[dict]]:
+def filter_csv_by_time(df: pd.DataFrame, start_time: str, end_time: str, csv_file: str) -> tuple[pd.DataFrame, CandleFeed]:
     """
-    Filters the given DataFrame by start and end time and converts it to a list of dicts.
-    Uses a cache keyed by CSV file name and time range.
+    Filters the given DataFrame by start and end time and wraps the rows in a CandleFeed.
+    Uses an LRU cache keyed by CSV file name and time range.
     Since the start time is based on the buffered start time, changes in the candle size will result 
     in a new start_time.
     """
-    # Check if cached result exists
-    if (
-        _filter_cache.get("csv_file") == csv_file and
-        _filter_cache.get("start_time") == start_time and
-        _filter_cache.get("end_time") == end_time
-    ):
-        logger.critical(f"📄 Reusing cached filtered CSV for {csv_file}")
-        return _filter_cache["df_filtered"], _filter_cache["row_dicts"]
-
-    # Filter using parse_csv_data
-    df_filtered, row_dicts = parse_csv_data(df, start_time, end_time)
-
-    # Update cache
-    _filter_cache.update({
-        "csv_file": csv_file,
-        "start_time": start_time,
-        "end_time": end_time,
-        "df_filtered": df_filtered,
-        "row_dicts": row_dicts,
-    })
+    key = (csv_file, start_time, end_time)
+    cached = _filter_cache.get(key)
+    if cached is not None:
+        logger.info(f"📄 Reusing cached filtered CSV for {csv_file} | {_filter_cache.stats()}")
+        return cached
 
-    return df_filtered, row_dicts
+    # Filter using parse_csv_data. The binary search index makes a new window cheap
+    df_filtered, feed = parse_csv_data(df, start_time, end_time, get_timestamp_index(df))
+
+    _filter_cache.put(key, (df_filtered, feed))
+
+    return df_filtered, feed
+
+
+def invalidate_cached_data(csv_file: str = None) -> dict:
+    """
+    Drop the in-memory data cached for csv_file, or for every file if csv_file is None.
+    Call this after the file changed on disk. Persisted entries are keyed by content and go stale on their own.
+    """
+    if csv_file is None or csv_cache.get("file_name") == csv_file:
+        csv_cache.update({"file_name": None, "df": None, "index": None, "signature": None, "store_path": None, "gaps": None})
+
+    removed = {
+        "filtered": _filter_cache.invalidate(lambda key: csv_file is None or key[0] == csv_file),
+        "resampled": _resampled_cache.invalidate() if csv_file is None else 0,
+        "indicators": indicator_cache.invalidate() if csv_file is None else 0,
+    }
+    logger.info(f"Invalidated cached data for {csv_file or 'all files'}: {removed}")
+    return removed
+
+def cache_stats() -> list[dict]:
+    return [_filter_cache.stats(), _resampled_cache.stats(), indicator_cache.stats()]
 
 
 @timeit
@@ -135,50 +231,99 @@ def load_csv(config: Config):
     Load CSV for backtesting:
     1. Use cached CSV if available
     2. Determine buffered start time
-    3. Parse/filter CSV
+    3. Parse/filter CSV, or reuse the rows parsed for the same file and range by an earlier run
+
+    The DataFrame is None when the rows come from the disk cache, the backtest only needs the feed.
     """
     if config.mode != "BACKTEST":
         return None, None
 
-    df_csv = load_csv_file(config.csv_input_file)
+    csv_file = config.csv_input_file
     buffered_start_time = get_buffered_start_time(config.start_time, config.time_series)
     logger.info(f"Buffered start time: {buffered_start_time}")
 
-    df, list_of_dict = filter_csv_by_time(df_csv, buffered_start_time, config.end_time, config.csv_input_file)
-    return df, list_of_dict
+    # Candle stores are memory mapped, so only parsed CSVs are worth keeping on disk a second time
+    store_path = resolve_candle_store(csv_file)
+    fingerprint = disk_cache.fingerprint(store_path or csv_file)
+    in_memory = csv_cache.get("file_name") == csv_file and csv_cache.get("df") is not None
 
-@timeit
-def init_backtest_time_series(config: Config, list_of_dict: list):
+    df = None
+    feed = None
+    if not store_path and not in_memory:
+        feed = disk_cache.load_feed(fingerprint, buffered_start_time, config.end_time)
+
+    if feed is None:
+        df_csv = load_csv_file(csv_file)
+        df, feed = filter_csv_by_time(df_csv, buffered_start_time, config.end_time, csv_file)
+        feed.fingerprint = fingerprint
+
+        if not store_path:
+            disk_cache.save_feed(fingerprint, buffered_start_time, config.end_time, feed)
+
+    # One summary of the missing minutes instead of an error per gap
+    feed.gaps = _feed_gaps(csv_file, feed)
+    feed.gaps.log_summary(f"Candle data {buffered_start_time} <-> {config.end_time}", rows=len(feed))
+    return df, feed
+
+def load_csv_stream(config: Config, chunk_rows: int = DEFAULT_CHUNK_ROWS):
     """
-    Feed historical candle data into each time series for backtesting initialization.
+    Streaming counterpart of load_csv for datasets larger than memory.
+    Nothing is read or cached here, every pass over the returned CandleStream reads the file again in chunks.
     """
-    for candle_dict in list_of_dict:
-        candle = dict_to_candle(candle_dict)
-        for time_series in config.time_series:
-            time_series.update_series(candle)
+    if config.mode != "BACKTEST":
+        return None
 
-    # After filling the time_series, create/fill the dataframe
+    buffered_start_time = get_buffered_start_time(config.start_time, config.time_series)
+    logger.info(f"Buffered start time: {buffered_start_time}")
+
+    return CandleStream(config.csv_input_file, buffered_start_time, config.end_time, chunk_rows)
+
+@timeit
+def init_backtest_time_series(config: Config, feed: CandleFeed):
+    """
+    Backfill each time series with the historical 1 minute candles for backtesting initialization.
+    Every timeframe is resampled from the same feed arrays in one vectorized pass.
+    """
     for time_series in config.time_series:
-        time_series.create_dataframe()
+        time_series.resample(feed, disk_cache)
         logger.info(time_series.df)
 
     
 @timeit
-def backtest_init(config: Config):
+def init_backtest_time_series_stream(config: Config, stream: CandleStream):
+    """
+    Backfill each time series from a CandleStream. Takes one pass over the stream per time series.
+    """
+    for time_series in config.time_series:
+        time_series.resample_stream(stream)
+        logger.info(time_series.df)
+
+@timeit
+def backtest_init(config: Config, stream: bool = False, chunk_rows: int = DEFAULT_CHUNK_ROWS, fast_forward: bool = True, intrabar_path: str = None, vectorized: bool = True):
     """
     Initialize backtest: load CSV data, backfill time series, and populate indicators.
+    With stream=True the 1 minute candles are never held in memory at once. They are read in
+    chunks of chunk_rows for resampling and again for the backtest loop.
+    With fast_forward=False the backtest visits every 1 minute row instead of jumping between events.
+    intrabar_path ("OLHC", "OHLC" or "closest") resolves the fills of a row along that price path,
+    see core.modes.intrabar_path. By default each row is checked at its open, low and high.
+    Configs that core.modes.vectorized supports run from arrays with the same results, vectorized=False
+    always runs the event engine.
     """
-    df, list_of_dict = load_csv(config)
+    if stream:
+        feed = load_csv_stream(config, chunk_rows)
+        init_backtest_time_series_stream(config, feed)
+    else:
+        df, feed = load_csv(config)
 
-    # Backfill the time_series with historical candle data
-    init_backtest_time_series(config, list_of_dict)
+        # Backfill the time_series with historical candle data
+        init_backtest_time_series(config, feed)
 
     # Populate indicators with the initialized time series data
-    for indicator in config.indicators:
-        indicator.populate()
+    populate_indicators(config.indicators)
 
-    backtest = Backtest(config)
-    backtest.execute(df)
+    backtest = Backtest(config, fast_forward, intrabar_path, vectorized)
+    backtest.execute(feed)
 
 @timeit
 def flask_init():
@@ -211,12 +356,11 @@ def init_test(file_name):
         create_directories()
         backtest_init(config)
 
-def init_test2(config_module_name: str):
+def init_test2(config_module_name: str, stream: bool = False, chunk_rows: int = DEFAULT_CHUNK_ROWS, fast_forward: bool = True, intrabar_path: str = None, vectorized: bool = True):
 
     setup_logger(config_module_name, mode="off")
 
-    init_db()
-    
+    # A backtest from the command line does not use the database (SQLAlchemy), the Flask app creates it on startup
     create_directories()
     config = load_config(config_module_name)
 
@@ -226,7 +370,7 @@ def init_test2(config_module_name: str):
     config_from_json = create_config_from_json(json_config)
 
     create_directories()
-    backtest_init(config_from_json)
+    backtest_init(config_from_json, stream, chunk_rows, fast_forward, intrabar_path, vectorized)
 
 
 def init(config_module_name: str):
@@ -235,6 +379,7 @@ def init(config_module_name: str):
     """
     setup_logger(config_module_name, mode="off")
 
+    from database.db_setup import init_db
     init_db()
     
     create_directories()
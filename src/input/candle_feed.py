@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+from utils.candle import Candle
+from utils.time_conversion import timestamp_to_datetime
+
+'''
+Array-backed stream of 1 minute candles.
+
+The backtest used to turn the filtered DataFrame into one dict per row and then one Candle per dict,
+only to read each of them once. A CandleFeed keeps the rows as contiguous column arrays instead.
+Columns taken from a DataFrame or candle store slice are views, so building a feed copies nothing
+unless the prices have to be widened to float64.
+'''
+
+FEED_COLUMNS = ["Timestamp", "Open", "High", "Low", "Close", "Volume"]
+
+
+class CandleFeed:
+    def __init__(self, timestamps, opens, highs, lows, closes, volumes):
+        self.timestamps = np.asarray(timestamps, dtype=np.int64)
+        self.opens = np.asarray(opens, dtype=np.float64)
+        self.highs = np.asarray(highs, dtype=np.float64)
+        self.lows = np.asarray(lows, dtype=np.float64)
+        self.closes = np.asarray(closes, dtype=np.float64)
+        self.volumes = np.asarray(volumes, dtype=np.float64)
+
+        # Fingerprint of the dataset the rows came from. Set by the loader, used as a disk cache key
+        self.fingerprint = None
+        # GapIndex of the rows. Set by the loader
+        self.gaps = None
+
+        lengths = {len(column) for column in self.columns()}
+        if len(lengths) > 1:
+            raise ValueError(f"Candle feed columns have different lengths: {sorted(lengths)}")
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> 'CandleFeed':
+        """Build a feed from the OHLCV columns of a candle DataFrame (CSV or candle store)."""
+        return cls(*(df[column].to_numpy() for column in FEED_COLUMNS))
+
+    def columns(self) -> tuple:
+        """Timestamp, Open, High, Low, Close and Volume arrays, in that order."""
+        return self.timestamps, self.opens, self.highs, self.lows, self.closes, self.volumes
+
+    def candle(self, i: int) -> Candle:
+        """Build the Candle for a single row. Only use this where a Candle object is really needed."""
+        timestamp = int(self.timestamps[i])
+        return Candle(
+            timestamp_to_datetime(timestamp), timestamp, float(self.opens[i]), float(self.highs[i]),
+            float(self.lows[i]), float(self.closes[i]), float(self.volumes[i])
+        )
+
+    def slice(self, start: int, end: int) -> 'CandleFeed':
+        """Rows [start, end) as a new feed sharing this feed's arrays."""
+        feed = CandleFeed(*(column[start:end] for column in self.columns()))
+        feed.fingerprint = self.fingerprint
+        return feed
+
+    @property
+    def empty(self) -> bool:
+        return len(self.timestamps) == 0
+
+    @property
+    def first_timestamp(self):
+        return int(self.timestamps[0]) if len(self.timestamps) else None
+
+    @property
+    def last_timestamp(self):
+        return int(self.timestamps[-1]) if len(self.timestamps) else None
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.candle(i)
+
+    def __repr__(self) -> str:
+        if self.empty:
+            return "CandleFeed(rows=0)"
+        return (
+            f"CandleFeed(rows={len(self)}, "
+            f"{timestamp_to_datetime(self.first_timestamp)} <-> {timestamp_to_datetime(self.last_timestamp)})"
+        )
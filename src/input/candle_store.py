@@ -0,0 +1,297 @@
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from decorators.timeit import timeit
+from input.csv_input import file_signature, file_appended, read_csv_tail
+from input.gap_index import GapIndex, scan_gaps, GAP_COLUMNS
+
+import logging
+from log.logger import LOGGER_NAME
+logger = logging.getLogger(LOGGER_NAME)
+
+'''
+Columnar on-disk candle store.
+
+A store is a directory next to the CSV (processed_btc_full.csv -> processed_btc_full.candles) holding
+one raw binary file per column plus a meta.json and the gap table of the data (gaps.npz). Columns are
+written contiguously so they can be memory mapped, which makes opening a multi-year 1 minute file
+close to instant.
+'''
+
+STORE_EXTENSION = ".candles"
+STORE_VERSION = 1
+META_FILE_NAME = "meta.json"
+
+STORE_COLUMNS = ["Timestamp", "Open", "High", "Low", "Close", "Volume"]
+PRICE_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+CSV_READ_CHUNK_ROWS = 1_000_000
+
+
+def store_path_for(csv_file: str) -> str:
+    """Return the default store directory for a CSV file."""
+    return os.path.splitext(csv_file)[0] + STORE_EXTENSION
+
+
+def is_candle_store(path: str) -> bool:
+    return os.path.isfile(os.path.join(path, META_FILE_NAME))
+
+
+def read_store_meta(store_path: str) -> dict:
+    with open(os.path.join(store_path, META_FILE_NAME), "r") as f:
+        meta = json.load(f)
+
+    if meta.get("version") != STORE_VERSION:
+        raise ValueError(f"Unsupported candle store version {meta.get('version')} in {store_path}")
+    return meta
+
+
+def _write_store_meta(store_path: str, meta: dict) -> None:
+    '''Write to a temp file first so a crash never leaves a half written meta.json behind'''
+    meta_path = os.path.join(store_path, META_FILE_NAME)
+    tmp_path = meta_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(meta, f, indent=4)
+    os.replace(tmp_path, meta_path)
+
+
+def _column_path(store_path: str, column: str) -> str:
+    return os.path.join(store_path, f"{column}.bin")
+
+
+def _source_signature(csv_file: str) -> dict:
+    return {"file": os.path.abspath(csv_file), **file_signature(csv_file)}
+
+
+def store_is_current(csv_file: str, store_path: str) -> bool:
+    """
+    A store is current when it was converted from the CSV as it is on disk now.
+    If the CSV is gone the store is the only copy of the data, so it is used as is.
+    """
+    if not is_candle_store(store_path):
+        return False
+    if not os.path.exists(csv_file):
+        return True
+
+    source = read_store_meta(store_path).get("source") or {}
+    stat = os.stat(csv_file)
+    return source.get("size") == stat.st_size and source.get("mtime_ns") == stat.st_mtime_ns
+
+
+def resolve_candle_store(csv_file: str) -> str | None:
+    """
+    Return the store to open for csv_file, or None if the CSV has to be parsed.
+    csv_file may point at a store directly or at a CSV with an up to date store beside it.
+    """
+    if is_candle_store(csv_file):
+        return csv_file
+
+    store_path = store_path_for(csv_file)
+    if store_is_current(csv_file, store_path):
+        return store_path
+
+    # The daily data job only appends, so most stale stores just need the new rows
+    if is_candle_store(store_path) and append_csv_tail_to_store(csv_file, store_path):
+        return store_path
+
+    if is_candle_store(store_path):
+        logger.warning(f"Candle store {store_path} is out of date with {csv_file}. Re-run the converter to use it.")
+    return None
+
+
+def _validate_timestamps(timestamps: np.ndarray, previous_timestamp) -> None:
+    if len(timestamps) == 0:
+        return
+    if previous_timestamp is not None and timestamps[0] <= previous_timestamp:
+        raise ValueError(f"Timestamps must be strictly increasing. {timestamps[0]} follows {previous_timestamp}")
+    if np.any(np.diff(timestamps) <= 0):
+        raise ValueError("Timestamps must be strictly increasing. Sort and de-duplicate the CSV first.")
+
+
+def _frame_to_columns(df: pd.DataFrame, price_dtype: str) -> dict:
+    columns = {"Timestamp": df["Timestamp"].to_numpy().astype(np.int64)}
+    for column in PRICE_COLUMNS:
+        columns[column] = df[column].to_numpy(dtype=price_dtype)
+    return columns
+
+
+@timeit
+def convert_csv_to_store(csv_file: str, store_path: str = None, price_dtype: str = "float64") -> str:
+    """
+    Convert a candle CSV (Datetime, Timestamp, Open, High, Low, Close, Volume) into a columnar store.
+
+    The CSV is read in pieces so files larger than memory can be converted. Timestamps are stored as
+    int64 seconds. price_dtype may be "float32" to halve the store size at the cost of precision.
+    The Datetime column is not stored; it is derived from Timestamp when needed.
+
+    Returns:
+        str: Path of the written store
+    """
+    if price_dtype not in ("float64", "float32"):
+        raise ValueError(f"Invalid price_dtype '{price_dtype}'. Must be float64 or float32")
+
+    store_path = store_path or store_path_for(csv_file)
+    os.makedirs(store_path, exist_ok=True)
+    logger.info(f"Converting {csv_file} -> {store_path} ({price_dtype})")
+
+    files = {column: open(_column_path(store_path, column), "wb") for column in STORE_COLUMNS}
+    rows = 0
+    gap_chunks = []
+    first_timestamp = None
+    last_timestamp = None
+
+    try:
+        reader = pd.read_csv(csv_file, usecols=STORE_COLUMNS, chunksize=CSV_READ_CHUNK_ROWS)
+        for df in reader:
+            columns = _frame_to_columns(df, price_dtype)
+            timestamps = columns["Timestamp"]
+
+            _validate_timestamps(timestamps, last_timestamp)
+            if len(timestamps) == 0:
+                continue
+
+            gap_chunks.append(scan_gaps(timestamps, previous_timestamp=last_timestamp))
+            for column, values in columns.items():
+                values.tofile(files[column])
+
+            if first_timestamp is None:
+                first_timestamp = int(timestamps[0])
+            last_timestamp = int(timestamps[-1])
+            rows += len(timestamps)
+    finally:
+        for f in files.values():
+            f.close()
+
+    meta = {
+        "version": STORE_VERSION,
+        "rows": rows,
+        "dtypes": {"Timestamp": "int64", **{column: price_dtype for column in PRICE_COLUMNS}},
+        "first_timestamp": first_timestamp,
+        "last_timestamp": last_timestamp,
+        "source": _source_signature(csv_file),
+    }
+    gaps = GapIndex(*(np.concatenate([gap[column] for gap in gap_chunks] or [np.empty(0)]) for column in GAP_COLUMNS))
+    gaps.save(store_path)
+    _write_store_meta(store_path, meta)
+
+    logger.info(f"Candle store written: {store_path} | Rows: {rows}")
+    return store_path
+
+
+def _append_column(store_path: str, column: str, values: np.ndarray, rows: int) -> None:
+    """Append values to a column file holding rows values. Bytes left past rows by an interrupted append are dropped first."""
+    path = _column_path(store_path, column)
+    expected_size = rows * values.dtype.itemsize
+
+    with open(path, "r+b") as f:
+        if os.path.getsize(path) > expected_size:
+            f.truncate(expected_size)
+        f.seek(expected_size)
+        values.tofile(f)
+
+
+@timeit
+def append_csv_tail_to_store(csv_file: str, store_path: str) -> bool:
+    """
+    Bring a store up to date with a CSV that only had rows appended since it was converted.
+    Only the new bytes of the CSV are parsed and the rows are appended to the column files.
+
+    Returns:
+        bool: False if the CSV changed in any other way and has to be converted again
+    """
+    meta = read_store_meta(store_path)
+    source = meta.get("source") or {}
+    if not file_appended(csv_file, source):
+        return False
+
+    try:
+        df = read_csv_tail(csv_file, source["size"], meta["last_timestamp"])
+    except ValueError as e:
+        logger.warning(f"Cannot append to candle store {store_path}: {e}")
+        return False
+
+    price_dtype = meta["dtypes"]["Open"]
+    columns = _frame_to_columns(df, price_dtype)
+    timestamps = columns["Timestamp"]
+
+    if len(timestamps):
+        gaps = load_store_gaps(store_path, meta)
+        for column, values in columns.items():
+            _append_column(store_path, column, values, meta["rows"])
+        gaps.extend(timestamps, meta["last_timestamp"]).save(store_path)
+
+        meta["rows"] += len(timestamps)
+        if meta["first_timestamp"] is None:
+            meta["first_timestamp"] = int(timestamps[0])
+        meta["last_timestamp"] = int(timestamps[-1])
+
+    # meta.json is written last, a crash before this leaves the old row count in charge of the files
+    meta["source"] = _source_signature(csv_file)
+    _write_store_meta(store_path, meta)
+
+    logger.info(f"Appended {len(timestamps)} rows to candle store {store_path} | Rows: {meta['rows']}")
+    return True
+
+
+def load_store_gaps(store_path: str, meta: dict = None) -> GapIndex:
+    """Gap table of the store. Stores written before gaps.npz existed get it built from the Timestamp column."""
+    meta = meta or read_store_meta(store_path)
+    gaps = GapIndex.load(store_path)
+    if gaps is None:
+        timestamps = open_store_columns(store_path, meta)["Timestamp"]
+        gaps = GapIndex.from_timestamps(timestamps)
+        gaps.save(store_path)
+
+    # Ignore gaps saved by an append that was interrupted before meta.json was updated
+    if meta["last_timestamp"] is not None:
+        gaps = gaps.between(meta["first_timestamp"], meta["last_timestamp"])
+    return gaps
+
+
+def open_store_columns(store_path: str, meta: dict = None) -> dict:
+    """Memory map every column of the store read-only. Nothing is read until the arrays are accessed."""
+    meta = meta or read_store_meta(store_path)
+    rows = meta["rows"]
+
+    columns = {}
+    for column in STORE_COLUMNS:
+        dtype = np.dtype(meta["dtypes"][column])
+        if rows == 0:
+            columns[column] = np.empty(0, dtype=dtype)
+        else:
+            columns[column] = np.memmap(_column_path(store_path, column), dtype=dtype, mode="r", shape=(rows,))
+    return columns
+
+
+@timeit
+def load_candle_store(store_path: str) -> pd.DataFrame:
+    """
+    Open a candle store as a DataFrame backed by the memory mapped columns.
+    Pages are only read from disk when the rows are used, so loading is close to instant.
+    """
+    meta = read_store_meta(store_path)
+    columns = open_store_columns(store_path, meta)
+
+    logger.info(
+        f"📦 Opened candle store: {store_path} | Rows: {meta['rows']} | "
+        f"Range: {meta['first_timestamp']} <-> {meta['last_timestamp']}"
+    )
+    return pd.DataFrame(columns, copy=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a candle CSV into a columnar candle store.")
+    parser.add_argument("csv_file", type=str, help="Path of the candle CSV to convert")
+    parser.add_argument("--out", type=str, default=None, help="Store directory. Defaults to <csv name>.candles")
+    parser.add_argument("--float32", action="store_true", help="Store OHLCV as float32 instead of float64")
+    args = parser.parse_args()
+
+    convert_csv_to_store(args.csv_file, args.out, price_dtype="float32" if args.float32 else "float64")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+from input.candle_feed import CandleFeed, FEED_COLUMNS
+from input.candle_store import resolve_candle_store, read_store_meta, open_store_columns
+from input.csv_input import time_range_to_unix
+from utils.time_conversion import timestamp_to_datetime
+
+import logging
+from log.logger import LOGGER_NAME
+logger = logging.getLogger(LOGGER_NAME)
+
+'''
+Chunked reading of 1 minute candles for backtests over datasets larger than memory.
+
+A CandleStream yields the candles of a time range as CandleFeed chunks of at most chunk_rows rows.
+Iterating it again starts a new pass over the data, so the resampler and the backtest loop can
+each take a pass while only one chunk is held at a time. Candle stores are read through their
+memory mapped columns, CSV files are read with pandas in pieces.
+'''
+
+DEFAULT_CHUNK_ROWS = 250_000
+
+
+class CandleStream:
+    def __init__(self, csv_file: str, start_time: str, end_time: str, chunk_rows: int = DEFAULT_CHUNK_ROWS):
+        if chunk_rows <= 0:
+            raise ValueError(f"chunk_rows must be positive, got {chunk_rows}")
+
+        self.csv_file = csv_file
+        self.start_time = start_time
+        self.end_time = end_time
+        self.chunk_rows = chunk_rows
+        self.start_unix, self.end_unix = time_range_to_unix(start_time, end_time)
+        self.store_path = resolve_candle_store(csv_file)
+
+    def __iter__(self):
+        chunks = self._store_chunks() if self.store_path else self._csv_chunks()
+
+        rows = 0
+        last_timestamp = None
+        for feed in chunks:
+            if feed.empty:
+                continue
+            if last_timestamp is not None and feed.timestamps[0] <= last_timestamp:
+                raise ValueError(f"Timestamps must be sorted in ascending order. {feed.timestamps[0]} follows {last_timestamp}")
+            last_timestamp = feed.timestamps[-1]
+            rows += len(feed)
+            yield feed
+
+        if rows == 0:
+            logger.error(f"No data found in the specified time range: {self.start_time} <-> {self.end_time}")
+            raise ValueError(f"No data found in the specified time range: {self.start_time} <-> {self.end_time}")
+
+        logger.info(f"Streamed {rows} rows up to {timestamp_to_datetime(last_timestamp)} in chunks of {self.chunk_rows}")
+
+    def _store_chunks(self):
+        meta = read_store_meta(self.store_path)
+        columns = open_store_columns(self.store_path, meta)
+
+        # Binary search on the mapped Timestamp column only touches a few pages
+        start = int(np.searchsorted(columns["Timestamp"], self.start_unix, side="left"))
+        end = int(np.searchsorted(columns["Timestamp"], self.end_unix, side="right"))
+
+        for chunk_start in range(start, end, self.chunk_rows):
+            chunk_end = min(chunk_start + self.chunk_rows, end)
+            yield CandleFeed(*(np.array(columns[column][chunk_start:chunk_end]) for column in FEED_COLUMNS))
+
+    def _csv_chunks(self):
+        reader = pd.read_csv(self.csv_file, usecols=FEED_COLUMNS, chunksize=self.chunk_rows)
+        for df in reader:
+            timestamps = df["Timestamp"].to_numpy()
+            if len(timestamps) == 0 or timestamps[-1] < self.start_unix:
+                continue
+            if timestamps[0] > self.end_unix:
+                break
+
+            df = df[(timestamps >= self.start_unix) & (timestamps <= self.end_unix)]
+            yield CandleFeed.from_dataframe(df)
+
+    def __repr__(self) -> str:
+        return f"CandleStream({self.csv_file}, {self.start_time} <-> {self.end_time}, chunk_rows={self.chunk_rows})"
@@ -1,9 +1,14 @@
+import hashlib
+import os
+
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 
 from decorators.timeit import timeit
 
-from utils.time_conversion import START_END_TIME_FORMAT
+from utils.time_conversion import START_END_TIME_FORMAT, timestamp_to_datetime
+from input.candle_feed import CandleFeed
 
 import logging
 from log.logger import LOGGER_NAME
@@ -20,29 +25,123 @@ def read_csv_file(csv_file: str) -> pd.DataFrame:
         logger.error(f"Failed to read CSV: {e}")
         raise
 
+# Bytes at the end of a file hashed to recognise it again once more rows were appended
+TAIL_CHECK_BYTES = 64 * 1024
+
+
+def _hash_file_range(f, start: int, end: int) -> str:
+    f.seek(start)
+    return hashlib.sha256(f.read(end - start)).hexdigest()
+
+
+def file_signature(csv_file: str) -> dict:
+    """
+    Size, mtime and a hash of the last bytes of a file.
+    Compared against the file later on to tell an append apart from a rewrite.
+    """
+    stat = os.stat(csv_file)
+    with open(csv_file, "rb") as f:
+        tail_sha256 = _hash_file_range(f, max(0, stat.st_size - TAIL_CHECK_BYTES), stat.st_size)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "tail_sha256": tail_sha256}
+
+
+def file_unchanged(csv_file: str, signature: dict) -> bool:
+    stat = os.stat(csv_file)
+    return stat.st_size == signature["size"] and stat.st_mtime_ns == signature["mtime_ns"]
+
+
+def file_appended(csv_file: str, signature: dict) -> bool:
+    """
+    True if csv_file only grew since signature was taken: it is larger, the bytes that used to end
+    the file are unchanged and they ended on a complete line.
+    """
+    size = signature.get("size")
+    if not signature.get("tail_sha256") or not size or os.path.getsize(csv_file) <= size:
+        return False
+
+    with open(csv_file, "rb") as f:
+        if _hash_file_range(f, max(0, size - TAIL_CHECK_BYTES), size) != signature["tail_sha256"]:
+            return False
+        f.seek(size - 1)
+        return f.read(1) == b"\n"
+
+
 @timeit
-def parse_csv_data(df: pd.DataFrame, start_time: str, end_time: str) -> tuple[pd.DataFrame, list[dict]]:
+def read_csv_tail(csv_file: str, offset: int, last_timestamp=None) -> pd.DataFrame:
+    """
+    Parse the rows appended to csv_file after byte offset. Column names come from the header line.
+    Raises ValueError if the new rows do not continue after last_timestamp.
+    """
+    columns = pd.read_csv(csv_file, nrows=0).columns
+    with open(csv_file, "rb") as f:
+        f.seek(offset)
+        df = pd.read_csv(f, header=None, names=columns)
+
+    timestamps = df["Timestamp"].to_numpy()
+    if len(timestamps) and last_timestamp is not None and timestamps[0] <= last_timestamp:
+        raise ValueError(f"Appended rows start at {timestamps[0]}, not after the last timestamp {last_timestamp}")
+    if len(timestamps) > 1 and np.any(timestamps[1:] <= timestamps[:-1]):
+        raise ValueError("Appended rows must be sorted by Timestamp")
+
+    logger.info(f"📄 Read {len(df)} appended rows from {csv_file}")
+    return df
+
+
+class TimestampIndex:
+    """
+    Sorted Timestamp column of a candle DataFrame.
+    Time ranges are found with a binary search and returned as row slices of the DataFrame,
+    so changing the window never scans or copies the whole frame.
+    """
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.timestamps = df["Timestamp"].to_numpy()
+
+        if len(self.timestamps) > 1 and np.any(self.timestamps[1:] < self.timestamps[:-1]):
+            raise ValueError("Timestamp column must be sorted in ascending order")
+
+    def bounds(self, start_unix: float, end_unix: float) -> tuple[int, int]:
+        """Row positions [start, end) of the candles with start_unix <= Timestamp <= end_unix."""
+        start = int(np.searchsorted(self.timestamps, start_unix, side="left"))
+        end = int(np.searchsorted(self.timestamps, end_unix, side="right"))
+        return start, end
+
+    def slice(self, start_unix: float, end_unix: float) -> pd.DataFrame:
+        start, end = self.bounds(start_unix, end_unix)
+        return self.df.iloc[start:end]
+
+
+def time_range_to_unix(start_time: str, end_time: str) -> tuple[float, float]:
+    """Convert "YYYY-MM-DD HH:MM" start and end times to unix timestamps."""
     start_unix = datetime.strptime(start_time, START_END_TIME_FORMAT).timestamp()
     end_unix = datetime.strptime(end_time, START_END_TIME_FORMAT).timestamp()
+    return start_unix, end_unix
+
+
+@timeit
+def parse_csv_data(df: pd.DataFrame, start_time: str, end_time: str, index: TimestampIndex = None) -> tuple[pd.DataFrame, CandleFeed]:
+    start_unix, end_unix = time_range_to_unix(start_time, end_time)
 
-    # Filter the DataFrame based on timestamp range
-    df = df[(df['Timestamp'] >= start_unix) & (df['Timestamp'] <= end_unix)]
+    # Slice the DataFrame to the timestamp range. Pass a cached index to skip the sort check
+    if index is None or index.df is not df:
+        index = TimestampIndex(df)
+    df = index.slice(start_unix, end_unix)
 
     if df.empty:
         logger.error(f"No data found in the specified time range: {start_time} <-> {end_time}")
         raise ValueError(f"No data found in the specified time range: {start_time} <-> {end_time}")
 
-    # Logging first and last row information
+    # Logging first and last row information. Candle stores have no Datetime column
     first_row = df.iloc[0]
     last_row = df.iloc[-1]
-    logger.info(f"Beginning row -> Datetime: {first_row['Datetime']} Timestamp: {first_row['Timestamp']}")
-    logger.info(f"Ending row -> Datetime: {last_row['Datetime']} Timestamp: {last_row['Timestamp']}")
+    logger.info(f"Beginning row -> Datetime: {timestamp_to_datetime(first_row['Timestamp'])} Timestamp: {first_row['Timestamp']}")
+    logger.info(f"Ending row -> Datetime: {timestamp_to_datetime(last_row['Timestamp'])} Timestamp: {last_row['Timestamp']}")
     logger.info(f"Total rows: {df.shape[0]}")
 
-    # Convert to list of dicts
-    row_dicts = df.to_dict(orient="records")
+    # Column views of the selected range. Candle stores may keep prices as float32, the feed widens them
+    feed = CandleFeed.from_dataframe(df)
 
-    return df, row_dicts
+    return df, feed
 
 
 def get_buffered_start_time(start_time: str, time_series_list) -> str:
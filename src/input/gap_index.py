@@ -0,0 +1,148 @@
+import os
+
+import numpy as np
+
+from utils.time_conversion import timestamp_to_datetime
+
+import logging
+from log.logger import LOGGER_NAME
+logger = logging.getLogger(LOGGER_NAME)
+
+'''
+Table of the missing minutes in a 1 minute candle dataset.
+
+The table is built with one vectorized pass over the Timestamp column and holds one row per gap:
+    start - timestamp of the first missing minute
+    end   - timestamp of the last missing minute
+    count - number of missing minutes
+It is computed once per dataset (and saved next to a candle store as gaps.npz), so the rest of the
+code can ask about gaps in a range instead of logging every missing minute as it goes by.
+'''
+
+GAP_COLUMNS = ["start", "end", "count"]
+GAPS_FILE_NAME = "gaps.npz"
+CANDLE_TICK = 60
+
+
+def scan_gaps(timestamps: np.ndarray, candle_tick: int = CANDLE_TICK, previous_timestamp=None) -> dict:
+    """
+    Find the gaps in a sorted timestamp array.
+    previous_timestamp is the last timestamp before the array, to include the gap at the seam of an append.
+    """
+    timestamps = np.asarray(timestamps).astype(np.int64)
+    if previous_timestamp is not None:
+        timestamps = np.r_[np.int64(previous_timestamp), timestamps]
+
+    diffs = np.diff(timestamps)
+    gap_rows = np.flatnonzero(diffs > candle_tick)
+
+    return {
+        "start": timestamps[gap_rows] + candle_tick,
+        "end": timestamps[gap_rows + 1] - candle_tick,
+        "count": diffs[gap_rows] // candle_tick - 1,
+    }
+
+
+class GapIndex:
+    def __init__(self, start: np.ndarray, end: np.ndarray, count: np.ndarray, candle_tick: int = CANDLE_TICK):
+        self.start = np.asarray(start, dtype=np.int64)
+        self.end = np.asarray(end, dtype=np.int64)
+        self.count = np.asarray(count, dtype=np.int64)
+        self.candle_tick = candle_tick
+
+    @classmethod
+    def from_timestamps(cls, timestamps: np.ndarray, candle_tick: int = CANDLE_TICK) -> 'GapIndex':
+        return cls(**scan_gaps(timestamps, candle_tick), candle_tick=candle_tick)
+
+    @classmethod
+    def load(cls, directory: str) -> 'GapIndex | None':
+        path = os.path.join(directory, GAPS_FILE_NAME)
+        if not os.path.isfile(path):
+            return None
+        with np.load(path) as npz:
+            return cls(npz["start"], npz["end"], npz["count"], int(npz["candle_tick"]))
+
+    def save(self, directory: str) -> None:
+        path = os.path.join(directory, GAPS_FILE_NAME)
+        with open(path + ".tmp", "wb") as f:
+            np.savez(f, start=self.start, end=self.end, count=self.count, candle_tick=self.candle_tick)
+        os.replace(path + ".tmp", path)
+
+    def extend(self, timestamps: np.ndarray, previous_timestamp) -> 'GapIndex':
+        """Return the index with the gaps of rows appended after previous_timestamp added."""
+        gaps = scan_gaps(timestamps, self.candle_tick, previous_timestamp)
+        return GapIndex(*(np.r_[getattr(self, column), gaps[column]] for column in GAP_COLUMNS), candle_tick=self.candle_tick)
+
+    def between(self, start_unix: float, end_unix: float) -> 'GapIndex':
+        """
+        Gaps overlapping [start_unix, end_unix], clipped to the range.
+        Minutes missing before the first or after the last row of the range are not gaps of the range.
+        """
+        first = int(np.searchsorted(self.end, start_unix, side="left"))
+        last = int(np.searchsorted(self.start, end_unix, side="right"))
+
+        start = np.maximum(self.start[first:last], int(np.ceil(start_unix / self.candle_tick)) * self.candle_tick)
+        end = np.minimum(self.end[first:last], int(end_unix // self.candle_tick) * self.candle_tick)
+        keep = end >= start
+        return GapIndex(start[keep], end[keep], ((end - start) // self.candle_tick + 1)[keep], self.candle_tick)
+
+    def affected_candles(self, candle_size_seconds: int) -> int:
+        """Number of candle_size_seconds candles with at least one missing minute."""
+        if len(self) == 0:
+            return 0
+
+        first_bucket = self.start - self.start % candle_size_seconds
+        last_bucket = self.end - self.end % candle_size_seconds
+        candles = (last_bucket - first_bucket) // candle_size_seconds + 1
+
+        # Neighbouring gaps can fall in the same candle
+        shared = np.count_nonzero(first_bucket[1:] == last_bucket[:-1])
+        return int(candles.sum() - shared)
+
+    @property
+    def missing_minutes(self) -> int:
+        return int(self.count.sum())
+
+    def summary(self, rows: int = None, largest: int = 5) -> dict:
+        """Gap counts for the UI and the logs. rows (the candles present) adds the coverage."""
+        order = np.argsort(self.count, kind="stable")[::-1][:largest]
+        summary = {
+            "gaps": len(self),
+            "missing_minutes": self.missing_minutes,
+            "largest_gaps": [self._record(i) for i in np.sort(order)],
+        }
+        if rows is not None:
+            expected = rows + self.missing_minutes
+            summary["coverage_percent"] = round(100 * rows / expected, 4) if expected else 100.0
+        return summary
+
+    def to_records(self, limit: int = None) -> list[dict]:
+        return [self._record(i) for i in range(len(self) if limit is None else min(limit, len(self)))]
+
+    def _record(self, i: int) -> dict:
+        return {
+            "start": int(self.start[i]),
+            "end": int(self.end[i]),
+            "count": int(self.count[i]),
+            "start_datetime": timestamp_to_datetime(self.start[i]),
+            "end_datetime": timestamp_to_datetime(self.end[i]),
+        }
+
+    def log_summary(self, label: str, rows: int = None) -> None:
+        if len(self) == 0:
+            logger.info(f"{label}: no missing candles")
+            return
+
+        summary = self.summary(rows)
+        largest = ", ".join(f"{gap['start_datetime']} ({gap['count']})" for gap in summary["largest_gaps"])
+        logger.warning(
+            f"{label}: {summary['gaps']} gaps, {summary['missing_minutes']} missing minutes"
+            + (f", {summary['coverage_percent']}% coverage" if rows is not None else "")
+            + f" | Largest: {largest}"
+        )
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    def __repr__(self) -> str:
+        return f"GapIndex(gaps={len(self)}, missing_minutes={self.missing_minutes})"
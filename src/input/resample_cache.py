@@ -0,0 +1,223 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from input.candle_feed import CandleFeed, FEED_COLUMNS
+from input.candle_store import META_FILE_NAME, is_candle_store
+from input.csv_input import file_signature, file_unchanged, file_appended
+from utils.lru_cache import LRUCache
+
+import logging
+from log.logger import LOGGER_NAME
+logger = logging.getLogger(LOGGER_NAME)
+
+'''
+Persistent cache of backtest inputs, shared between runs.
+
+Entries are .npz files named after a hash of their key, so the same data always lands in the same
+file. Every key starts with the fingerprint of the dataset it was built from (a sha256 of the CSV, or
+of the candle store's meta.json), which means editing or replacing the data simply stops matching the
+old entries and they age out. Two kinds of entry are stored:
+    feed      - the 1 minute rows of a CSV time range, so the CSV does not have to be parsed again
+    resampled - the candles of one timeframe built from one feed
+
+The cache is size capped. Once it grows past max_bytes the least recently used entries are removed.
+An LRUCache can be put in front of the files so a long running process (Flask) skips the disk as well.
+'''
+
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = os.path.join("cache", "resampled")
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3 # 2 GiB
+FINGERPRINTS_FILE_NAME = "fingerprints.json"
+HASH_BLOCK_BYTES = 8 * 1024 ** 2
+
+
+def _hash_file(path: str, start: int = 0, end: int = None) -> str:
+    """sha256 of the bytes [start, end) of a file, or up to the end of the file if end is None."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start if end is not None else None
+        while remaining is None or remaining > 0:
+            block = f.read(HASH_BLOCK_BYTES if remaining is None else min(HASH_BLOCK_BYTES, remaining))
+            if not block:
+                break
+            digest.update(block)
+            if remaining is not None:
+                remaining -= len(block)
+    return digest.hexdigest()
+
+
+def _entry_name(kind: str, key: tuple) -> str:
+    key_string = json.dumps([CACHE_VERSION, kind, *key])
+    return f"{kind}-{hashlib.sha1(key_string.encode()).hexdigest()}.npz"
+
+
+class ResampleCache:
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES, enabled: bool = True,
+                 memory_cache: LRUCache = None):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.memory_cache = memory_cache
+
+    def fingerprint(self, path: str) -> str | None:
+        """
+        Content fingerprint of a dataset (CSV file or candle store directory).
+        Hashing a large CSV takes a while, so the result is remembered against its size and mtime.
+        When rows were only appended since, the old fingerprint is chained with a hash of the new bytes.
+        """
+        if not self.enabled or not os.path.exists(path):
+            return None
+
+        if is_candle_store(path):
+            # meta.json records the row count, last timestamp and source of the store
+            return "store-" + _hash_file(os.path.join(path, META_FILE_NAME))
+
+        known = self._read_fingerprints()
+        entry = known.get(os.path.abspath(path))
+        if entry and file_unchanged(path, entry):
+            return entry["sha256"]
+
+        signature = file_signature(path)
+        if entry and file_appended(path, entry):
+            tail_sha256 = _hash_file(path, entry["size"], signature["size"])
+            sha256 = hashlib.sha256((entry["sha256"] + tail_sha256).encode()).hexdigest()
+        else:
+            logger.info(f"Fingerprinting {path}")
+            sha256 = _hash_file(path, 0, signature["size"])
+
+        known[os.path.abspath(path)] = {**signature, "sha256": sha256}
+        self._write_fingerprints(known)
+        return sha256
+
+    def load_feed(self, fingerprint: str, start_time: str, end_time: str) -> CandleFeed | None:
+        arrays = self._load("feed", (fingerprint, start_time, end_time))
+        if arrays is None:
+            return None
+
+        feed = CandleFeed(*(arrays[column] for column in FEED_COLUMNS))
+        feed.fingerprint = fingerprint
+        return feed
+
+    def save_feed(self, fingerprint: str, start_time: str, end_time: str, feed: CandleFeed) -> None:
+        self._save("feed", (fingerprint, start_time, end_time), dict(zip(FEED_COLUMNS, feed.columns())))
+
+    def load_resampled(self, feed: CandleFeed, candle_size_seconds: int, candle_tick: int) -> dict | None:
+        """Resampled columns of feed for one timeframe, or None if they are not cached."""
+        if feed.fingerprint is None:
+            return None
+        return self._load("resampled", self._resampled_key(feed, candle_size_seconds, candle_tick))
+
+    def save_resampled(self, feed: CandleFeed, candle_size_seconds: int, candle_tick: int, columns: dict) -> None:
+        if feed.fingerprint is None:
+            return
+        self._save("resampled", self._resampled_key(feed, candle_size_seconds, candle_tick), columns)
+
+    def _resampled_key(self, feed: CandleFeed, candle_size_seconds: int, candle_tick: int) -> tuple:
+        return (feed.fingerprint, candle_size_seconds, candle_tick, feed.first_timestamp, feed.last_timestamp, len(feed))
+
+    def _load(self, kind: str, key: tuple) -> dict | None:
+        if not self.enabled or key[0] is None:
+            return None
+
+        name = _entry_name(kind, key)
+        if self.memory_cache is not None:
+            arrays = self.memory_cache.get(name)
+            if arrays is not None:
+                return arrays
+
+        path = os.path.join(self.cache_dir, name)
+        try:
+            with np.load(path) as npz:
+                arrays = {column: npz[column] for column in npz.files}
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Discarding unreadable cache entry {path}: {e}")
+            self._remove(path)
+            return None
+
+        # Mark the entry as recently used for eviction
+        os.utime(path)
+        logger.info(f"💾 Disk cache hit: {kind} {key[1:]}")
+
+        if self.memory_cache is not None:
+            self.memory_cache.put(name, arrays)
+        return arrays
+
+    def _save(self, kind: str, key: tuple, arrays: dict) -> None:
+        if not self.enabled or key[0] is None:
+            return
+
+        name = _entry_name(kind, key)
+        if self.memory_cache is not None:
+            self.memory_cache.put(name, arrays)
+
+        # Names are derived from the content key, an existing file already holds the same arrays
+        path = os.path.join(self.cache_dir, name)
+        if os.path.exists(path):
+            return
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = path + ".tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write cache entry {path}: {e}")
+            self._remove(tmp_path)
+            return
+
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        if not os.path.isdir(self.cache_dir):
+            return
+
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".npz"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            logger.info(f"Evicting cache entry {path}")
+            self._remove(path)
+            total -= size
+
+    def clear(self) -> None:
+        if self.memory_cache is not None:
+            self.memory_cache.clear()
+        if not os.path.isdir(self.cache_dir):
+            return
+        for entry in os.scandir(self.cache_dir):
+            self._remove(entry.path)
+
+    def _read_fingerprints(self) -> dict:
+        try:
+            with open(os.path.join(self.cache_dir, FINGERPRINTS_FILE_NAME), "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _write_fingerprints(self, fingerprints: dict) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = os.path.join(self.cache_dir, FINGERPRINTS_FILE_NAME)
+        with open(path + ".tmp", "w") as f:
+            json.dump(fingerprints, f, indent=4)
+        os.replace(path + ".tmp", path)
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -2,6 +2,8 @@ import argparse
 import json
 
 from init.initalization import init, load_config, load_csv, init_test, init_test2
+from input.candle_stream import DEFAULT_CHUNK_ROWS
+from core.modes.intrabar_path import PATH_MODELS
 
 from configs.create_config import create_config_from_json
 
@@ -16,9 +18,30 @@ def main():
         "--config", type=str, required=True,
         help="The module path of the config file (e.g., btc_config)"
     )
+    parser.add_argument(
+        "--stream", action="store_true",
+        help="Read the candle data in chunks instead of loading it all into memory"
+    )
+    parser.add_argument(
+        "--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS,
+        help=f"Rows per chunk in --stream mode (default {DEFAULT_CHUNK_ROWS})"
+    )
+
+    parser.add_argument(
+        "--every-minute", action="store_true",
+        help="Visit every 1 minute row instead of jumping between events (same results, slower)"
+    )
+    parser.add_argument(
+        "--intrabar-path", choices=PATH_MODELS, default=None,
+        help="Resolve the fills of each 1 minute row along this price path instead of checking its open, low and high"
+    )
+    parser.add_argument(
+        "--event-engine", action="store_true",
+        help="Run the event engine even if the config is supported by the vectorized backtest (same results, slower)"
+    )
 
     args = parser.parse_args()
-    config = init_test2(args.config)
+    config = init_test2(args.config, stream=args.stream, chunk_rows=args.chunk_rows, fast_forward=not args.every_minute, intrabar_path=args.intrabar_path, vectorized=not args.event_engine)
 
     #config = init(args.config)
 
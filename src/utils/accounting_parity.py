@@ -0,0 +1,165 @@
+import argparse
+import copy
+import time
+from decimal import Decimal
+
+import numpy as np
+
+from core.exchange_state import exchange_state_factory, ACCOUNTING_BACKENDS
+from core.clients.backtest_client import BacktestClient
+from core.order.order import Order
+from core.position_tracking.trading_state import TradingState
+from core.position_tracking.open_position import OpenPosition
+from core.position_tracking.trade_data import TradeOverview
+from utils.calc import quantize
+from utils.fixed_point import to_fixed, to_fixed_ceiling, to_fixed_array, from_fixed
+
+'''
+Checks the fixed point accounting backend (FixedPointExchangeState) against the Decimal one and times both.
+
+    conversions: to_fixed/from_fixed against quantize(Decimal(price)) for random prices of every magnitude,
+                 and to_fixed_array against to_fixed
+    ticks:       the per tick work of the backtest (price update, open position update, order fill check)
+                 over a random walk with resting limit orders that fill, compared fill by fill
+    backtest:    a full backtest of a config module in every backend, visiting every 1 minute row,
+                 compared position by position
+Run from src:
+    python -m utils.accounting_parity
+    python -m utils.accounting_parity --ticks 2000000 --config configs.default_config
+'''
+
+
+def check_conversions(samples: int = 200_000, seed: int = 0) -> int:
+    """Number of prices where the fixed point conversion differs from quantize."""
+    rng = np.random.default_rng(seed)
+    prices = np.concatenate([
+        rng.uniform(0, 1, samples // 4),
+        rng.lognormal(10, 1, samples // 4),
+        rng.lognormal(10, 1, samples // 4).round(2),
+        rng.uniform(0, 1e-5, samples // 4),
+    ])
+    fixed_array = to_fixed_array(prices)
+
+    mismatches = 0
+    for price, array_fixed in zip(prices, fixed_array):
+        expected = quantize(Decimal(price))
+        fixed = to_fixed(price)
+        result = from_fixed(fixed)
+        if result != expected or str(result) != str(expected) or not 0 <= to_fixed_ceiling(price) - fixed <= 1 or array_fixed != fixed:
+            mismatches += 1
+    return mismatches
+
+
+def _random_walk(ticks: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return 40000 + np.cumsum(rng.normal(0, 5, ticks))
+
+
+def _new_order(exg_state, order_type: str, side: str, quantity: Decimal, limit_price: Decimal = None) -> Order:
+    order = Order(
+        exg_state.provide_order_number(), order_type, side, quantity, exg_state.taker_fee,
+        exg_state.current_timestamp, limit_price, allow_limit_adjust=False,
+    )
+    order.set_order_placed(exg_state.current_timestamp, exg_state.get_current_datetime(), exg_state.current_price)
+    return order
+
+
+def run_ticks(accounting: str, prices: np.ndarray) -> tuple[float, list]:
+    """
+    Runs the per tick work over prices. A position is bought at the start, and a limit BUY and SELL rest
+    around the price at all times, replaced after every fill (limit prices with more than 6 decimals).
+
+    Returns:
+        tuple: (seconds, [fills, position extremes, holdings]) where the second item has to match between backends
+    """
+    exg_state = exchange_state_factory(accounting, Decimal(10_000_000), Decimal(0), Decimal("0.001"), Decimal("0.002"))
+    trading_state = TradingState()
+    client = BacktestClient(exg_state, None)
+    timestamps = np.arange(len(prices), dtype=np.float64) * 15
+
+    exg_state.update_current_price_timestamp(prices[0], timestamps[0])
+    buy = _new_order(exg_state, "MARKET", "BUY", Decimal(100)) # enough coin for the SELL orders
+    client.place_order(buy)
+    trading_state.add_open_position(OpenPosition(TradeOverview(buy), 1))
+
+    spread = Decimal("0.0003")
+    fills = []
+    resting = {}
+    start = time.perf_counter()
+    for price, timestamp in zip(prices, timestamps):
+        exg_state.update_current_price_timestamp(price, timestamp)
+        trading_state.update_open_positions(exg_state)
+        for order in client.check_orders_for_execution():
+            fills.append((order.order_number, order.order_side, timestamp, str(order.execution.market_price)))
+            del resting[order.order_side]
+
+        for side in ("BUY", "SELL"):
+            if side not in resting:
+                current_price = exg_state.current_price
+                limit_price = current_price * (1 - spread if side == "BUY" else 1 + spread) / 3 * 3
+                resting[side] = _new_order(exg_state, "LIMIT", side, Decimal("0.05"), limit_price)
+                client.place_order(resting[side])
+    seconds = time.perf_counter() - start
+
+    open_position = trading_state.open_positions[buy.order_number]
+    state = [
+        fills,
+        [str(open_position.max_price_seen), open_position.max_price_seen_timestamp,
+         str(open_position.min_price_seen), open_position.min_price_seen_timestamp, open_position.bars],
+        [str(exg_state.USD_holdings), str(exg_state.coin_holdings), str(exg_state.current_price)],
+    ]
+    return seconds, state
+
+
+def run_backtest(config_module: str, accounting: str) -> tuple[float, list]:
+    from init.initalization import load_config, backtest_init
+    from configs.create_config import create_config_from_json, config_to_json
+
+    json_config = config_to_json(load_config(config_module))
+    json_config["accounting"] = accounting
+    config = create_config_from_json(copy.deepcopy(json_config))
+
+    start = time.perf_counter()
+    backtest_init(config, fast_forward=False)
+    seconds = time.perf_counter() - start
+
+    positions = [
+        [p.open_timestamp, p.close_timestamp, str(p.open_market_price), str(p.close_market_price), str(p.quantity),
+         str(p.profit_and_loss), str(p.run_up), str(p.drawdown), str(p.fees)]
+        for p in config.trading_state.closed_positions
+    ]
+    exg_state = config.exg_state
+    return seconds, [positions, str(exg_state.USD_holdings), str(exg_state.coin_holdings), exg_state.current_order_number]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the fixed point accounting backend against Decimal and time both.")
+    parser.add_argument("--samples", type=int, default=200_000, help="Random prices for the conversion check")
+    parser.add_argument("--ticks", type=int, default=500_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--config", type=str, default=None, help="Config module to backtest in every backend")
+    args = parser.parse_args()
+
+    mismatches = check_conversions(args.samples, args.seed)
+    print(f"conversions: {'MATCH' if mismatches == 0 else f'{mismatches} MISMATCHES'} over {args.samples} prices")
+
+    prices = _random_walk(args.ticks, args.seed)
+    results = {accounting: run_ticks(accounting, prices) for accounting in ACCOUNTING_BACKENDS}
+    reference_s, reference = results["decimal"]
+    for accounting, (seconds, state) in results.items():
+        parity = "MATCH" if state == reference else "DIFF"
+        print(f"ticks {accounting:8s}{parity:7s}{args.ticks / seconds:12,.0f} ticks/s{reference_s / seconds:7.2f}x  ({len(state[0])} fills)")
+
+    if args.config:
+        from log.logger import setup_logger
+        setup_logger(args.config, mode="off")
+
+        results = {accounting: run_backtest(args.config, accounting) for accounting in ACCOUNTING_BACKENDS}
+        reference_s, reference = results["decimal"]
+        for accounting, (seconds, state) in results.items():
+            parity = "MATCH" if state == reference else "DIFF"
+            print(f"backtest {accounting:8s}{parity:7s}{seconds:8.2f}s{reference_s / seconds:7.2f}x  ({len(state[0])} positions)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+import numpy as np
+
+'''
+Chart payloads for the TradingView Lightweight Charts front end, built column by column.
+
+Candles and indicator lines are masked for NaN with one vectorized pass and converted with tolist(),
+which keeps /submit fast for hundreds of thousands of candles. Both can optionally be limited to a
+visible time range and downsampled to a target number of points:
+    candles - consecutive candles are merged into OHLC buckets, so highs and lows are never lost
+    lines   - largest triangle three buckets (LTTB), which keeps the visual shape of the line
+'''
+
+CANDLE_COLUMNS = ["Timestamp", "Open", "High", "Low", "Close"]
+
+
+def visible_range(timestamps: np.ndarray, start: int = None, end: int = None) -> slice:
+    """Rows of sorted timestamps within [start, end]. None leaves that side open."""
+    first = int(np.searchsorted(timestamps, start, side="left")) if start is not None else 0
+    last = int(np.searchsorted(timestamps, end, side="right")) if end is not None else len(timestamps)
+    return slice(first, last)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Indices of the points kept by largest triangle three buckets downsampling.
+    The first and last point are always kept, every bucket in between contributes the point that forms
+    the largest triangle with the previous kept point and the average of the next bucket.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    every = (n - 2) / (threshold - 2)
+
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+
+    indices[-1] = n - 1
+    return indices
+
+
+def downsample_candles(timestamps, opens, highs, lows, closes, max_points: int) -> tuple:
+    """Merge consecutive candles into at most max_points OHLC candles, timed at the first candle of each bucket."""
+    n = len(timestamps)
+    if max_points is None or n <= max_points:
+        return timestamps, opens, highs, lows, closes
+
+    bucket = -(-n // max_points) # ceil
+    starts = np.arange(0, n, bucket)
+    ends = np.minimum(starts + bucket, n) - 1
+    return (
+        timestamps[starts],
+        opens[starts],
+        np.maximum.reduceat(highs, starts),
+        np.minimum.reduceat(lows, starts),
+        closes[ends],
+    )
+
+
+def candles_payload(df, max_points: int = None, start: int = None, end: int = None) -> list[dict]:
+    """Candles of a time series DataFrame as Lightweight Charts candlestick points, skipping rows with NaN."""
+    columns = [df[column].to_numpy(dtype=np.float64) for column in CANDLE_COLUMNS]
+
+    valid = ~np.isnan(np.column_stack(columns)).any(axis=1) if len(df) else np.zeros(0, dtype=bool)
+    columns = [column[valid] for column in columns]
+
+    window = visible_range(columns[0], start, end)
+    timestamps, opens, highs, lows, closes = downsample_candles(*(column[window] for column in columns), max_points)
+
+    return [
+        {"time": time, "open": open_, "high": high, "low": low, "close": close}
+        for time, open_, high, low, close in zip(
+            timestamps.astype(np.int64).tolist(), opens.tolist(), highs.tolist(), lows.tolist(), closes.tolist()
+        )
+    ]
+
+
+def split_points(lengths, max_points: int) -> list[int]:
+    """
+    Share of max_points for each of lengths, proportional to its length (largest remainder).
+    The shares add up to exactly min(max_points, sum(lengths)) and no share exceeds its length.
+    """
+    lengths = np.asarray(lengths, dtype=np.int64)
+    total = int(lengths.sum())
+    if total <= max_points:
+        return lengths.tolist()
+
+    exact = lengths * (max_points / total)
+    shares = np.floor(exact).astype(np.int64)
+    remainder = max_points - int(shares.sum())
+    shares[np.argsort(shares - exact, kind="stable")[:remainder]] += 1
+    return shares.tolist()
+
+
+def line_payload(timestamps, values, max_points: int = None, start: int = None, end: int = None) -> dict:
+    """
+    A line as column lists {"Timestamp": [...], "values": [...]}. NaN values become None (a gap for the chart).
+    With max_points, at most max_points points are returned: each gap between runs of non NaN values is
+    kept as a single None and the rest of max_points is split over the runs, each reduced with LTTB.
+    """
+    timestamps = np.asarray(timestamps).astype(np.int64)
+    values = np.asarray(values, dtype=np.float64)
+
+    window = visible_range(timestamps, start, end)
+    timestamps, values = timestamps[window], values[window]
+
+    if max_points is not None and len(values) > max_points:
+        runs = _valid_runs(values)
+        if len(runs) > (max_points + 1) // 2:
+            # Too fragmented for one point per run plus a gap between each: keep the longest runs
+            runs = sorted(sorted(runs, key=lambda run: run[0] - run[1])[:(max_points + 1) // 2])
+
+        keep = np.zeros(len(values), dtype=bool)
+        shares = split_points([last - first for first, last in runs], max(max_points - (len(runs) - 1), 0))
+        kept_runs = [(first, last, share) for (first, last), share in zip(runs, shares) if share]
+        for i, (first, last, share) in enumerate(kept_runs):
+            keep[first + _run_indices(timestamps[first:last], values[first:last], share)] = True
+            if i < len(kept_runs) - 1:
+                keep[last] = True # one NaN separates this run from the next
+        timestamps, values = timestamps[keep], values[keep]
+
+    values_list = values.astype(object)
+    values_list[np.isnan(values)] = None
+    return {"Timestamp": timestamps.tolist(), "values": values_list.tolist()}
+
+
+def _run_indices(x: np.ndarray, y: np.ndarray, share: int) -> np.ndarray:
+    """Indices of the share points kept for a run, LTTB from 3 points, the run's ends below that."""
+    if share >= 3 or share >= len(x):
+        return lttb_indices(x, y, share)
+    return np.array([0, len(x) - 1][:share], dtype=np.int64)
+
+
+def _valid_runs(values: np.ndarray) -> list[tuple[int, int]]:
+    """(first, last) row ranges of the runs of non NaN values."""
+    valid = np.r_[False, ~np.isnan(values), False].astype(np.int8)
+    edges = np.flatnonzero(np.diff(valid))
+    return list(zip(edges[::2].tolist(), edges[1::2].tolist()))
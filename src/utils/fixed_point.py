@@ -0,0 +1,55 @@
+from decimal import Decimal
+
+import numpy as np
+
+'''
+Prices as integers of millionths, the fixed point form of utils.calc.quantize.
+
+quantize(Decimal(price)) rounds the exact binary value of a float down to 6 decimals. to_fixed gives the
+same digits as an int without building a Decimal: as_integer_ratio is the exact value of the float (or
+Decimal) as a fraction, and integer floor division rounds it. from_fixed turns it back into the Decimal that
+quantize would have returned, same digits and same exponent. to_fixed_array does the same for a whole
+array of non-negative prices with NumPy.
+'''
+
+PRICE_DECIMALS = 6
+PRICE_SCALE = 10 ** PRICE_DECIMALS
+
+
+def to_fixed(value) -> int:
+    """value (float, numpy float, int or Decimal) in millionths, rounded toward zero like quantize."""
+    numerator, denominator = value.as_integer_ratio()
+    if numerator >= 0:
+        return numerator * PRICE_SCALE // denominator
+    return -(-numerator * PRICE_SCALE // denominator)
+
+
+def to_fixed_ceiling(value) -> int:
+    """value in millionths, rounded up. With to_fixed this brackets a value that has more than 6 decimals."""
+    numerator, denominator = value.as_integer_ratio()
+    return -(-numerator * PRICE_SCALE // denominator)
+
+
+def to_fixed_array(values) -> np.ndarray:
+    """
+    to_fixed of every value of a float array of non-negative prices, as int64.
+    The float product values * PRICE_SCALE is rounded, its rounding error is recovered exactly with
+    Dekker's product (PRICE_SCALE splits with no low part). The floor of the exact product is the floor
+    of the float product, minus one where the float product is a whole number that rounded up.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    product = values * PRICE_SCALE
+
+    high = values * 134217729.0 # 2**27 + 1, splits values into two halves of 26 bits
+    high = high - (high - values)
+    low = values - high
+    error = (high * PRICE_SCALE - product) + low * PRICE_SCALE
+
+    fixed = np.floor(product)
+    fixed -= (fixed == product) & (error < 0)
+    return fixed.astype(np.int64)
+
+
+def from_fixed(fixed: int) -> Decimal:
+    """The quantized Decimal of a fixed point value."""
+    return Decimal(fixed).scaleb(-PRICE_DECIMALS)
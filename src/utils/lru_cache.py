@@ -0,0 +1,126 @@
+from collections import OrderedDict
+import threading
+
+import numpy as np
+import pandas as pd
+
+import logging
+from log.logger import LOGGER_NAME
+logger = logging.getLogger(LOGGER_NAME)
+
+
+def estimate_nbytes(value) -> int:
+    """
+    Rough memory footprint of a cached value. Arrays, DataFrames and objects holding arrays
+    (CandleFeed) are measured, containers are summed, anything else counts as nothing.
+    """
+    if value is None:
+        return 0
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=False).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=False))
+    if isinstance(value, dict):
+        return sum(estimate_nbytes(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_nbytes(v) for v in value)
+    if hasattr(value, "columns") and callable(value.columns):
+        return sum(estimate_nbytes(column) for column in value.columns())
+    return 0
+
+
+class LRUCache:
+    """
+    Bounded least recently used cache with a memory budget.
+    Entries are evicted oldest first once either max_entries or max_bytes is exceeded.
+    A single entry larger than max_bytes is not stored at all.
+    """
+    def __init__(self, name: str, max_bytes: int, max_entries: int = None, sizeof=estimate_nbytes):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.sizeof = sizeof
+
+        self._entries = OrderedDict() # key -> (value, nbytes)
+        self._lock = threading.Lock() # Flask serves requests from several threads
+        self.current_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value) -> None:
+        nbytes = self.sizeof(value)
+
+        with self._lock:
+            if key in self._entries:
+                self._discard(key)
+
+            if nbytes > self.max_bytes:
+                logger.warning(f"{self.name}: entry of {nbytes} bytes exceeds the {self.max_bytes} byte budget, not cached")
+                return
+
+            self._entries[key] = (value, nbytes)
+            self.current_bytes += nbytes
+
+            while self._entries and (
+                self.current_bytes > self.max_bytes or
+                (self.max_entries is not None and len(self._entries) > self.max_entries)
+            ):
+                evicted_key, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_bytes
+                self.evictions += 1
+                logger.info(f"{self.name}: evicted {evicted_key}")
+
+    def invalidate(self, predicate=None) -> int:
+        """
+        Remove every entry whose key matches predicate(key), or all entries if predicate is None.
+
+        Returns:
+            int: Number of entries removed
+        """
+        with self._lock:
+            keys = [key for key in self._entries if predicate is None or predicate(key)]
+            for key in keys:
+                self._discard(key)
+            return len(keys)
+
+    def clear(self) -> None:
+        self.invalidate()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _discard(self, key) -> None:
+        _, nbytes = self._entries.pop(key)
+        self.current_bytes -= nbytes
+
+    def __contains__(self, key) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,83 @@
+import numpy as np
+
+'''
+Range minimum/maximum index over a fixed array.
+
+Level k holds the min (or max) of every aligned block of 2**k values, about 2n values in total. A range
+query or a "first value at or below/above a level from here on" search walks O(log n) blocks, so finding
+the minute a resting limit order fills costs the same whether it is 10 minutes or 10 days away.
+
+NaN propagates through the blocks like through np.minimum/np.maximum, and a search stops at a NaN value
+as if it reached the level. The backtest treats a missing price as an event, so that is what it needs.
+'''
+
+
+class RangeExtremes:
+    def __init__(self, values, kind: str = "min"):
+        if kind not in ("min", "max"):
+            raise ValueError(f"kind must be 'min' or 'max', got '{kind}'")
+        self.kind = kind
+        self._ufunc = np.minimum if kind == "min" else np.maximum
+        padding = np.inf if kind == "min" else -np.inf
+
+        level = np.asarray(values, dtype=np.float64)
+        self.n = len(level)
+        self.levels = [level]
+        while len(level) > 1:
+            if len(level) % 2:
+                level = np.append(level, padding)
+            level = self._ufunc(level[0::2], level[1::2])
+            self.levels.append(level)
+
+    def _passes(self, value: float, threshold: float) -> bool:
+        """True when a block with this extreme has no value at or beyond threshold (and no NaN)."""
+        return value > threshold if self.kind == "min" else value < threshold
+
+    def first_reaching(self, start: int, threshold: float, stop: int = None) -> int:
+        """
+        First index in [start, stop) whose value is <= threshold (min index) or >= threshold (max index),
+        or NaN. Returns stop when there is none.
+        """
+        stop = self.n if stop is None else min(stop, self.n)
+        levels = self.levels
+        top = len(levels) - 1
+        p = start
+
+        while p < stop:
+            # Largest aligned block starting at p
+            k = min((p & -p).bit_length() - 1, top) if p else top
+            if self._passes(levels[k][p >> k], threshold):
+                p += 1 << k
+                continue
+
+            # The block holds a match, narrow it down to the first one
+            while k > 0:
+                k -= 1
+                if self._passes(levels[k][p >> k], threshold):
+                    p += 1 << k
+            return min(p, stop)
+
+        return stop
+
+    def query(self, start: int, end: int) -> float:
+        """Min (or max) of values[start:end], from at most two blocks per level."""
+        if start >= end:
+            raise ValueError("Empty range")
+        result = None
+        k = 0
+        while start < end:
+            if start & 1:
+                value = self.levels[k][start]
+                result = value if result is None else self._ufunc(result, value)
+                start += 1
+            if end & 1:
+                end -= 1
+                value = self.levels[k][end]
+                result = value if result is None else self._ufunc(result, value)
+            start >>= 1
+            end >>= 1
+            k += 1
+        return float(result)
+
+    def __len__(self) -> int:
+        return self.n
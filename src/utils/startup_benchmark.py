@@ -0,0 +1,91 @@
+import argparse
+import statistics
+import subprocess
+import sys
+
+'''
+Import time of the entry points, to keep track of the startup cost of the CLI and the workers.
+
+Each measurement imports the module in a fresh interpreter with -X importtime. Reported are the median
+total import time, which of the heavy optional modules were loaded and the packages that took the longest.
+Run from src:
+    python -m utils.startup_benchmark
+    python -m utils.startup_benchmark main init.initalization --runs 10
+'''
+
+DEFAULT_MODULES = ["main", "init.initalization", "configs.create_config"]
+
+# Modules that should only be imported when a component that needs them is used
+HEAVY_MODULES = ["pandas_ta", "numba", "sqlalchemy", "flask"]
+
+_PROBE = "import sys, {module}; print(','.join(m for m in {heavy!r} if m in sys.modules))"
+
+
+def _parse_importtime(stderr: str) -> list[tuple[str, int, int]]:
+    """(module, self microseconds, cumulative microseconds) of every import, from the -X importtime output."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative, name = line[len("import time:"):].split("|", 2)
+        imports.append((name[1:].rstrip(), int(self_us), int(cumulative))) # nested imports keep their indent
+    return imports
+
+
+def measure(module: str) -> tuple[float, list[str], dict[str, int]]:
+    """
+    Returns:
+        tuple: (total import time in seconds, heavy modules loaded, {package: import time in microseconds})
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-W", "ignore", "-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+        capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    imports = _parse_importtime(result.stderr)
+    total = sum(cumulative for name, _, cumulative in imports if not name.startswith(" "))
+
+    packages = {}
+    for name, self_us, _ in imports:
+        package = name.strip().split(".")[0]
+        packages[package] = packages.get(package, 0) + self_us
+
+    loaded = [name for name in result.stdout.strip().split(",") if name]
+    return total / 1e6, loaded, packages
+
+
+def benchmark(modules: list[str], runs: int = 5, top: int = 5) -> list[dict]:
+    results = []
+    for module in modules:
+        times = []
+        for _ in range(runs):
+            seconds, loaded, packages = measure(module)
+            times.append(seconds)
+        results.append({
+            "module": module,
+            "median_s": statistics.median(times),
+            "min_s": min(times),
+            "heavy_modules": loaded,
+            "slowest_packages": sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top],
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the import time of the entry points.")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5, help="Number of slowest packages to list")
+    args = parser.parse_args()
+
+    for result in benchmark(args.modules, args.runs, args.top):
+        heavy = ", ".join(result["heavy_modules"]) or "none"
+        print(f"{result['module']}: median {result['median_s']:.3f}s, min {result['min_s']:.3f}s over {args.runs} runs, heavy modules: {heavy}")
+        for name, us in result["slowest_packages"]:
+            print(f"    {us / 1e3:9.1f} ms  {name}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,7 @@
 import datetime
+from functools import lru_cache
+
+import pandas as pd
 
 '''Datetime formats'''
 LOGGER_DATETIME_FORMAT = '%Y-%m-%d-%H-%M-%S'
@@ -10,9 +13,49 @@ TIMESTAMP_TO_DATETIME_FORMAT= "%Y-%m-%d, %H:%M:%S %a"
 
 
 #Converts to UTC. This keeps the data aligned(at least in the backtest) with the csv data
+#A backtest formats the same few timestamps over and over (every check in a minute), so recent results are kept
+@lru_cache(maxsize=4096)
 def timestamp_to_datetime(epoch_time):
     return (
         datetime.datetime
         .fromtimestamp(epoch_time, tz=datetime.timezone.utc)
         .strftime(TIMESTAMP_TO_DATETIME_FORMAT)
     )
+
+class LazyDatetime:
+    '''
+    A timestamp that is only formatted with timestamp_to_datetime once it is turned into a string.
+    Hand it to a logger as a %s argument and records that are never emitted cost no formatting at all.
+    '''
+    __slots__ = ("timestamp", "_text")
+
+    def __init__(self, timestamp):
+        self.timestamp = timestamp
+        self._text = None
+
+    def __str__(self):
+        if self._text is None:
+            self._text = timestamp_to_datetime(self.timestamp)
+        return self._text
+
+    def __format__(self, format_spec):
+        return format(str(self), format_spec)
+
+    def __repr__(self):
+        return str(self)
+
+    def __eq__(self, other):
+        if isinstance(other, LazyDatetime):
+            return self.timestamp == other.timestamp
+        return str(self) == other
+
+    def __hash__(self):
+        return hash(str(self))
+
+#Vectorized version of timestamp_to_datetime for whole columns of timestamps
+def timestamps_to_datetimes(epoch_times):
+    return (
+        pd.to_datetime(epoch_times, unit="s", utc=True)
+        .strftime(TIMESTAMP_TO_DATETIME_FORMAT)
+        .to_numpy(dtype=object)
+    )